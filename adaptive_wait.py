@@ -0,0 +1,170 @@
+import collections
+import math
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+MAX_TIMEOUT = 10  # Seconds, no wait is longer
+MIN_TIMEOUT = 0.5  # Seconds, no learned timeout is shorter
+INITIAL_OPTIONAL_TIMEOUT = 1  # Seconds, optional conditions are waited for this long until their timeout is learned
+HISTORY_SIZE = 100  # Recent latencies kept per key
+MIN_SAMPLES = 5  # Latencies of a key needed before its timeout is learned
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_FACTOR = 3  # Learned timeouts are this many times the percentile
+POLL_FRACTION = 0.2  # Poll interval as a fraction of the median latency
+MIN_POLL_INTERVAL = 0.02  # Seconds
+MAX_POLL_INTERVAL = 0.5  # Seconds, also used for keys without latencies
+
+
+class AdaptiveWaiter:
+    """
+    Waits for conditions in a page by polling them, and learns how long each of them (f.e. an element of an xpath)
+    usually takes, to poll at a matching rate and to give up on optional conditions once they are overdue
+    Notes:
+        * One waiter can be shared by browsers and threads, they all learn from each other
+        * Required conditions are waited for up to the maximal timeout, optional ones (which are allowed not to happen,
+          like a popup) only up to the learned timeout
+        * Optional waits that time out count as samples too, so a condition that usually does not happen (f.e. the
+          login popup, for logged in users) is soon given up on after the minimal timeout
+    """
+
+    def __init__(self,
+                 max_timeout: float = MAX_TIMEOUT,
+                 min_timeout: float = MIN_TIMEOUT,
+                 initial_optional_timeout: float = INITIAL_OPTIONAL_TIMEOUT,
+                 percentile: float = TIMEOUT_PERCENTILE,
+                 timeout_factor: float = TIMEOUT_FACTOR):
+        """
+        Args:
+            max_timeout (float): Seconds to wait for required conditions, and for optional ones before learning
+            min_timeout (float): Minimal learned timeout
+            initial_optional_timeout (float): Seconds to wait for optional conditions before their timeout is learned
+            percentile (float): Percentile of recent latencies that learned timeouts are based on
+            timeout_factor (float): Learned timeouts are this many times the percentile
+        """
+        self._max_timeout = max_timeout
+        self._min_timeout = min_timeout
+        self._initial_optional_timeout = initial_optional_timeout
+        self._percentile = percentile
+        self._timeout_factor = timeout_factor
+        self._latencies = {}  # Key -> deque of recent latencies, infinite for optional waits that timed out
+        self._timeout_counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def until(self, driver, condition, key, optional: bool = False, max_timeout: float = None,
+              min_timeout: float = None):
+        """
+        Polls a condition until it holds, see WebDriverWait.until(). Raises TimeoutException if it does not in time
+
+        Args:
+            driver (WebDriver):
+            condition (callable): Gets the driver and returns a truthy value once the condition holds
+            key (str): Identifies the condition for learning its latency, f.e. the xpath of awaited elements
+            optional (bool): Whether to wait only up to the learned timeout
+            max_timeout (float): Overrides the maximal timeout of the waiter
+            min_timeout (float): Seconds an optional condition is waited for at least, whatever its learned timeout.
+                                 For conditions that must not be missed when they are slow, though they rarely happen
+
+        Returns:
+            The value returned by the condition
+        """
+        max_timeout = self._max_timeout if max_timeout is None else max_timeout
+        timeout = min(max(self.timeout(key), min_timeout or 0), max_timeout) if optional else max_timeout
+
+        start_time = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, timeout, poll_frequency=self.poll_interval(key)).until(condition)
+        except TimeoutException:
+            with self._lock:
+                self._timeout_counts[key] += 1
+            if optional:
+                self.observe(key, math.inf)
+            raise
+
+        self.observe(key, time.perf_counter() - start_time)
+        return result
+
+    def observe(self, key, seconds):
+        """
+        Records the latency of a condition, for conditions that are waited for elsewhere
+        """
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None:
+                latencies = self._latencies[key] = collections.deque(maxlen=HISTORY_SIZE)
+            latencies.append(seconds)
+
+    def timeout(self, key):
+        """
+        Returns:
+            float: Seconds to wait for an optional condition, the initial optional timeout until enough latencies are
+                   known
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < MIN_SAMPLES:
+            return min(self._initial_optional_timeout, self._max_timeout)
+
+        latency = _percentile(latencies, self._percentile)
+        if math.isinf(latency):
+            # The condition often does not happen, it is waited for as long as it takes when it does
+            finite_latencies = [latency for latency in latencies if not math.isinf(latency)]
+            if len(finite_latencies) < MIN_SAMPLES:
+                return self._min_timeout
+            latency = _percentile(finite_latencies, self._percentile)
+        return min(max(latency * self._timeout_factor, self._min_timeout), self._max_timeout)
+
+    def poll_interval(self, key):
+        """
+        Returns:
+            float: Seconds between polls of a condition
+        """
+        with self._lock:
+            latencies = sorted(latency for latency in self._latencies.get(key, ()) if not math.isinf(latency))
+        if not latencies:
+            return MAX_POLL_INTERVAL
+        return min(max(_percentile(latencies, 50) * POLL_FRACTION, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Maps each key to its number of latencies, their median and learned percentile, number of timeouts,
+                  and the resulting timeout and poll interval
+        """
+        with self._lock:
+            keys = set(self._latencies) | set(self._timeout_counts)
+            latencies = {key: sorted(latency for latency in self._latencies.get(key, ()) if not math.isinf(latency))
+                         for key in keys}
+            timeout_counts = dict(self._timeout_counts)
+
+        return {key: {'samples': len(latencies[key]),
+                      'median': _percentile(latencies[key], 50) if latencies[key] else None,
+                      'percentile': _percentile(latencies[key], self._percentile) if latencies[key] else None,
+                      'timeouts': timeout_counts.get(key, 0),
+                      'timeout': self.timeout(key),
+                      'poll_interval': self.poll_interval(key)}
+                for key in keys}
+
+
+def _percentile(sorted_values, percentile):
+    # Nearest-rank percentile
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+_shared_waiter = None
+_shared_waiter_lock = threading.Lock()
+
+
+def get_shared_waiter():
+    """
+    Returns:
+        AdaptiveWaiter: Process-wide waiter, used by browsers that were not given one explicitly
+    """
+    global _shared_waiter
+    with _shared_waiter_lock:
+        if _shared_waiter is None:
+            _shared_waiter = AdaptiveWaiter()
+        return _shared_waiter
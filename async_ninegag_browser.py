@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import urllib.parse
+
+import aiohttp
+
+from const import NON_BOT_USER_AGENT
+from ninegag_basic_browser import NinegagBasicBrowser
+from ninegag_browser import ARTIFICIAL_AVERAGE_DELAY
+from rate_scheduler import get_shared_rate_scheduler, rate_key
+
+MAX_IN_FLIGHT = 100  # Concurrent requests
+
+
+class AsyncNinegagBrowser(contextlib.AbstractAsyncContextManager):
+    """
+    Asyncio counterpart of NinegagBrowser, keeps many requests in flight within a single thread
+    Notes:
+        * Pages are not kept as browser state, since many of them are fetched at once. Scanning methods get urls instead
+    """
+
+    def __init__(self,
+                 max_in_flight: int = MAX_IN_FLIGHT,
+                 average_delay: float = ARTIFICIAL_AVERAGE_DELAY,
+                 parse_executor=None,
+                 rate_scheduler=None):
+        """
+        Args:
+            max_in_flight (int): Maximal number of concurrent requests
+            average_delay (float): Artificial average delay between requests to a host, see utils.random_wait()
+            parse_executor (concurrent.futures.Executor): Executor to parse pages in. By default, uses the event loop's
+                                                          default thread pool
+            rate_scheduler (rate_scheduler.RateScheduler): Spaces requests. By default, uses the process-wide shared
+                                                           scheduler
+        """
+        self._max_in_flight = max_in_flight
+        self._average_delay = average_delay
+        self._parse_executor = parse_executor
+        self._rate_scheduler = rate_scheduler or get_shared_rate_scheduler()
+        self._semaphore = None
+        self._session = None
+        self._host = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        self._session = aiohttp.ClientSession(headers={'user-agent': NON_BOT_USER_AGENT},
+                                              connector=aiohttp.TCPConnector(limit=self._max_in_flight))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._session.close()
+
+    async def get(self, url):
+        """
+        Fetches a page, raises aiohttp.ClientResponseError if status code is not OK
+
+        Args:
+            url (str): Page url. If it starts with '/' we stay at the last visited host
+
+        Returns:
+            str: Page's html
+        """
+        if self._host and url.startswith('/'):
+            url = self._host + url
+
+        # Delays are awaited outside of the semaphore, so waiting requests do not hold a slot
+        await self._rate_scheduler.async_wait(rate_key(url), self._average_delay)
+        async with self._semaphore:
+            async with self._session.get(url) as response:
+                response.raise_for_status()
+                page_html = await response.text()
+
+        parsed_url = urllib.parse.urlparse(url)
+        self._host = f'{parsed_url.scheme}://{parsed_url.netloc}'
+        return page_html
+
+    async def scan_post(self, url):
+        """
+        Fetches a 9GAG post and extracts useful data from it, parsing is done outside of the event loop
+
+        Args:
+            url (str): Post's url
+
+        Returns:
+            NinegagPost: Representation of the post
+        """
+        page_html = await self.get(url)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._parse_executor, NinegagBasicBrowser.scan_post_from_html, page_html, url)
+
+    async def scan_posts(self, urls):
+        """
+        Concurrently fetches and extracts data from many 9GAG posts
+        Notes:
+            * Posts are yielded in order of completion, not in order of `urls`
+
+        Args:
+            urls (iterable): Posts' urls, consumed lazily
+
+        Yields:
+            NinegagPost: Representation of a post
+        """
+        pending = set()
+        try:
+            for url in urls:
+                if len(pending) >= self._max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(self.scan_post(url)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,16 +1,29 @@
-import requests
 import urllib.parse
 from lxml import html
 
 from basic_browser import BasicBrowser
+from http_session import get_shared_session_pool
 
 
 class BackgroundBrowser(BasicBrowser):
-    def __init__(self):
-        super().__init__()
+    request_headers = None  # Sent with every request
+
+    def __init__(self, session_pool=None, rate_scheduler=None, cache=None, instrumentation=None):
+        """
+        Args:
+            session_pool (http_session.SessionPool): Pool of keep-alive sessions to fetch pages with. By default, uses
+                                                     the process-wide shared pool
+            rate_scheduler (rate_scheduler.RateScheduler): See BasicBrowser
+            cache (http_cache.HttpCache): Cache of responses (and of their parsed pages). By default, nothing is cached
+            instrumentation (instrumentation.Instrumentation): See BasicBrowser
+        """
+        super().__init__(rate_scheduler, instrumentation)
+        self._session_pool = session_pool or get_shared_session_pool()
+        self._cache = cache
         self._html = None
         self._raw_html = None
         self._host = None
+        self._url = None  # Url of the current page
 
     def _non_delayed_get(self, url):
         # If url starts with '/' we stay at current host and adjust the request accordingly
@@ -18,14 +31,22 @@ class BackgroundBrowser(BasicBrowser):
             url = self._host + url
 
         # Performs the request, raises requests.HTTPError if status code is not OK
-        response = requests.get(url)
-        response.raise_for_status()
+        if self._cache:
+            # The cache parses pages it stores, and mostly hands out trees it already parsed
+            with self._timer('fetch'):
+                self._raw_html, self._html, _ = self._cache.fetch(self._session_pool, url, self.request_headers)
+        else:
+            with self._timer('fetch'):
+                response = self._session_pool.get(url, headers=self.request_headers)
+                response.raise_for_status()
+                self._raw_html = response.text
+            with self._timer('parse'):
+                self._html = html.fromstring(self._raw_html)
 
         # Updates attributes
         parsed_url = urllib.parse.urlparse(url)
         self._host = f'{parsed_url.scheme}://{parsed_url.netloc}'
-        self._raw_html = response.text
-        self._html = html.fromstring(self._raw_html)
+        self._url = url
 
     def _find_elements_by_xpath(self, xpath):
         return self._html.xpath(xpath)
@@ -1,11 +1,23 @@
 import contextlib
 
 from exceptions import NoSuchElement
+from instrumentation import NULL_INSTRUMENTATION
+from rate_scheduler import get_shared_rate_scheduler
 
 
 class BasicBrowser(contextlib.AbstractContextManager):
-    def __init__(self):
-        pass
+    _section = None  # Section being browsed, labels instrumentation
+
+    def __init__(self, rate_scheduler=None, instrumentation=None):
+        """
+        Args:
+            rate_scheduler (rate_scheduler.RateScheduler): Spaces delayed requests. By default, uses the process-wide
+                                                           shared scheduler
+            instrumentation (instrumentation.Instrumentation): Collects durations of browsing phases. By default,
+                                                               nothing is collected
+        """
+        self._rate_scheduler = rate_scheduler or get_shared_rate_scheduler()
+        self._instrumentation = instrumentation or NULL_INSTRUMENTATION
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
@@ -16,6 +28,18 @@ class BasicBrowser(contextlib.AbstractContextManager):
     def _non_delayed_get(self, url):
         raise NotImplemented
 
+    def _rate_wait(self, key, seconds):
+        """
+        Waits for a send-slot of the rate scheduler, see RateScheduler.wait()
+        """
+        self._instrumentation.observe('rate_wait', self._rate_scheduler.wait(key, seconds), self._section)
+
+    def _timer(self, phase):
+        """
+        Times the body of a with statement as a browsing phase, see Instrumentation.timer()
+        """
+        return self._instrumentation.timer(phase, self._section)
+
     def _find_element_by_xpath(self, xpath):
         elements = self._find_elements_by_xpath(xpath)
         if not elements:
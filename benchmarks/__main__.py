@@ -0,0 +1,97 @@
+"""
+Runs the offline benchmark suite (see benchmarks/suite.py) and records its results by version, so they can be compared
+across versions.
+
+Usage: python -m benchmarks [-k NAME] [--latency SECONDS] [--repeat N] [--compare VERSION]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+
+from benchmarks.stand_in_server import StandInServer
+from benchmarks.suite import BENCHMARKS, BenchContext, corpus_routes, load_corpus
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+REPEAT = 5
+MIN_RUN_TIME = 0.2  # Seconds, short benchmarks are run in a loop until they take this long
+
+
+def current_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(function, context, repeat):
+    """
+    Returns:
+        float: Best operations per second out of `repeat` runs
+    """
+    best = 0
+    for _ in range(repeat):
+        operation_count = 0
+        start = time.perf_counter()
+        while True:
+            operation_count += function(context)
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_RUN_TIME:
+                break
+        best = max(best, operation_count / elapsed)
+    return best
+
+
+def load_results(version):
+    with open(os.path.join(RESULTS_DIR, f'{version}.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'{results["version"]}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[1])
+    parser.add_argument('-k', '--filter', default='', help='Run only benchmarks whose name contains this')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the server waits before each answer')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='Runs per benchmark, the best one is kept')
+    parser.add_argument('--compare', metavar='VERSION', help='Recorded version to compare against')
+    parser.add_argument('--no-save', action='store_true', help='Do not record the results')
+    args = parser.parse_args()
+
+    baseline = load_results(args.compare)['benchmarks'] if args.compare else {}
+    post_pages, feed_pages, feed_post_ids = load_corpus()
+    results = {'version': current_version(),
+               'time': datetime.datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(),
+               'latency': args.latency,
+               'benchmarks': {}}
+
+    with StandInServer(corpus_routes(post_pages, feed_pages, feed_post_ids), latency=args.latency) as server:
+        context = BenchContext(server, post_pages, feed_pages, feed_post_ids)
+        for name, function in BENCHMARKS.items():
+            if args.filter not in name:
+                continue
+            ops_per_second = measure(function, context, args.repeat)
+            results['benchmarks'][name] = ops_per_second
+
+            line = f'{name:32} {ops_per_second:12.1f} ops/s'
+            if name in baseline:
+                line += f' ({ops_per_second / baseline[name] - 1:+.1%} vs {args.compare})'
+            print(line)
+
+    if not args.no_save:
+        print(f'Results recorded in {save_results(results)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Compares parsing whole post pages with streaming them through the fast-path extractor, which stops once all fields
+are found. Pages are padded with an inline script and a comment list, as real post pages are.
+
+Usage: python -m benchmarks.bench_extractors [comment_count]
+"""
+import sys
+import time
+
+from benchmarks.corpus import pad_post_page, post_fixture_ids, read_post_fixture
+from ninegag_basic_browser import NinegagBasicBrowser
+
+COMMENT_COUNT = 2000
+ROUNDS = 50
+
+
+def bench(pages, fast):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for page in pages:
+            NinegagBasicBrowser.scan_post_from_html(page, fast=fast)
+    return ROUNDS * len(pages) / (time.perf_counter() - start)
+
+
+def main(comment_count=COMMENT_COUNT):
+    pages = [pad_post_page(read_post_fixture(post_id), comment_count) for post_id in post_fixture_ids()]
+    print(f'{sum(map(len, pages)) // len(pages) / 1024:.1f} KiB/page')
+    for fast in (False, True):
+        print(f'{"streaming" if fast else "full DOM"}: {bench(pages, fast):8.1f} pages/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else COMMENT_COUNT)
@@ -0,0 +1,40 @@
+"""
+Compares fetching pages with a new connection per request (module-level requests.get) against pooled keep-alive
+sessions, using a local stand-in server.
+
+Usage: python -m benchmarks.bench_http_session [page_count] [latency]
+"""
+import sys
+import time
+
+import requests
+
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from http_session import SessionPool
+
+PAGE_COUNT = 200
+
+
+def bench(fetch, url, page_count):
+    start = time.perf_counter()
+    for _ in range(page_count):
+        response = fetch(url)
+        response.raise_for_status()
+    return page_count / (time.perf_counter() - start)
+
+
+def main(page_count=PAGE_COUNT, latency=0.0):
+    with StandInServer({'/gag/aBm3Qy7': read_post_fixture('aBm3Qy7')}, latency=latency) as server:
+        url = f'{server.url}/gag/aBm3Qy7'
+
+        print(f'requests.get:      {bench(requests.get, url, page_count):8.1f} pages/s')
+        connections_before = server.connection_count
+        with SessionPool() as session_pool:
+            print(f'SessionPool.get:   {bench(session_pool.get, url, page_count):8.1f} pages/s '
+                  f'({server.connection_count - connections_before} connections)')
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    main(int(arguments[0]) if arguments else PAGE_COUNT, float(arguments[1]) if len(arguments) > 1 else 0.0)
@@ -0,0 +1,54 @@
+"""
+Compares transferred bytes and load time per page of regular and lean browsing, over a local fixture site whose
+posts embed a large image, a video and an analytics script.
+Requires Firefox and Geckodriver, see README.
+
+Usage: python -m benchmarks.bench_lean_browsing [page_count]
+"""
+import statistics
+import sys
+
+from benchmarks.corpus import post_fixture_ids, read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from const import WEBDRIVER_PATH
+from selenium_browser import SeleniumBrowser
+
+PAGE_COUNT = 20
+IMAGE_SIZE = 512 * 1024  # Bytes
+VIDEO_SIZE = 2 * 1024 * 1024  # Bytes
+HEAVY_CONTENT = ('<img src="/media/{post_id}.jpg">'
+                 '<video autoplay muted src="/media/{post_id}.webm"></video>'
+                 '<script src="/analytics.js"></script>')
+
+
+def fixture_site():
+    post_ids = post_fixture_ids()
+    routes = {'/analytics.js': (200, {'Content-Type': 'application/javascript'}, '/* tracker */' * 4096)}
+    for post_id in post_ids:
+        page = read_post_fixture(post_id).replace('</article>', HEAVY_CONTENT.format(post_id=post_id) + '</article>')
+        routes[f'/gag/{post_id}'] = page
+        routes[f'/media/{post_id}.jpg'] = (200, {'Content-Type': 'image/jpeg'}, b'\xff' * IMAGE_SIZE)
+        routes[f'/media/{post_id}.webm'] = (200, {'Content-Type': 'video/webm'}, b'\x1a' * VIDEO_SIZE)
+    return post_ids, routes
+
+
+def bench(server, post_ids, page_count, lean):
+    with SeleniumBrowser(lean=lean, record_page_stats=True, executable_path=WEBDRIVER_PATH) as browser:
+        for i in range(page_count):
+            # A query string defeats the cache, as every page of a real scan is a different post
+            browser._non_delayed_get(f'{server.url}/gag/{post_ids[i % len(post_ids)]}?page={i}')
+        return (statistics.mean(stats.transferred_bytes for stats in browser.page_stats),
+                statistics.mean(stats.load_time for stats in browser.page_stats))
+
+
+def main(page_count=PAGE_COUNT):
+    post_ids, routes = fixture_site()
+    with StandInServer(routes) as server:
+        for lean in (False, True):
+            transferred_bytes, load_time = bench(server, post_ids, page_count, lean)
+            print(f'{"lean" if lean else "regular"}: {transferred_bytes / 1024:10.1f} KiB/page '
+                  f'{load_time * 1000:8.1f} ms/page')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else PAGE_COUNT)
@@ -0,0 +1,62 @@
+"""
+The fixture corpus of tests/fixtures, in the shapes that both tests and benchmarks need. Imports nothing of the
+browsers or of the tests, so benchmarks load only what they measure
+"""
+import json
+import os
+import urllib.parse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+POST_FIXTURES_DIR = os.path.join(FIXTURES_DIR, 'posts')
+FEED_FIXTURES_DIR = os.path.join(FIXTURES_DIR, 'feeds')
+FEED_PATH = '/v1/group-posts/group/funny/type/hot'  # Path the feed fixtures are served at
+
+
+def read_post_fixture(post_id):
+    with open(os.path.join(POST_FIXTURES_DIR, f'{post_id}.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def read_feed_fixture(name):
+    with open(os.path.join(FEED_FIXTURES_DIR, f'{name}.json'), encoding='utf-8') as f:
+        return f.read()
+
+
+def post_fixture_ids():
+    """
+    Returns:
+        list: Ids of the posts that have a fixture page, sorted
+    """
+    return sorted(file_name.split('.')[0] for file_name in os.listdir(POST_FIXTURES_DIR))
+
+
+def pad_post_page(page, comment_count=200):
+    """
+    Pads a post page the way real ones are, with an inline script and a long comment list after the post
+    """
+    comments = ''.join(f'<div class="comment"><p>Comment number {i}</p><span>{i}</span></div>'
+                       for i in range(comment_count))
+    return page.replace('</body>', f'<script>window._config = {{"a": "{"x" * 10000}"}};</script>'
+                                   f'<div class="comments">{comments}</div></body>')
+
+
+def feed_fixture_pages():
+    """
+    Returns:
+        list: Pages of the feed fixture, in cursor order
+    """
+    return [read_feed_fixture(file_name.split('.')[0]) for file_name in sorted(os.listdir(FEED_FIXTURES_DIR))]
+
+
+def feed_replayer(feed_pages):
+    """
+    Returns:
+        callable: StandInServer route that serves feed pages, choosing each by the cursor the previous page pointed to
+    """
+    cursors = [None] + [json.loads(page)['data']['nextCursor'] for page in feed_pages]
+
+    def replay_feed(handler):
+        query = urllib.parse.urlparse(handler.path).query
+        return 200, {'Content-Type': 'application/json'}, feed_pages[cursors.index(query or None)]
+
+    return replay_feed
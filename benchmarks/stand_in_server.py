@@ -0,0 +1,90 @@
+import contextlib
+import http.server
+import threading
+import time
+
+
+class StandInServer(contextlib.AbstractContextManager):
+    """
+    Local HTTP server that replays canned responses, used in place of 9gag.com by tests and benchmarks
+    """
+
+    def __init__(self, routes=None, latency=0):
+        """
+        Args:
+            routes (dict): Maps a path to its response, which is either a body (str or bytes), a
+                           (status, headers, body) tuple, or a callable that gets the request handler and returns
+                           such a tuple
+            latency (float): Seconds to wait before answering each request
+        """
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.request_count = 0
+        self.connection_count = 0
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _handler_class(self):
+        stand_in_server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Allows keep-alive connections
+            disable_nagle_algorithm = True  # Otherwise small responses over kept-alive connections stall on ACKs
+
+            def setup(self):
+                super().setup()
+                stand_in_server.connection_count += 1
+
+            def do_GET(self):
+                stand_in_server.request_count += 1
+                if stand_in_server.latency:
+                    time.sleep(stand_in_server.latency)
+
+                route = stand_in_server.routes.get(self.path.split('?')[0])
+                if route is None:
+                    status, headers, body = 404, {}, b'Not Found'
+                elif callable(route):
+                    status, headers, body = route(self)
+                elif isinstance(route, tuple):
+                    status, headers, body = route
+                else:
+                    status, headers, body = 200, {}, route
+
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if 'Content-Type' not in headers:
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,133 @@
+"""
+Offline benchmarks of the hot paths, over the fixture corpus of tests/fixtures served by a local stand-in of 9GAG.
+Run them with `python -m benchmarks`
+"""
+import collections
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.corpus import (FEED_PATH, feed_fixture_pages, feed_replayer, post_fixture_ids,
+                               read_post_fixture)
+from feed_fetcher import NinegagFeedFetcher
+from http_session import SessionPool
+from media_downloader import MediaDownloader
+from ninegag_basic_browser import NinegagBasicBrowser
+from ninegag_browser import NinegagBrowser
+from rate_scheduler import RateScheduler
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUMERIC_LABELS = ('7', '42', '815', '1.2k', '25.4k', '999k', '1.5m', '')
+MEDIA_SIZE = 256 * 1024  # Bytes of each synthetic media file
+
+# Everything a benchmark runs against, the server is started by the runner
+BenchContext = collections.namedtuple('BenchContext', ['server', 'post_pages', 'feed_pages', 'feed_post_ids'])
+
+BENCHMARKS = {}  # Name -> function that gets a BenchContext, runs once and returns the number of operations done
+
+
+def benchmark(function):
+    BENCHMARKS[function.__name__.replace('bench_', '', 1)] = function
+    return function
+
+
+def load_corpus():
+    """
+    Returns:
+        tuple: Post pages by post id, feed pages in cursor order and the ids of posts in the feed
+    """
+    post_pages = {post_id: read_post_fixture(post_id) for post_id in post_fixture_ids()}
+    feed_pages = feed_fixture_pages()
+    feed_post_ids = [post['id'] for page in feed_pages for post in json.loads(page)['data']['posts']]
+    return post_pages, feed_pages, feed_post_ids
+
+
+def corpus_routes(post_pages, feed_pages, feed_post_ids):
+    """
+    Serves the feed, and a post page and a synthetic image for every post in it (post pages of the corpus are reused
+    in turn)
+    """
+    pages = list(post_pages.values())
+    routes = {FEED_PATH: feed_replayer(feed_pages)}
+    for i, post_id in enumerate(feed_post_ids):
+        routes[f'/gag/{post_id}'] = pages[i % len(pages)]
+    routes.update({f'/gag/{post_id}': page for post_id, page in post_pages.items()})
+    for post_id in feed_post_ids:
+        block = hashlib.sha256(post_id.encode('utf-8')).digest()
+        routes[f'/photo/{post_id}_700bwp.webp'] = (200, {'Content-Type': 'image/webp'},
+                                                   block * (MEDIA_SIZE // len(block)))
+    return routes
+
+
+@benchmark
+def bench_scan_post_from_html(context):
+    for page in context.post_pages.values():
+        NinegagBasicBrowser.scan_post_from_html(page)
+    return len(context.post_pages)
+
+
+@benchmark
+def bench_scan_post_from_html_fast(context):
+    for page in context.post_pages.values():
+        NinegagBasicBrowser.scan_post_from_html(page, fast=True)
+    return len(context.post_pages)
+
+
+@benchmark
+def bench_numeric_label_to_int(context):
+    for _ in range(100):
+        for label in NUMERIC_LABELS:
+            NinegagBasicBrowser._numeric_label_to_int(label)
+    return 100 * len(NUMERIC_LABELS)
+
+
+@benchmark
+def bench_background_browser_fetch(context):
+    with SessionPool() as session_pool:
+        browser = NinegagBrowser(session_pool=session_pool, rate_scheduler=RateScheduler())
+        for post_id in context.post_pages:
+            browser._non_delayed_get(f'{context.server.url}/gag/{post_id}')
+    return len(context.post_pages)
+
+
+@benchmark
+def bench_end_to_end_scan(context):
+    """
+    Reads the section feed, then visits and scans the page of every post in it, without artificial delays
+    """
+    with SessionPool() as session_pool:
+        rate_scheduler = RateScheduler()
+        fetcher = NinegagFeedFetcher(session_pool=session_pool, rate_scheduler=rate_scheduler, average_delay=0,
+                                     feed_url_template=f'{context.server.url}/v1/group-posts/group/{{group}}'
+                                                       f'/type/{{feed_type}}')
+        browser = NinegagBrowser(session_pool=session_pool, rate_scheduler=rate_scheduler)
+        post_count = 0
+        for post in fetcher.scan_section('funny', -1):
+            browser._non_delayed_get(f'{context.server.url}/gag/{post.post_id}')
+            browser.scan_post()
+            post_count += 1
+    return post_count
+
+
+@benchmark
+def bench_media_download(context):
+    """
+    Downloads the image of every post in the feed into a new store
+    """
+    with tempfile.TemporaryDirectory() as directory, SessionPool() as session_pool, \
+            MediaDownloader(directory, session_pool) as downloader:
+        urls = [f'{context.server.url}/photo/{post_id}_700bwp.webp' for post_id in context.feed_post_ids]
+        return sum(1 for _ in downloader.download_many(urls))
+
+
+@benchmark
+def bench_cli_startup(context):
+    """
+    Starts a short-lived job, as cron does: an interpreter that imports the CLI and parses its arguments
+    """
+    subprocess.run([sys.executable, 'cli.py', 'export', '--help'], cwd=REPOSITORY_DIR, stdout=subprocess.DEVNULL,
+                   check=True)
+    return 1
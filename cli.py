@@ -0,0 +1,142 @@
+"""
+Command line entry point, for jobs that scan sections, export stored posts and re-poll their votes
+
+Usage: python cli.py {scan,export,repoll} --help
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+# Backends (selenium, requests, lxml, numpy) are imported by the commands that use them, so short jobs do not pay
+# for importing what they do not need
+
+
+def scan(args):
+    from post_store import PostSink, PostStore
+
+    with PostStore(args.db) as post_store:
+        sink = PostSink(post_store)
+        if args.backend == 'feed':
+            from feed_fetcher import NinegagFeedFetcher
+
+            for section in args.sections:
+                sink.consume(NinegagFeedFetcher().scan_section(section, args.max_posts, args.fresh))
+        else:
+            with _selenium_browser(args) as browser:
+                for section in args.sections:
+                    browser.go_to_section(section, args.fresh)
+                    sink.consume(browser.scan_section(args.max_posts, _checkpointer(args, section)))
+
+    print(f'Scanned {sink.item_count} posts, {sink.new_item_count} of them new')
+
+
+def export(args):
+    from post_export import PostExporter
+    from post_store import PostStore
+
+    published_after = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=args.hours)
+                       if args.hours is not None else None)
+    with PostStore(args.db) as post_store, PostExporter(args.directory, args.prefix, args.format,
+                                                        args.compression) as exporter:
+        post_count = exporter.export(post_store.iter_posts(args.section, published_after))
+
+    print(f'Exported {post_count} posts to {", ".join(exporter.paths) or "no files"}')
+
+
+def repoll(args):
+    from post_store import PostSink, PostStore
+    from repoll_scheduler import RepollScheduler
+
+    published_after = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=args.hours)
+    with PostStore(args.db) as post_store, _selenium_browser(args) as browser:
+        sink = PostSink(post_store, batch_size=1)
+
+        def fetch_post(url):
+            post = browser.scan_post_at(url)
+            sink.write(post)
+            return post
+
+        scheduler = RepollScheduler(fetch_post, request_budget=args.budget)
+        for post in post_store.iter_posts(args.section, published_after):
+            if post.publish_time is not None and post.fetch_time is not None:
+                scheduler.track(post)
+        print(f'Tracking {len(scheduler)} posts')
+
+        for delta in scheduler.run(args.max_polls):
+            logging.info(f'{delta.post_id}: {delta.upvotes:+d} upvotes, {delta.downvotes:+d} downvotes, '
+                         f'{delta.comment_count:+d} comments in {delta.elapsed:.0f}s')
+
+    print(f'Polled {sink.item_count} posts')
+
+
+def _checkpointer(args, section):
+    if not args.checkpoint_dir:
+        return None
+
+    from crawl_checkpoint import CrawlCheckpointer
+
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    file_name = f'{section.lower()}-{"fresh" if args.fresh else "hot"}.json'
+    return CrawlCheckpointer(os.path.join(args.checkpoint_dir, file_name))
+
+
+def _selenium_browser(args):
+    from const import WEBDRIVER_PATH
+    from ninegag_selenium_browser import NinegagSeleniumBrowser
+
+    return NinegagSeleniumBrowser(lean=args.lean, executable_path=args.webdriver or WEBDRIVER_PATH)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='auto-ninegag', description='Scans 9GAG sections into a post database')
+    parser.add_argument('--db', default='posts.db', help='Post database (default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    browser_parser = argparse.ArgumentParser(add_help=False)
+    browser_parser.add_argument('--webdriver', help='Path of Geckodriver (default: WEBDRIVER_PATH of const.py)')
+    browser_parser.add_argument('--lean', action='store_true', help='Browse without media and trackers')
+
+    scan_parser = subparsers.add_parser('scan', parents=[browser_parser], help='Scan sections into the database')
+    scan_parser.add_argument('sections', nargs='+', help='Section names as they appear in the menu or in the URL')
+    scan_parser.add_argument('-n', '--max-posts', type=int, default=16,
+                             help='Posts to scan per section, negative value scans infinitely (default: %(default)s)')
+    scan_parser.add_argument('--fresh', action='store_true', help="Scan sections' Fresh instead of Hot")
+    scan_parser.add_argument('--backend', choices=('selenium', 'feed'), default='selenium',
+                             help='Walk post pages in Firefox, or read the JSON feed (default: %(default)s)')
+    scan_parser.add_argument('--checkpoint-dir',
+                             help='Save scan positions in this directory, and resume interrupted scans from them '
+                                  '(selenium backend)')
+    scan_parser.set_defaults(handler=scan)
+
+    export_parser = subparsers.add_parser('export', help='Export stored posts to JSONL or CSV files')
+    export_parser.add_argument('directory', help='Directory to write files in')
+    export_parser.add_argument('--section', help='Export only posts of a section')
+    export_parser.add_argument('--hours', type=float, help='Export only posts published in the last hours')
+    export_parser.add_argument('--prefix', default='posts', help='Start of file names (default: %(default)s)')
+    export_parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    export_parser.add_argument('--compression', choices=('gzip', 'zstd'))
+    export_parser.set_defaults(handler=export)
+
+    repoll_parser = subparsers.add_parser('repoll', parents=[browser_parser],
+                                          help='Re-visit stored posts to track their votes over time')
+    repoll_parser.add_argument('--section', help='Re-poll only posts of a section')
+    repoll_parser.add_argument('--hours', type=float, default=24,
+                               help='Re-poll posts published in the last hours (default: %(default)s)')
+    repoll_parser.add_argument('--budget', type=float, default=600, help='Polls per hour (default: %(default)s)')
+    repoll_parser.add_argument('--max-polls', type=int, help='Polls to perform, by default polls until done')
+    repoll_parser.set_defaults(handler=repoll)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import urllib.parse
+
+from const import NINEGAG_COMMENT_APP_ID, NINEGAG_COMMENT_URL, NINEGAG_POST_URL_TEMPLATE, NON_BOT_USER_AGENT
+from exceptions import FeedError
+from http_session import get_shared_session_pool
+from ninegag_browser import ARTIFICIAL_AVERAGE_DELAY
+from ninegag_comment import NinegagComment
+from rate_scheduler import get_shared_rate_scheduler, rate_key
+
+PAGE_SIZE = 25  # Comments per request
+MAX_DEPTH = 2  # 9GAG comments have replies, replies have none
+MAX_WORKERS = 4  # Reply pages fetched concurrently
+
+_CommentPage = collections.namedtuple('_CommentPage', ['comments', 'next_cursor'])
+
+
+class CommentHarvester(contextlib.AbstractContextManager):
+    """
+    Pages through the comment threads of posts using 9GAG's comment service
+    Notes:
+        * Comments are streamed, only a page of comments and the first page of replies of each of them are held at a
+          time, so posts with tens of thousands of comments can be harvested
+        * While a page of comments is consumed, the first reply pages of its comments are fetched concurrently
+    """
+
+    def __init__(self,
+                 session_pool=None,
+                 rate_scheduler=None,
+                 average_delay: float = ARTIFICIAL_AVERAGE_DELAY,
+                 max_workers: int = MAX_WORKERS,
+                 page_size: int = PAGE_SIZE,
+                 comment_url: str = NINEGAG_COMMENT_URL):
+        """
+        Args:
+            session_pool (http_session.SessionPool): By default, uses the process-wide shared pool
+            rate_scheduler (rate_scheduler.RateScheduler): By default, uses the process-wide shared scheduler
+            average_delay (float): Artificial average delay between requests, see utils.random_wait()
+            max_workers (int): Reply pages fetched concurrently
+            page_size (int): Comments per request
+            comment_url (str): Url of the comment service
+        """
+        self._session_pool = session_pool or get_shared_session_pool()
+        self._rate_scheduler = rate_scheduler or get_shared_rate_scheduler()
+        self._average_delay = average_delay
+        self._page_size = page_size
+        self._comment_url = comment_url
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def iter_comments(self, post_id: str, max_depth: int = MAX_DEPTH, max_comments: int = -1):
+        """
+        Raises FeedError if a response is not a valid comment page
+
+        Args:
+            post_id (str):
+            max_depth (int): Levels of the threads to harvest, 1 harvests only comments on the post itself
+            max_comments (int): Comments to harvest, of all levels, negative value harvests all of them
+
+        Yields:
+            NinegagComment: Comments in thread order, each followed by its replies
+        """
+        if max_comments == 0:
+            return
+        for i, comment in enumerate(self._iter_thread(post_id, None, 1, max_depth), 1):
+            yield comment
+            if i == max_comments:
+                return
+
+    def fill_comments(self, post, max_depth: int = MAX_DEPTH, max_comments: int = -1):
+        """
+        Harvests the comments of a post into its `comments`, which is only viable with a cap on their count.
+        Otherwise, prefer streaming iter_comments() to storage, f.e. with post_store.CommentSink
+
+        Args:
+            post (NinegagPost):
+            max_depth (int): See iter_comments()
+            max_comments (int): See iter_comments()
+        """
+        post.comments = list(self.iter_comments(post.post_id, max_depth, max_comments))
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def _iter_thread(self, post_id, parent_id, level, max_depth, first_page=None):
+        page = first_page or self._fetch_page(post_id, parent_id, level)
+        while True:
+            futures = {comment.comment_id: self._executor.submit(self._fetch_page, post_id, comment.comment_id,
+                                                                 level + 1)
+                       for comment in page.comments if comment.reply_count and level < max_depth}
+            try:
+                for comment in page.comments:
+                    yield comment
+                    future = futures.get(comment.comment_id)
+                    if future is not None:
+                        yield from self._iter_thread(post_id, comment.comment_id, level + 1, max_depth,
+                                                     first_page=future.result())
+            finally:
+                # The consumer may stop early, replies it will not read are not fetched
+                for future in futures.values():
+                    future.cancel()
+
+            if not page.next_cursor:
+                return
+            page = self._fetch_page(post_id, parent_id, level, page.next_cursor)
+
+    def _fetch_page(self, post_id, parent_id, level, cursor=None):
+        """
+        Returns:
+            _CommentPage: Comments of the post (or replies of a comment) and the cursor of the next page, if any
+        """
+        query = {'appId': NINEGAG_COMMENT_APP_ID,
+                 'url': NINEGAG_POST_URL_TEMPLATE.format(post_id=post_id),
+                 'count': self._page_size,
+                 'order': 'score',
+                 'level': level}
+        if parent_id is not None:
+            query['commentId'] = parent_id
+        url = f'{self._comment_url}?{urllib.parse.urlencode(query)}'
+        if cursor:
+            url = f'{url}&{cursor}'
+
+        self._rate_scheduler.wait(rate_key(url), self._average_delay)
+        response = self._session_pool.get(url, headers={'user-agent': NON_BOT_USER_AGENT})
+        response.raise_for_status()
+
+        try:
+            payload = response.json()['payload']
+            comments = [self.comment_from_json(comment_json, post_id, parent_id, level)
+                        for comment_json in payload['comments']]
+        except (ValueError, KeyError, TypeError) as e:
+            raise FeedError(f'Invalid comment response of "{url}": {e!r}')
+        return _CommentPage(comments, payload.get('next') if payload.get('hasNext', True) else None)
+
+    @staticmethod
+    def comment_from_json(comment_json, post_id, parent_id=None, level=1):
+        """
+        Args:
+            comment_json (dict): A comment as it appears in a comment page
+            post_id (str): Post of the comment
+            parent_id (str): Comment it replies to, if any
+            level (int): Level of the comment in its thread
+
+        Returns:
+            NinegagComment:
+        """
+        return NinegagComment(comment_id=comment_json['commentId'],
+                              post_id=post_id,
+                              parent_id=parent_id,
+                              level=level,
+                              author=(comment_json.get('user') or {}).get('displayName'),  # May be null
+                              text=comment_json.get('text'),
+                              upvotes=comment_json.get('likeCount'),
+                              downvotes=comment_json.get('dislikeCount'),
+                              reply_count=comment_json.get('childrenTotal', 0),
+                              publish_time=datetime.datetime.fromtimestamp(comment_json['timestamp'],
+                                                                           datetime.timezone.utc))
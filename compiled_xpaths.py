@@ -0,0 +1,30 @@
+from lxml import etree
+
+from const import NinegagXPaths
+
+
+def compile_xpaths(xpaths_class):
+    """
+    Compiles every xpath of a class (and of its nested classes) into lxml.etree.XPath objects
+    Notes:
+        * Private attributes (starting with '_') are fragments used for building other xpaths and are not compiled
+
+    Args:
+        xpaths_class (type): Class that holds xpath strings as class attributes, such as NinegagXPaths
+
+    Returns:
+        type: Class with the same structure, holding callable compiled xpaths
+    """
+    attributes = {}
+    for name, value in vars(xpaths_class).items():
+        if name.startswith('_'):
+            continue
+        if isinstance(value, type):
+            attributes[name] = compile_xpaths(value)
+        elif isinstance(value, str):
+            attributes[name] = etree.XPath(value)
+    return type(f'Compiled{xpaths_class.__name__}', (), attributes)
+
+
+# Compiled once on import, so each process (including parsing workers) pays for it only once
+CompiledNinegagXPaths = compile_xpaths(NinegagXPaths)
@@ -2,7 +2,11 @@ WEBDRIVER_PATH = r'C:\OtherPrograms\geckodriver.exe'  # Be sure to install Gecko
 
 NINEGAG_URL = "https://9gag.com"
 NINEGAG_POST_URL_TEMPLATE = f"{NINEGAG_URL}/gag/{{post_id}}"
+NINEGAG_FEED_URL_TEMPLATE = f"{NINEGAG_URL}/v1/group-posts/group/{{group}}/type/{{feed_type}}"
+NINEGAG_COMMENT_URL = "https://comment-cdn.9cache.com/v2/cacheable/comment-list.json"
+NINEGAG_COMMENT_APP_ID = "a_dd8f2b7d304a10edaf6f29517ea0ca4100a43d1b"  # Identifies 9GAG to the comment service
 NINEGAG_IMAGE_URL_TEMPLATE = "https://img-9gag-fun.9cache.com/photo/{post_id}_700bwp.webp"
+NINEGAG_VIDEO_URL_TEMPLATE = "https://img-9gag-fun.9cache.com/photo/{post_id}_460sv.mp4"
 NON_BOT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36'
 
 
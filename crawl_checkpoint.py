@@ -0,0 +1,166 @@
+import contextlib
+import json
+import logging
+import os
+import time
+
+SAVE_EVERY_POSTS = 10  # Posts scanned between checkpoints
+SAVE_INTERVAL = 60  # Seconds, a checkpoint is saved at least this often while posts are scanned
+MAX_SEEN_POST_IDS = 10000  # Most recently scanned post ids kept, the next-post chain does not go back further
+
+
+class CrawlCheckpoint:
+    """
+    Position of a section scan: the post to resume from, and what was already scanned
+    """
+
+    def __init__(self, section=None, post_url=None, post_count=0, seen_post_ids=None, saved_time=None):
+        """
+        Args:
+            section (str): Section being scanned, as given to go_to_section()
+            post_url (str): Url of the post page to resume from
+            post_count (int): Posts scanned so far, over all runs
+            seen_post_ids (iterable): Ids of scanned posts, oldest first
+            saved_time (float): When the checkpoint was saved, in seconds since the epoch
+        """
+        self.section = section
+        self.post_url = post_url
+        self.post_count = post_count
+        self.seen_post_ids = dict.fromkeys(seen_post_ids or ())  # Ordered set
+        self.saved_time = saved_time
+
+    def to_dict(self):
+        return {'section': self.section,
+                'post_url': self.post_url,
+                'post_count': self.post_count,
+                'seen_post_ids': list(self.seen_post_ids),
+                'saved_time': self.saved_time}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class CrawlCheckpointer:
+    """
+    Saves the position of a section scan to a file, so an interrupted scan resumes where it stopped
+    Notes:
+        * Checkpoints are written to a temporary file and renamed over the previous one, so a crash while saving
+          leaves the previous checkpoint intact
+        * A checkpoint is saved every few posts and whenever the scan stops, even if it failed. Only a killed
+          process can lose the posts since the last periodic checkpoint, which are then scanned again
+    """
+
+    def __init__(self,
+                 path: str,
+                 save_every: int = SAVE_EVERY_POSTS,
+                 save_interval: float = SAVE_INTERVAL,
+                 max_seen_post_ids: int = MAX_SEEN_POST_IDS):
+        """
+        Args:
+            path (str): Checkpoint file, one per scanned section
+            save_every (int): Posts scanned between checkpoints
+            save_interval (float): Seconds between checkpoints, while posts are scanned
+            max_seen_post_ids (int): Most recently scanned post ids kept in the checkpoint
+        """
+        self._path = path
+        self._save_every = save_every
+        self._save_interval = save_interval
+        self._max_seen_post_ids = max_seen_post_ids
+        self._unsaved_posts = 0
+        self._last_save_time = time.monotonic()
+        self.checkpoint = self.load() or CrawlCheckpoint()
+
+    def load(self):
+        """
+        Returns:
+            CrawlCheckpoint: Saved checkpoint, None if there is none or it is unreadable
+        """
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                return CrawlCheckpoint.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logging.warning(f'Ignoring unreadable checkpoint "{self._path}": {e}')
+            return None
+
+    def resume(self, section=None):
+        """
+        Starts a scan, from the checkpoint if it is of the same section
+        Args:
+            section (str): Section to scan, by default the section of the checkpoint
+
+        Returns:
+            str: Url of the post page to resume from, None if the scan starts over
+        """
+        if section is not None and self.checkpoint.section not in (None, section):
+            logging.info(f'Checkpoint is of section "{self.checkpoint.section}", starting "{section}" over')
+            self.checkpoint = CrawlCheckpoint()
+
+        if section is not None:
+            self.checkpoint.section = section
+        return self.checkpoint.post_url
+
+    def is_seen(self, post_id):
+        return post_id in self.checkpoint.seen_post_ids
+
+    def record(self, post, post_url):
+        """
+        Records a scanned post, and saves a checkpoint if one is due
+
+        Args:
+            post (NinegagPost):
+            post_url (str): Url of the post's page
+        """
+        seen_post_ids = self.checkpoint.seen_post_ids
+        seen_post_ids[post.post_id] = None
+        while len(seen_post_ids) > self._max_seen_post_ids:
+            del seen_post_ids[next(iter(seen_post_ids))]
+
+        self.checkpoint.post_url = post_url
+        self.checkpoint.post_count += 1
+        self._unsaved_posts += 1
+        if (self._unsaved_posts >= self._save_every or
+                time.monotonic() - self._last_save_time >= self._save_interval):
+            self.save()
+
+    def save(self, post_url=None):
+        """
+        Saves the checkpoint, durably
+        Args:
+            post_url (str): Url of the post page to resume from, by default the page of the last recorded post
+        """
+        if post_url is not None:
+            self.checkpoint.post_url = post_url
+        self.checkpoint.saved_time = time.time()
+
+        temp_path = f'{self._path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path)
+        _fsync_directory(os.path.dirname(os.path.abspath(self._path)))
+
+        self._unsaved_posts = 0
+        self._last_save_time = time.monotonic()
+
+    def clear(self):
+        """
+        Deletes the saved checkpoint, so the next scan starts over
+        """
+        self.checkpoint = CrawlCheckpoint()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path)
+
+
+def _fsync_directory(directory):
+    # Makes the rename durable, directories cannot be opened on Windows
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,218 @@
+import concurrent.futures
+import contextlib
+import logging
+import queue
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from exceptions import PoolClosed
+from ninegag_selenium_browser import NinegagSeleniumBrowser
+from selenium_browser import headless_firefox_options
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Recycling on memory growth is only available with psutil installed
+
+POOL_SIZE = 4
+MAX_PAGES_PER_DRIVER = 500  # Firefox tends to grow in memory over long sessions
+QUEUE_SIZE_PER_WORKER = 16  # Posts buffered per section worker before it waits for the consumer
+_QUEUE_POLL_INTERVAL = 0.5  # Seconds
+# Idle queue entries that are not browsers: a slot whose browser failed to start is started again by the next lease,
+# and the closed marker wakes up leases once the pool is closed
+_EMPTY_SLOT = None
+_CLOSED = object()
+
+
+class DriverPool(contextlib.AbstractContextManager):
+    """
+    Keeps warm NinegagSeleniumBrowser instances and leases them out, saving Firefox startup and homepage load per use
+    """
+
+    def __init__(self,
+                 size: int = POOL_SIZE,
+                 headless: bool = True,
+                 max_pages: int = MAX_PAGES_PER_DRIVER,
+                 max_memory_mb: float = None,
+                 browser_class=NinegagSeleniumBrowser,
+                 **options):
+        """
+        Args:
+            size (int): Number of browsers kept warm, which is also the number of concurrent leases
+            headless (bool): Whether to run Firefox without a window
+            max_pages (int): A browser is recycled after loading this many pages
+            max_memory_mb (float): A browser is recycled once Firefox's resident memory exceeds this value. Requires
+                                   psutil, by default memory is not checked
+            browser_class (type): Class of the pooled browsers
+            **options: Passed to the browsers (and from them to the WebDriver), f.e. `executable_path`
+        """
+        if headless:
+            options['options'] = headless_firefox_options(options.get('options'))
+        if max_memory_mb and psutil is None:
+            raise ImportError('Recycling browsers on memory growth requires psutil')
+
+        self._size = size
+        self._max_pages = max_pages
+        self._max_memory_mb = max_memory_mb
+        self._browser_class = browser_class
+        self._options = options
+        self._idle_browsers = queue.Queue()
+        self._leased_browsers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Browsers are started concurrently, as each startup mostly waits on Firefox
+        with concurrent.futures.ThreadPoolExecutor(size) as executor:
+            for browser in executor.map(lambda _: self._new_browser(), range(size)):
+                self._idle_browsers.put(browser)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @contextlib.contextmanager
+    def lease(self):
+        """
+        Leases a warm browser, waits if all of them are leased
+        Notes:
+            * The browser is returned to the pool on exit, do not quit it or use it as a context manager
+            * A browser whose lease ended with a WebDriverException is recycled
+            * Raises PoolClosed once the pool is closed, also for leases that were waiting
+
+        Yields:
+            NinegagSeleniumBrowser:
+        """
+        browser = self._idle_browsers.get()
+        with self._lock:
+            closed = self._closed
+            if not closed and browser is not _EMPTY_SLOT:
+                self._leased_browsers.add(browser)
+        if closed:
+            if browser not in (_EMPTY_SLOT, _CLOSED):
+                browser._quit()  # Was returned while the pool was being closed
+            self._idle_browsers.put(_CLOSED)  # Wakes up the next waiting lease
+            raise PoolClosed('The driver pool is closed')
+
+        if browser is _EMPTY_SLOT:
+            try:
+                browser = self._new_browser()
+            except Exception:
+                self._idle_browsers.put(_EMPTY_SLOT)  # The next lease tries again
+                raise
+            with self._lock:
+                self._leased_browsers.add(browser)
+
+        broken = False
+        try:
+            yield browser
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(browser, broken)
+
+    def scan_sections(self, sections, max_iterations: int, fresh: bool = False):
+        """
+        Scans several sections in parallel, each on its own leased browser
+        Notes:
+            * Posts of each section keep their order, posts of different sections are interleaved
+
+        Args:
+            sections (iterable): 9GAG section names, see NinegagSeleniumBrowser.go_to_section()
+            max_iterations (int): Posts to scan per section, negative value will scan infinitely
+            fresh (bool): Whether to scan sections' Fresh (otherwise scans Hot)
+
+        Yields:
+            NinegagPost: Representation of a post
+        """
+        sections = list(sections)
+        posts = queue.Queue(maxsize=QUEUE_SIZE_PER_WORKER * self._size)
+        stop = threading.Event()
+
+        def scan(section):
+            with self.lease() as browser:
+                browser.go_to_section(section, fresh)
+                for post in browser.scan_section(max_iterations):
+                    while not stop.is_set():
+                        try:
+                            posts.put(post, timeout=_QUEUE_POLL_INTERVAL)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+
+        with concurrent.futures.ThreadPoolExecutor(min(self._size, len(sections) or 1)) as executor:
+            futures = [executor.submit(scan, section) for section in sections]
+            try:
+                while True:
+                    try:
+                        yield posts.get(timeout=_QUEUE_POLL_INTERVAL)
+                        continue
+                    except queue.Empty:
+                        pass
+                    if all(future.done() for future in futures) and posts.empty():
+                        break
+                for future in futures:
+                    future.result()  # Raises exceptions of failed sections
+            finally:
+                stop.set()
+
+    def close(self):
+        """
+        Quits all browsers, leased browsers are quit once they are returned
+        """
+        with self._lock:
+            self._closed = True
+        while not self._idle_browsers.empty():
+            browser = self._idle_browsers.get_nowait()
+            if browser not in (_EMPTY_SLOT, _CLOSED):
+                browser._quit()
+        self._idle_browsers.put(_CLOSED)
+
+    def _new_browser(self):
+        return self._browser_class(**self._options)
+
+    def _release(self, browser, broken=False):
+        with self._lock:
+            self._leased_browsers.discard(browser)
+            closed = self._closed
+
+        if closed:
+            browser._quit()
+            return
+
+        if broken or self._should_recycle(browser):
+            logging.debug(f'Recycling browser after {browser.page_loads} page loads')
+            try:
+                browser._quit()
+            except WebDriverException:
+                pass  # The driver may already be dead, which is why it is recycled
+            try:
+                browser = self._new_browser()
+            except Exception as e:
+                # The slot is kept, so the pool does not shrink
+                logging.warning(f'Failed to start a browser in place of a recycled one, retrying on next lease: {e!r}')
+                browser = _EMPTY_SLOT
+
+        self._idle_browsers.put(browser)
+
+    def _should_recycle(self, browser):
+        if browser.page_loads >= self._max_pages:
+            return True
+        if self._max_memory_mb:
+            return self._memory_mb(browser) > self._max_memory_mb
+        return False
+
+    @staticmethod
+    def _memory_mb(browser):
+        """
+        Returns:
+            float: Resident memory of browser's Firefox process and its content processes, in MB
+        """
+        try:
+            process = psutil.Process(browser._driver.capabilities['moz:processID'])
+            processes = [process] + process.children(recursive=True)
+            return sum(child.memory_info().rss for child in processes) / 2 ** 20
+        except (KeyError, psutil.Error):
+            return 0
@@ -1,13 +1,15 @@
-from ninegag_basic_browser import NinegagBrowser
+from ninegag_selenium_browser import NinegagSeleniumBrowser
 from const import WEBDRIVER_PATH
+from post_store import PostSink, PostStore
 
 
 def main():
     # Example of usage
-    with NinegagBrowser(executable_path=WEBDRIVER_PATH) as ninegag_browser:
+    with NinegagSeleniumBrowser(executable_path=WEBDRIVER_PATH) as ninegag_browser, PostStore() as post_store:
         ninegag_browser.go_to_section('Funny')
         posts_scanned = ninegag_browser.scan_section(max_iterations=16)
-        print('\n\n'.join([str(item) for item in posts_scanned]))
+        new_post_count = PostSink(post_store).consume(posts_scanned)
+        print(f'Saved {new_post_count} new posts')
 
 
 if __name__ == '__main__':
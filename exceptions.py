@@ -12,3 +12,15 @@ class InvalidAction(RuntimeError):
 
 class MissingWebdriver(FileNotFoundError):
     pass
+
+
+class FeedError(RuntimeError):
+    pass
+
+
+class Blocked(RuntimeError):
+    pass
+
+
+class PoolClosed(RuntimeError):
+    pass
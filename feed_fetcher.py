@@ -0,0 +1,144 @@
+import datetime
+import html
+import itertools
+import logging
+
+import requests
+
+from const import NINEGAG_FEED_URL_TEMPLATE, NON_BOT_USER_AGENT
+from exceptions import FeedError
+from http_session import get_shared_session_pool
+from ninegag_browser import ARTIFICIAL_AVERAGE_DELAY
+from ninegag_post import NinegagPost
+from rate_scheduler import get_shared_rate_scheduler, rate_key
+
+# Post types of the feed API, as they appear in post pages (see NinegagBasicBrowser.scan_post_from_html())
+FEED_POST_TYPES = {'Photo': 'image', 'Animated': 'gif', 'Video': 'video', 'Article': 'article'}
+TOP_FEEDS = ('hot', 'trending', 'fresh')  # Feeds of all sections, instead of a specific one
+_TOP_FEEDS_GROUP = 'default'
+
+
+class NinegagFeedFetcher:
+    """
+    Reads section feeds through 9GAG's paginated JSON API, getting a batch of posts per request instead of a page
+    navigation per post
+    """
+
+    def __init__(self,
+                 session_pool=None,
+                 rate_scheduler=None,
+                 average_delay: float = ARTIFICIAL_AVERAGE_DELAY,
+                 feed_url_template: str = NINEGAG_FEED_URL_TEMPLATE):
+        """
+        Args:
+            session_pool (http_session.SessionPool): By default, uses the process-wide shared pool
+            rate_scheduler (rate_scheduler.RateScheduler): By default, uses the process-wide shared scheduler
+            average_delay (float): Artificial average delay between requests, see utils.random_wait()
+            feed_url_template (str): Feed url, with `group` and `feed_type` fields
+        """
+        self._session_pool = session_pool or get_shared_session_pool()
+        self._rate_scheduler = rate_scheduler or get_shared_rate_scheduler()
+        self._average_delay = average_delay
+        self._feed_url_template = feed_url_template
+
+    def iter_batches(self, section_name: str, fresh: bool = False, max_batches: int = -1):
+        """
+        Follows the cursors of a section feed. Raises FeedError if a response is not a valid feed
+
+        Args:
+            section_name (str): 9GAG section name as appears in its URL, or one of TOP_FEEDS
+            fresh (bool): Whether to read section's Fresh (otherwise reads Hot)
+            max_batches (int): Number of requests to perform, negative value reads until the feed ends
+
+        Yields:
+            list[NinegagPost]: Posts of a feed page, in feed order
+        """
+        if section_name.lower() in TOP_FEEDS:
+            feed_url = self._feed_url_template.format(group=_TOP_FEEDS_GROUP, feed_type=section_name.lower())
+        else:
+            feed_url = self._feed_url_template.format(group=section_name.lower(),
+                                                      feed_type='fresh' if fresh else 'hot')
+
+        cursor = None
+        for _ in itertools.count() if max_batches < 0 else range(max_batches):
+            url = f'{feed_url}?{cursor}' if cursor else feed_url
+            self._rate_scheduler.wait(rate_key(url), self._average_delay)
+            response = self._session_pool.get(url, headers={'user-agent': NON_BOT_USER_AGENT})
+            response.raise_for_status()
+
+            try:
+                data = response.json()['data']
+                posts = [self.post_from_json(post_json) for post_json in data['posts']]
+            except (ValueError, KeyError, TypeError) as e:
+                raise FeedError(f'Invalid feed response of "{url}": {e!r}')
+
+            yield posts
+            cursor = data.get('nextCursor')
+            if not cursor:
+                return
+
+    def scan_section(self, section_name: str, max_iterations: int, fresh: bool = False, fallback_browser=None):
+        """
+        Extract data from a sequence of posts in a section feed
+        Notes:
+            * If the feed fails and a fallback browser is given, the scan continues by walking post pages in it,
+              skipping posts that were already scanned
+
+        Args:
+            section_name (str): See iter_batches()
+            max_iterations (int): Length of post sequence to extract, negative value will return an infinite generator
+            fresh (bool): Whether to scan section's Fresh (otherwise scans Hot)
+            fallback_browser (NinegagSeleniumBrowser): Browser to walk post pages with if the feed fails
+
+        Yields:
+            NinegagPost: Representation of a post
+        """
+        if not max_iterations:
+            return  # Otherwise a post would be yielded, and the whole feed read, before the count is checked
+
+        scanned_post_ids = set()
+        try:
+            for posts in self.iter_batches(section_name, fresh):
+                for post in posts:
+                    if post.post_id in scanned_post_ids:
+                        continue  # Feeds may repeat posts across pages
+                    yield post
+                    scanned_post_ids.add(post.post_id)
+                    if len(scanned_post_ids) == max_iterations:
+                        return
+            return
+        except (requests.RequestException, FeedError) as e:
+            if fallback_browser is None:
+                raise
+            logging.warning(f'Feed of "{section_name}" failed, falling back to walking post pages: {e}')
+
+        fallback_browser.go_to_section(section_name, fresh)
+        for post in fallback_browser.scan_section(-1):
+            if post.post_id in scanned_post_ids:
+                continue
+            yield post
+            scanned_post_ids.add(post.post_id)
+            if len(scanned_post_ids) == max_iterations:
+                return
+
+    @staticmethod
+    def post_from_json(post_json, fetch_time=None):
+        """
+        Args:
+            post_json (dict): A post as it appears in a feed response
+            fetch_time (datetime.datetime): Time of the response, by default now
+
+        Returns:
+            NinegagPost:
+        """
+        return NinegagPost(post_id=post_json['id'],
+                           post_type=FEED_POST_TYPES.get(post_json['type'], post_json['type'].lower()),
+                           section=post_json['postSection']['name'],
+                           title=html.unescape(post_json['title']),
+                           upvotes=post_json['upVoteCount'],
+                           downvotes=post_json['downVoteCount'],
+                           comment_count=post_json['commentsCount'],
+                           publish_time=datetime.datetime.fromtimestamp(post_json['creationTs'],
+                                                                        datetime.timezone.utc),
+                           fetch_time=fetch_time or datetime.datetime.now(),
+                           tags=[tag['key'] for tag in post_json.get('tags', ())])
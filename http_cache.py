@@ -0,0 +1,230 @@
+import collections
+import contextlib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from lxml import html
+
+DEFAULT_CACHE_DIRECTORY = '.http_cache'
+MAX_CACHE_BYTES = 512 * 2 ** 20
+DEFAULT_TTL = 0  # Seconds a response is used without revalidation, by default always revalidated
+PARSED_CACHE_SIZE = 64  # Parsed pages kept in memory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    encoding TEXT,
+    size INTEGER NOT NULL,
+    stored_time REAL NOT NULL,
+    access_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_access_time ON entries (access_time);
+"""
+
+CacheResult = collections.namedtuple('CacheResult', ['text', 'html', 'status'])  # status is one of CACHE_STATUSES
+CACHE_STATUSES = ('hit', 'revalidated', 'miss')
+
+
+class HttpCache:
+    """
+    On-disk cache of GET responses, revalidated with conditional requests (ETag / Last-Modified)
+    Notes:
+        * Bodies are stored as files named by the hash of their url, with an SQLite index
+        * Least recently used entries are evicted once the bodies take more than `max_bytes`
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_CACHE_DIRECTORY,
+                 max_bytes: int = MAX_CACHE_BYTES,
+                 ttls=None,
+                 default_ttl: float = DEFAULT_TTL,
+                 parsed_cache_size: int = PARSED_CACHE_SIZE):
+        """
+        Args:
+            directory (str): Directory of the cache, created if it does not exist
+            max_bytes (int): Maximal total size of cached bodies
+            ttls (list): (url regex, seconds) pairs, the first pattern that matches a url sets how long its response is
+                         used without revalidation
+            default_ttl (float): Seconds a response is used without revalidation, if no pattern matches its url
+            parsed_cache_size (int): Parsed html trees kept in memory, 0 disables it
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._ttls = [(re.compile(pattern), seconds) for pattern, seconds in ttls or ()]
+        self._default_ttl = default_ttl
+        self._parsed_cache_size = parsed_cache_size
+        self._parsed_cache = collections.OrderedDict()
+        self._counts = collections.Counter()
+        self._lock = threading.RLock()
+
+        self._connection = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._total_bytes = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def fetch(self, session_pool, url, headers=None):
+        """
+        Gets a page from the cache, revalidating or downloading it if needed.
+        Raises requests.HTTPError if status code is not OK
+
+        Args:
+            session_pool (http_session.SessionPool): Pool to send requests with
+            url (str): Absolute url
+            headers (dict): Request headers
+
+        Returns:
+            CacheResult: The page's text, its parsed html tree and whether it was a hit, revalidated or a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._connection.execute(
+                'SELECT etag, last_modified, encoding, stored_time FROM entries WHERE url = ?', (url,)).fetchone()
+
+        response = None
+        if entry is not None:
+            etag, last_modified, encoding, stored_time = entry
+            if now - stored_time < self._ttl(url):
+                result = self._cached_result(url, encoding, 'hit', now)
+                if result is not None:
+                    return result
+            else:
+                conditional_headers = dict(headers or {})
+                if etag:
+                    conditional_headers['If-None-Match'] = etag
+                if last_modified:
+                    conditional_headers['If-Modified-Since'] = last_modified
+                response = session_pool.get(url, headers=conditional_headers)
+                if response.status_code == 304:
+                    with self._lock, self._connection:
+                        self._connection.execute('UPDATE entries SET stored_time = ? WHERE url = ?', (now, url))
+                    result = self._cached_result(url, encoding, 'revalidated', now)
+                    if result is not None:
+                        return result
+                    response = None
+        if response is None:
+            response = session_pool.get(url, headers=headers)
+
+        response.raise_for_status()
+        text = response.text
+        if 'no-store' not in response.headers.get('Cache-Control', ''):
+            self._store(url, response, now)
+
+        page_html = html.fromstring(text)
+        with self._lock:
+            self._counts['miss'] += 1
+            self._add_parsed(url, text, page_html)
+        return CacheResult(text, page_html, 'miss')
+
+    def invalidate(self, url):
+        """
+        Drops the cached response of a url, f.e. one that turned out to be an error page served with status 200
+
+        Args:
+            url (str): Absolute url
+        """
+        with self._lock, self._connection:
+            entry = self._connection.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            if entry is not None:
+                self._remove(url, entry[0])
+            self._parsed_cache.pop(url, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counts of hits, revalidations, misses, evictions and of parsed trees reused from memory, along with
+                  the cache's size
+        """
+        with self._lock:
+            entry_count = self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {**{status: self._counts[status] for status in CACHE_STATUSES},
+                    'evictions': self._counts['evictions'],
+                    'parsed_hits': self._counts['parsed_hits'],
+                    'entries': entry_count,
+                    'bytes': self._total_bytes}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _ttl(self, url):
+        for pattern, seconds in self._ttls:
+            if pattern.search(url):
+                return seconds
+        return self._default_ttl
+
+    def _body_path(self, url):
+        return os.path.join(self._directory, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _cached_result(self, url, encoding, status, now):
+        # Returns None if the entry was evicted or invalidated since it was looked up, which makes it a miss
+        with self._lock:
+            # Bodies change only when stored again, which drops their parsed tree, so a kept tree is up to date
+            parsed = self._parsed_cache.get(url)
+            if parsed is not None:
+                self._parsed_cache.move_to_end(url)
+                self._counts['parsed_hits'] += 1
+                self._mark_accessed(url, status, now)
+                return CacheResult(*parsed, status)
+
+        try:
+            with open(self._body_path(url), 'rb') as f:
+                text = f.read().decode(encoding or 'utf-8', errors='replace')
+        except FileNotFoundError:
+            return None
+        page_html = html.fromstring(text)
+        with self._lock:
+            self._mark_accessed(url, status, now)
+            self._add_parsed(url, text, page_html)
+        return CacheResult(text, page_html, status)
+
+    def _mark_accessed(self, url, status, now):
+        self._counts[status] += 1
+        with self._connection:
+            self._connection.execute('UPDATE entries SET access_time = ? WHERE url = ?', (now, url))
+
+    def _store(self, url, response, now):
+        body = response.content
+        path = self._body_path(url)
+        temp_path = f'{path}.tmp{threading.get_ident()}'
+        with open(temp_path, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)  # Readers never see a partially written body
+
+        with self._lock, self._connection:
+            self._parsed_cache.pop(url, None)
+            previous_entry = self._connection.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            self._total_bytes += len(body) - (previous_entry[0] if previous_entry else 0)
+            self._connection.execute(
+                'INSERT OR REPLACE INTO entries (url, etag, last_modified, encoding, size, stored_time, access_time) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 response.encoding or response.apparent_encoding, len(body), now, now))
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self._max_bytes:
+            url, size = self._connection.execute(
+                'SELECT url, size FROM entries ORDER BY access_time LIMIT 1').fetchone()
+            self._remove(url, size)
+            self._counts['evictions'] += 1
+
+    def _remove(self, url, size):
+        self._connection.execute('DELETE FROM entries WHERE url = ?', (url,))
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._body_path(url))
+        self._parsed_cache.pop(url, None)
+        self._total_bytes -= size
+
+    def _add_parsed(self, url, text, page_html):
+        if not self._parsed_cache_size:
+            return
+        self._parsed_cache[url] = (text, page_html)
+        self._parsed_cache.move_to_end(url)
+        while len(self._parsed_cache) > self._parsed_cache_size:
+            self._parsed_cache.popitem(last=False)
@@ -0,0 +1,105 @@
+import contextlib
+import threading
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = 10  # Keep-alive connections per host
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5  # Seconds, doubled on every retry
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = 15  # Seconds
+
+
+class SessionPool(contextlib.AbstractContextManager):
+    """
+    Thread-safe set of keep-alive HTTP sessions, one per host, meant to be shared by many browsers
+    """
+
+    def __init__(self,
+                 pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES,
+                 backoff_factor: float = RETRY_BACKOFF_FACTOR,
+                 timeout: float = REQUEST_TIMEOUT,
+                 headers: dict = None):
+        """
+        Args:
+            pool_size (int): Maximal number of connections kept alive to each host
+            max_retries (int): Retries of a request on connection errors and on retryable status codes
+            backoff_factor (float): Base delay between retries, grows exponentially
+            timeout (float): Default timeout (seconds) of each request
+            headers (dict): Headers sent with every request, on top of the default ones (which ask for compression)
+        """
+        self._pool_size = pool_size
+        self._retry = Retry(total=max_retries,
+                            backoff_factor=backoff_factor,
+                            status_forcelist=RETRY_STATUS_CODES,
+                            raise_on_status=False)  # The last response is returned, callers use raise_for_status()
+        self._timeout = timeout
+        self._headers = headers or {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def session(self, url):
+        """
+        Gets the session of a url's host, creates it if needed
+
+        Args:
+            url (str): Absolute url
+
+        Returns:
+            requests.Session:
+        """
+        parsed_url = urllib.parse.urlparse(url)
+        host = f'{parsed_url.scheme}://{parsed_url.netloc}'
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=self._retry)
+                session.mount(f'{host}/', adapter)
+                session.headers.update(self._headers)
+                self._sessions[host] = session
+            return session
+
+    def get(self, url, **kwargs):
+        """
+        Performs a GET request over the pooled session of the url's host
+
+        Args:
+            url (str): Absolute url
+            **kwargs: Passed to requests.Session.get()
+
+        Returns:
+            requests.Response:
+        """
+        kwargs.setdefault('timeout', self._timeout)
+        return self.session(url).get(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_shared_session_pool = None
+_shared_session_pool_lock = threading.Lock()
+
+
+def get_shared_session_pool():
+    """
+    Returns:
+        SessionPool: Process-wide session pool, used by browsers that were not given one explicitly
+    """
+    global _shared_session_pool
+    with _shared_session_pool_lock:
+        if _shared_session_pool is None:
+            _shared_session_pool = SessionPool()
+        return _shared_session_pool
@@ -0,0 +1,243 @@
+import bisect
+import contextlib
+import cProfile
+import heapq
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+
+# Phases of browsing that are timed
+PHASES = ('rate_wait',  # Waiting for a send-slot of the rate scheduler
+          'fetch',  # Loading a page, or navigating to the next post
+          'parse',  # Parsing a fetched page, for browsers that fetch pages over HTTP
+          'render_wait',  # Waiting for elements of a loaded page to render
+          'extract')  # Extracting a post out of its page
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Upper bounds, seconds
+METRIC_NAME = 'ninegag_phase_seconds'
+
+
+class Histogram:
+    """
+    Counts of observed durations per bucket, as Prometheus histograms do
+    """
+    __slots__ = ('bucket_counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)  # The last bucket is unbounded
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.bucket_counts = [count + other_count for count, other_count in zip(self.bucket_counts,
+                                                                                 other.bucket_counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Returns:
+            float: Upper bound of the bucket the q-quantile falls in, the maximum if it is in the unbounded bucket
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, cumulative_count in zip(HISTOGRAM_BUCKETS, itertools.accumulate(self.bucket_counts)):
+            if cumulative_count >= rank:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else 0.0,
+                'max': self.max,
+                'p50': self.quantile(0.5),
+                'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99)}
+
+
+class Instrumentation:
+    """
+    Collects durations of browsing phases (see PHASES) per section, and optionally profiles the slowest posts
+    Notes:
+        * One instance can be shared by browsers and threads
+        * Only one post is profiled at a time, as Python supports a single active profiler
+    """
+
+    def __init__(self, profile_slowest: int = 0):
+        """
+        Args:
+            profile_slowest (int): Number of slowest posts to keep a cProfile capture of, 0 disables profiling
+        """
+        self._histograms = {}  # (phase, section) -> Histogram
+        self._profile_slowest = profile_slowest
+        self._profiles = []  # Heap of (seconds, sequence, label, pstats.Stats), the fastest one first
+        self._profile_sequence = itertools.count()
+        self._profiling = False
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds, section=None):
+        """
+        Args:
+            phase (str): One of PHASES
+            seconds (float): Duration of the phase
+            section (str): Section being browsed, if known
+        """
+        with self._lock:
+            histogram = self._histograms.get((phase, section))
+            if histogram is None:
+                histogram = self._histograms[(phase, section)] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, phase, section=None):
+        """
+        Times the body of a with statement as a phase, see observe()
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start_time, section)
+
+    @contextlib.contextmanager
+    def profile_post(self, label):
+        """
+        Profiles the scan of a post in the body of a with statement, the capture is kept if it is one of the slowest
+
+        Args:
+            label (str): Identifies the post in the captures, f.e. its url
+        """
+        with self._lock:
+            profiling = self._profile_slowest and not self._profiling
+            self._profiling = self._profiling or profiling
+        if not profiling:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        start_time = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - start_time
+            with self._lock:
+                self._profiling = False
+                if len(self._profiles) < self._profile_slowest or seconds > self._profiles[0][0]:
+                    capture = (seconds, next(self._profile_sequence), label, pstats.Stats(profiler))
+                    if len(self._profiles) < self._profile_slowest:
+                        heapq.heappush(self._profiles, capture)
+                    else:
+                        heapq.heapreplace(self._profiles, capture)
+
+    def slowest_posts(self):
+        """
+        Returns:
+            list: (seconds, label, pstats.Stats) of the slowest profiled posts, the slowest first
+        """
+        with self._lock:
+            return [(seconds, label, stats) for seconds, _, label, stats in sorted(self._profiles, reverse=True)]
+
+    def histograms(self, by_section=True):
+        """
+        Args:
+            by_section (bool): Whether to keep sections apart, otherwise histograms of a phase are merged
+
+        Returns:
+            dict: Maps (phase, section) to its Histogram, or phase to its Histogram if not by section
+        """
+        with self._lock:
+            if by_section:
+                return {key: _copy_histogram(histogram) for key, histogram in self._histograms.items()}
+
+            merged = {}
+            for (phase, _), histogram in self._histograms.items():
+                merged.setdefault(phase, Histogram()).merge(histogram)
+            return merged
+
+    def summary(self):
+        """
+        Returns:
+            dict: Count, sum, mean, max and approximate percentiles of each phase, overall and per section
+        """
+        sections = {}
+        for (phase, section), histogram in self.histograms().items():
+            if section is not None:
+                sections.setdefault(section, {})[phase] = histogram.summary()
+        return {'phases': {phase: histogram.summary() for phase, histogram in self.histograms(False).items()},
+                'sections': sections,
+                'slowest_posts': [{'label': label, 'seconds': seconds} for seconds, label, _ in self.slowest_posts()]}
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: Histograms in Prometheus text exposition format
+        """
+        lines = [f'# HELP {METRIC_NAME} Duration of browsing phases',
+                 f'# TYPE {METRIC_NAME} histogram']
+        for (phase, section), histogram in sorted(self.histograms().items(), key=lambda item: (item[0][0],
+                                                                                               item[0][1] or '')):
+            labels = f'phase="{phase}",section="{_escape_label(section or "")}"'
+            bounds = [str(bound) for bound in HISTOGRAM_BUCKETS] + ['+Inf']
+            for bound, cumulative_count in zip(bounds, itertools.accumulate(histogram.bucket_counts)):
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative_count}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """
+        Writes the histograms for Prometheus' node exporter textfile collector, which must not see partial files
+        """
+        _write_atomically(path, self.to_prometheus())
+
+    def write_summary(self, path):
+        _write_atomically(path, json.dumps(self.summary(), indent=2))
+
+
+class NullInstrumentation:
+    """
+    Instrumentation that records nothing, used by browsers that were not given one
+    """
+
+    def observe(self, phase, seconds, section=None):
+        pass
+
+    def timer(self, phase, section=None):
+        return contextlib.nullcontext()
+
+    def profile_post(self, label):
+        return contextlib.nullcontext()
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+def _copy_histogram(histogram):
+    copy = Histogram()
+    copy.merge(histogram)
+    return copy
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomically(path, text):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
@@ -0,0 +1,270 @@
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+import urllib.parse
+
+import requests
+
+from http_session import get_shared_session_pool
+
+MAX_WORKERS = 8  # Downloads at a time
+MAX_CONNECTIONS_PER_HOST = 4  # Downloads at a time from each host
+CHUNK_SIZE = 64 * 1024  # Bytes read from a response and written to disk at a time
+MAX_ATTEMPTS = 3  # Attempts of a download whose connection broke, each one resumes the previous
+PARTIAL_DIR_NAME = 'partial'
+VALIDATOR_SUFFIX = '.validator'  # Of the file next to a partial file, holding the version of the file it is of
+
+MediaFile = collections.namedtuple('MediaFile', ['url', 'path', 'digest', 'size'])
+
+
+class MediaDownloader(contextlib.AbstractContextManager):
+    """
+    Downloads post media concurrently into a content-addressed store: files are named by the SHA-256 of their
+    content, so media that is posted more than once is stored once
+    Notes:
+        * Responses are streamed to disk in chunks, whole files are never held in memory
+        * A download whose connection broke is resumed with a Range request, both within a run and by later runs,
+          from the partial file it left. Resumes are conditional (If-Range) on the version the partial file is of,
+          so a file that changed in between is downloaded whole instead of spliced. Partial files of unknown versions
+          are downloaded again
+        * Downloads are limited per host on top of the overall limit, so one host is not flooded
+    """
+
+    def __init__(self,
+                 directory: str,
+                 session_pool=None,
+                 max_workers: int = MAX_WORKERS,
+                 max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                 chunk_size: int = CHUNK_SIZE,
+                 max_attempts: int = MAX_ATTEMPTS):
+        """
+        Args:
+            directory (str): Root of the store, created if needed
+            session_pool (http_session.SessionPool): By default, uses the process-wide shared pool
+            max_workers (int): Downloads at a time
+            max_connections_per_host (int): Downloads at a time from each host
+            chunk_size (int): Bytes read from a response and written to disk at a time
+            max_attempts (int): Attempts of a download whose connection broke
+        """
+        self._directory = directory
+        self._partial_directory = os.path.join(directory, PARTIAL_DIR_NAME)
+        os.makedirs(self._partial_directory, exist_ok=True)
+
+        self._session_pool = session_pool or get_shared_session_pool()
+        self._max_workers = max_workers
+        self._max_connections_per_host = max_connections_per_host
+        self._chunk_size = chunk_size
+        self._max_attempts = max_attempts
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._host_slots = {}  # Host -> semaphore of its connections
+        self._url_locks = {}  # Url -> lock of its partial file
+        self._media_files = {}  # Url -> MediaFile, of downloads of this run
+        self._lock = threading.Lock()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def download(self, url):
+        """
+        Downloads a file into the store, unless it was already downloaded by this downloader
+
+        Args:
+            url (str):
+
+        Returns:
+            MediaFile: Where the file is stored, and its digest and size
+        """
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            media_file = self._media_files.get(url)
+            if media_file is not None and os.path.exists(media_file.path):
+                return media_file
+
+            partial_path = os.path.join(self._partial_directory,
+                                        hashlib.sha1(url.encode('utf-8')).hexdigest() + _extension(url))
+            for attempt in range(1, self._max_attempts + 1):
+                try:
+                    with self._host_slot(url):
+                        digest = self._fetch(url, partial_path)
+                    break
+                except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as e:
+                    if attempt == self._max_attempts:
+                        raise
+                    logging.info(f'Download of "{url}" broke ({e!r}), resuming it')
+
+            media_file = self._store(url, partial_path, digest)
+            self._media_files[url] = media_file
+            return media_file
+
+    def download_many(self, urls):
+        """
+        Downloads files concurrently, failed downloads are logged and skipped
+
+        Args:
+            urls (iterable): May be a generator, it is consumed as downloads complete
+
+        Yields:
+            MediaFile: Downloaded files, in the order their downloads complete
+        """
+        urls = iter(urls)
+        futures = {}
+        try:
+            while True:
+                # Only a few downloads are queued ahead, so long iterables are not consumed at once
+                for url in urls:
+                    futures[self._executor.submit(self.download, url)] = url
+                    if len(futures) >= 2 * self._max_workers:
+                        break
+                if not futures:
+                    return
+
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    url = futures.pop(future)
+                    try:
+                        yield future.result()
+                    except (requests.exceptions.RequestException, OSError) as e:
+                        logging.warning(f'Failed downloading "{url}": {e!r}')
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def download_posts(self, posts):
+        """
+        Downloads the media of posts concurrently, see download_many()
+
+        Args:
+            posts (iterable): NinegagPost objects
+
+        Yields:
+            tuple: (NinegagPost, MediaFile) of every post whose media was downloaded
+        """
+        posts_by_url = {}
+
+        def media_urls():
+            for post in posts:
+                posts_by_url.setdefault(post.media_url, []).append(post)
+                yield post.media_url
+
+        for media_file in self.download_many(media_urls()):
+            for post in posts_by_url.pop(media_file.url, ()):
+                yield post, media_file
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def _fetch(self, url, partial_path):
+        """
+        Streams a file into its partial file, resuming what is already there
+
+        Returns:
+            str: SHA-256 hex digest of the file
+        """
+        validator_path = partial_path + VALIDATOR_SUFFIX
+        validator = _read_file(validator_path) if os.path.exists(partial_path) else None
+        offset = os.path.getsize(partial_path) if validator else 0
+        headers = {'accept-encoding': 'identity'}  # Ranges are of the file's bytes, not of a compressed encoding
+        if offset:
+            headers['range'] = f'bytes={offset}-'
+            headers['if-range'] = validator  # The whole file is sent instead if it changed
+
+        with self._session_pool.get(url, headers=headers, stream=True) as response:
+            if offset and response.status_code == 416:
+                if response.headers.get('content-range') == f'bytes */{offset}':
+                    return _file_digest(partial_path, hashlib.sha256(), self._chunk_size).hexdigest()
+                # The partial file is longer than the file, which changed since
+                _remove_partial(partial_path)
+                return self._fetch(url, partial_path)
+            response.raise_for_status()
+
+            if response.status_code != 206 or not response.headers.get('content-range', '').startswith(
+                    f'bytes {offset}-'):
+                offset = 0  # The server ignored the range and sent the whole file
+            elif _validator(response) != validator:
+                # The server ignored If-Range, and the rest is of another version of the file
+                response.close()
+                _remove_partial(partial_path)
+                return self._fetch(url, partial_path)
+
+            if not offset:
+                new_validator = _validator(response)
+                if new_validator:
+                    with open(validator_path, 'w', encoding='utf-8') as f:
+                        f.write(new_validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            digest = hashlib.sha256()
+            if offset:
+                _file_digest(partial_path, digest, self._chunk_size)
+
+            with open(partial_path, 'r+b' if offset else 'wb') as f:
+                f.seek(offset)
+                f.truncate()
+                for chunk in response.iter_content(self._chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def _store(self, url, partial_path, digest):
+        path = os.path.join(self._directory, digest[:2], digest + _extension(url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(partial_path)
+        if os.path.exists(path):
+            os.remove(partial_path)  # The same content is already stored, f.e. of a repost
+        else:
+            os.replace(partial_path, path)
+        if os.path.exists(partial_path + VALIDATOR_SUFFIX):
+            os.remove(partial_path + VALIDATOR_SUFFIX)
+        return MediaFile(url, path, digest, size)
+
+    @contextlib.contextmanager
+    def _host_slot(self, url):
+        host = urllib.parse.urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self._max_connections_per_host)
+        with slot:
+            yield
+
+
+def _extension(url):
+    return os.path.splitext(urllib.parse.urlparse(url).path)[1]
+
+
+def _validator(response):
+    """
+    Returns:
+        str: Version of a response's file that If-Range accepts (a strong ETag, or else Last-Modified), None if the
+             response has neither
+    """
+    etag = response.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('last-modified')
+
+
+def _read_file(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _remove_partial(partial_path):
+    for path in (partial_path, partial_path + VALIDATOR_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _file_digest(path, digest, chunk_size):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest
@@ -1,62 +1,85 @@
 import datetime
+import functools
 import json
-
-from lxml import html
+import multiprocessing
 
 from basic_browser import BasicBrowser
-from const import NinegagXPaths
+from exceptions import NoSuchElement
 from ninegag_post import NinegagPost
 
+SCAN_CHUNK_SIZE = 16  # Pages sent to a parsing worker at once
+POST_FIELDS = ('url', 'post_classes', 'section', 'title', 'upvotes_label', 'downvotes_label', 'comments_label',
+               'post_json')
+
 
 class NinegagBasicBrowser(BasicBrowser):
     @staticmethod
-    def scan_post_from_html(page_html, url=None):
+    def scan_post_from_html(page_html, url=None, fast=False):
         """
         Extracts data from a fully loaded html page of a 9GAG post
         Args:
             page_html (str): 9GAG post page
             url: Page's url, optional
+            fast (bool): Whether to stream the page through an event parser that stops once all fields are found,
+                         instead of building the whole DOM. Falls back to the whole DOM if some fields are not found,
+                         and does not apply to pages that are already parsed
 
         Returns:
             NinegagPost:
         """
+        from lxml import html  # Not needed by browsers that extract posts in the page, imported when first used
+        from streaming_extractor import extract_post_fields
+
+        if fast and not isinstance(page_html, html.HtmlElement):
+            try:
+                return NinegagBasicBrowser.scan_post_from_fields(extract_post_fields(page_html), url)
+            except NoSuchElement:
+                pass
+
         if not isinstance(page_html, html.HtmlElement):
             page_html = html.fromstring(page_html)
 
-        if url:
-            post_id = url.split("/")[-1]
-        else:
-            post_id = page_html.xpath(NinegagXPaths.Post.URL_META)[0].split("/")[-1]
+        return NinegagBasicBrowser.scan_post_from_fields(NinegagBasicBrowser._extract_post_fields(page_html), url)
 
-        post_classes = set(
-            page_html.xpath(NinegagXPaths.Post.POST_TYPE_DIV)[0].attrib['class'].split())
-        post_classes.remove('post-view')
-        post_type = post_classes.pop().replace('-post', '')
+    @staticmethod
+    def scan_post_from_fields(fields, url=None):
+        """
+        Builds a post out of the raw fields of its page, as extracted by _extract_post_fields() or in the browser by
+        NinegagSeleniumBrowser
+        Notes:
+            * Posts with an empty title or section label get '' for it, not None. Only fields whose element is missing
+              fail the scan
 
-        section = page_html.xpath(NinegagXPaths.Post.SECTION_LABEL)[0].text
+        Args:
+            fields (dict): Maps each of POST_FIELDS to its raw value in the page, None if it is missing
+            url: Page's url, optional
 
-        title = page_html.xpath(NinegagXPaths.Post.TITLE)[0].text
+        Returns:
+            NinegagPost:
+        """
+        missing_fields = [field for field in POST_FIELDS if fields.get(field) is None and (field != 'url' or not url)]
+        if missing_fields:
+            raise NoSuchElement(f'Could not find post fields {missing_fields}')
 
-        upvote_button = page_html.xpath(NinegagXPaths.Post.UPVOTE_BUTTON)[0]
-        upvotes = NinegagBasicBrowser._numeric_label_to_int(
-            upvote_button.xpath(NinegagXPaths.Post.VOTE_LABEL_RELATIVE)[0].text)
-        downvote_button = page_html.xpath(NinegagXPaths.Post.DOWNVOTE_BUTTON)[0]
-        downvotes = NinegagBasicBrowser._numeric_label_to_int(
-            downvote_button.xpath(NinegagXPaths.Post.VOTE_LABEL_RELATIVE)[0].text)
+        post_id = NinegagBasicBrowser.post_id_from_url(url or fields['url'])
+
+        post_classes = set(fields['post_classes'].split())
+        post_classes.remove('post-view')
+        post_type = post_classes.pop().replace('-post', '')
 
-        comments_label = page_html.xpath(NinegagXPaths.Post.COMMENT_COUNT_LABEL)[0].text
-        comment_count = NinegagBasicBrowser._numeric_comments_label_to_int(comments_label)
+        upvotes = NinegagBasicBrowser._numeric_label_to_int(fields['upvotes_label'])
+        downvotes = NinegagBasicBrowser._numeric_label_to_int(fields['downvotes_label'])
+        comment_count = NinegagBasicBrowser._numeric_comments_label_to_int(fields['comments_label'])
 
-        page_json = page_html.xpath(NinegagXPaths.POST_JSON_SCRIPT)[0].text_content()
-        post_info = json.loads(page_json)
+        post_info = json.loads(fields['post_json'])
         publish_time = datetime.datetime.strptime(post_info['datePublished'], "%Y-%m-%dT%H:%M:%S%z")
 
         fetch_time = datetime.datetime.now()
 
         return NinegagPost(post_id=post_id,
                            post_type=post_type,
-                           section=section,
-                           title=title,
+                           section=fields['section'],
+                           title=fields['title'],
                            upvotes=upvotes,
                            downvotes=downvotes,
                            comment_count=comment_count,
@@ -64,6 +87,81 @@ class NinegagBasicBrowser(BasicBrowser):
                            fetch_time=fetch_time
                            )
 
+    @staticmethod
+    def _extract_post_fields(page_html):
+        """
+        Extracts the raw fields of a post from its page
+        Args:
+            page_html (html.HtmlElement): 9GAG post page
+
+        Returns:
+            dict: Maps each of POST_FIELDS to its raw value in the page, None if it is missing. Text of elements
+                  without text is empty
+        """
+        from compiled_xpaths import CompiledNinegagXPaths
+
+        def first(xpath, context=page_html):
+            if context is None:
+                return None
+            elements = xpath(context)
+            return elements[0] if elements else None
+
+        def text(element):
+            return (element.text or '') if element is not None else None
+
+        def attribute(element, attr):
+            return element.get(attr) if element is not None else None
+
+        post_json_script = first(CompiledNinegagXPaths.POST_JSON_SCRIPT)
+        return {
+            'url': attribute(first(CompiledNinegagXPaths.Post.URL_META), 'content'),
+            'post_classes': attribute(first(CompiledNinegagXPaths.Post.POST_TYPE_DIV), 'class'),
+            'section': text(first(CompiledNinegagXPaths.Post.SECTION_LABEL)),
+            'title': text(first(CompiledNinegagXPaths.Post.TITLE)),
+            'upvotes_label': text(first(CompiledNinegagXPaths.Post.VOTE_LABEL_RELATIVE,
+                                        first(CompiledNinegagXPaths.Post.UPVOTE_BUTTON))),
+            'downvotes_label': text(first(CompiledNinegagXPaths.Post.VOTE_LABEL_RELATIVE,
+                                          first(CompiledNinegagXPaths.Post.DOWNVOTE_BUTTON))),
+            'comments_label': text(first(CompiledNinegagXPaths.Post.COMMENT_COUNT_LABEL)),
+            'post_json': post_json_script.text_content() if post_json_script is not None else None,
+        }
+
+    @staticmethod
+    def scan_posts_from_html(pages, processes=None, fast=False):
+        """
+        Extracts data from many fully loaded html pages of 9GAG posts
+        Notes:
+            * When using worker processes pages must be given as raw html, as parsed elements cannot be sent to them
+
+        Args:
+            pages (iterable): 9GAG post pages, each is either a page (str) or a (page, url) tuple
+            processes (int): Number of worker processes to parse with. By default, parsing is done in current process
+            fast (bool): See scan_post_from_html()
+
+        Yields:
+            NinegagPost: Representation of a post, in the same order of the pages
+        """
+        pages = (page if isinstance(page, tuple) else (page, None) for page in pages)
+
+        if not processes:
+            for page_html, url in pages:
+                yield NinegagBasicBrowser.scan_post_from_html(page_html, url, fast)
+            return
+
+        with multiprocessing.Pool(processes) as pool:
+            yield from pool.imap(functools.partial(_scan_page, fast=fast), pages, SCAN_CHUNK_SIZE)
+
+    @staticmethod
+    def post_id_from_url(url):
+        """
+        Args:
+            url (str): Url of a post page
+
+        Returns:
+            str: Id of the post
+        """
+        return url.split('?')[0].split('#')[0].rstrip('/').split('/')[-1]
+
     @staticmethod
     def _numeric_label_to_int(label):
         """
@@ -98,3 +196,8 @@ class NinegagBasicBrowser(BasicBrowser):
         if not count:
             return 0
         return int(count)
+
+
+def _scan_page(page, fast=False):
+    # Module level so it can be pickled and sent to parsing workers
+    return NinegagBasicBrowser.scan_post_from_html(*page, fast=fast)
@@ -1,38 +1,20 @@
-import urllib.parse
-
-import requests
-from lxml import html
-
 from background_browser import BackgroundBrowser
 from const import NON_BOT_USER_AGENT
 from ninegag_basic_browser import NinegagBasicBrowser
-from utils import random_wait
+from rate_scheduler import rate_key
 
 # Artificial delay to try to avoid being recognized as bots. Preferable use is before each GET request in the browser
 ARTIFICIAL_AVERAGE_DELAY = 1.5  # Seconds.
 
 
-# Does not work, use SeleniumNinegagBrowser
+# Gets blocked by 9GAG on its own, use NinegagHybridBrowser (or NinegagSeleniumBrowser)
 class NinegagBrowser(BackgroundBrowser, NinegagBasicBrowser):
+    request_headers = {'user-agent': NON_BOT_USER_AGENT}
+
     def get(self, url):
-        random_wait(ARTIFICIAL_AVERAGE_DELAY)
+        self._rate_wait(rate_key(url, self._host), ARTIFICIAL_AVERAGE_DELAY)
         return self._non_delayed_get(url)
 
-    def _non_delayed_get(self, url):
-        # If url starts with '/' we stay at current host and adjust the request accordingly
-        if self._host and url.startswith('/'):
-            url = self._host + url
-
-        # Performs the request
-        response = requests.get(url, headers={'user-agent': NON_BOT_USER_AGENT})
-        response.raise_for_status()  # If status code not ok, raises requests.exceptions.HTTPError
-
-        # Updates attributes
-        parsed_url = urllib.parse.urlparse(url)
-        self._host = f'{parsed_url.scheme}://{parsed_url.netloc}'
-        self._raw_html = response.text
-        self._html = html.fromstring(self._raw_html)
-
     def scan_post(self):
         """
         Extracts useful data from a post, that its page was recently retrieved using get method
@@ -40,4 +22,5 @@ class NinegagBrowser(BackgroundBrowser, NinegagBasicBrowser):
         Returns:
             NinegagPost: Representation of the current post
         """
-        return self.scan_post_from_html(self._html, self._host)
+        with self._instrumentation.profile_post(self._url), self._timer('extract'):
+            return self.scan_post_from_html(self._html, self._url)
@@ -0,0 +1,47 @@
+class NinegagComment(object):
+    # No per-instance __dict__, as popular posts have tens of thousands of comments
+    __slots__ = ('comment_id', 'post_id', 'parent_id', 'level', 'author', 'text', 'upvotes', 'downvotes',
+                 'reply_count', 'publish_time')
+
+    def __init__(self,
+                 comment_id: str,
+                 post_id: str,
+                 text: str,
+                 author: str = None,
+                 parent_id: str = None,
+                 level: int = 1,
+                 upvotes: int = None,
+                 downvotes: int = None,
+                 reply_count: int = None,
+                 publish_time=None
+                 ):
+        self.comment_id = comment_id
+        self.post_id = post_id
+        self.parent_id = parent_id  # None for comments on the post itself
+        self.level = level  # 1 for comments on the post itself, 2 for their replies and so on
+        self.author = author
+        self.text = text
+        self.upvotes = upvotes
+        self.downvotes = downvotes
+        self.reply_count = reply_count
+        self.publish_time = publish_time
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The attributes of the comment, in JSON-compatible types (times in ISO format)
+        """
+        return {'comment_id': self.comment_id,
+                'post_id': self.post_id,
+                'parent_id': self.parent_id,
+                'level': self.level,
+                'author': self.author,
+                'text': self.text,
+                'upvotes': self.upvotes,
+                'downvotes': self.downvotes,
+                'reply_count': self.reply_count,
+                'publish_time': self.publish_time.isoformat() if self.publish_time else None,
+                }
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(post_id={repr(self.post_id)}, comment_id={repr(self.comment_id)})>'
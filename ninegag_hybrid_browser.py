@@ -0,0 +1,116 @@
+import logging
+
+import requests
+
+from const import NINEGAG_URL
+from exceptions import Blocked
+from ninegag_browser import NinegagBrowser
+
+BLOCK_STATUS_CODES = (403, 429, 503)
+# Bot-check pages are sometimes served with status 200, they are recognized by these
+CHALLENGE_MARKERS = ('challenge-platform', 'cf-chl', '<title>Just a moment...</title>')
+MAX_CLEARANCES = 2  # Clearances acquired in a row for one page, before it is considered blocked for good
+
+
+class NinegagHybridBrowser(NinegagBrowser):
+    """
+    Fetches pages over pooled HTTP sessions, with the clearance of a NinegagSeleniumBrowser: its cookies and user agent
+    are handed to the session of 9GAG, and are acquired again whenever a response looks blocked
+    Notes:
+        * Firefox only passes bot checks, pages are fetched and parsed without being rendered
+        * The session pool is usually shared, so the clearance serves every browser that uses the pool
+    """
+
+    def __init__(self,
+                 clearance_browser=None,
+                 clearance_url: str = NINEGAG_URL,
+                 max_clearances: int = MAX_CLEARANCES,
+                 session_pool=None,
+                 rate_scheduler=None,
+                 cache=None,
+                 instrumentation=None,
+                 **options):
+        """
+        Args:
+            clearance_browser (NinegagSeleniumBrowser): Browser to acquire clearance with. By default, one is started
+                                                        with `options` once clearance is first needed, and is quit
+                                                        along with this browser
+            clearance_url (str): Page the clearance browser visits, its host gets the clearance
+            max_clearances (int): Clearances acquired in a row for one page, before Blocked is raised
+            session_pool (http_session.SessionPool): See BackgroundBrowser
+            rate_scheduler (rate_scheduler.RateScheduler): See BasicBrowser
+            cache (http_cache.HttpCache): See BackgroundBrowser, bot-check pages are dropped from it once recognized
+            instrumentation (instrumentation.Instrumentation): See BasicBrowser
+            **options: Passed to the clearance browser it starts, see SeleniumBrowser._start()
+        """
+        super().__init__(session_pool, rate_scheduler, cache, instrumentation)
+        self._clearance_browser = clearance_browser
+        self._owns_clearance_browser = clearance_browser is None
+        self._clearance_url = clearance_url
+        self._max_clearances = max_clearances
+        self._browser_options = options
+        self.request_headers = dict(self.request_headers)
+        self.clearance_count = 0
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._owns_clearance_browser and self._clearance_browser is not None:
+            self._clearance_browser.__exit__(exc_type, exc_val, exc_tb)
+
+    def acquire_clearance(self):
+        """
+        Visits 9GAG in the clearance browser, and hands its cookies and user agent to the HTTP session of 9GAG
+        """
+        if self._clearance_browser is None:
+            # Selenium is only imported once clearance is needed
+            from ninegag_selenium_browser import NinegagSeleniumBrowser
+
+            self._clearance_browser = NinegagSeleniumBrowser(rate_scheduler=self._rate_scheduler,
+                                                             instrumentation=self._instrumentation,
+                                                             **self._browser_options)
+
+        self._clearance_browser._get(self._clearance_url)
+        driver = self._clearance_browser._driver
+        session = self._session_pool.session(self._clearance_url)
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                                path=cookie.get('path', '/'))
+        # Clearance is usually bound to the user agent it was given to
+        self.request_headers['user-agent'] = driver.execute_script('return navigator.userAgent')
+        self.clearance_count += 1
+
+    def scan_posts(self, urls):
+        """
+        Fetches and scans post pages one after the other
+
+        Args:
+            urls (iterable): Urls of post pages, f.e. of the posts NinegagFeedFetcher.scan_section() yields
+
+        Yields:
+            NinegagPost: Representation of each post
+        """
+        for url in urls:
+            self.get(url)
+            yield self.scan_post()
+
+    def _non_delayed_get(self, url):
+        if not self.clearance_count:
+            self.acquire_clearance()
+
+        for clearance in range(self._max_clearances + 1):
+            try:
+                super()._non_delayed_get(url)
+                if not any(marker in self._raw_html for marker in CHALLENGE_MARKERS):
+                    return
+                reason = 'a bot-check page'
+                if self._cache:
+                    self._cache.invalidate(self._url)  # Otherwise the retry is served the cached bot-check page
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in BLOCK_STATUS_CODES:
+                    raise
+                reason = f'status {e.response.status_code}'
+
+            if clearance == self._max_clearances:
+                raise Blocked(f'Fetching "{url}" was blocked ({reason}) after acquiring clearance again '
+                              f'{self._max_clearances} times')
+            logging.info(f'Fetching "{url}" was blocked ({reason}), acquiring clearance again')
+            self.acquire_clearance()
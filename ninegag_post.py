@@ -1,7 +1,12 @@
-from const import NINEGAG_POST_URL_TEMPLATE, NINEGAG_IMAGE_URL_TEMPLATE
+from const import NINEGAG_POST_URL_TEMPLATE, NINEGAG_IMAGE_URL_TEMPLATE, NINEGAG_VIDEO_URL_TEMPLATE
+
+VIDEO_POST_TYPES = ('gif', 'video')  # Animated posts are served as videos too
 
 
 class NinegagPost(object):
+    # No per-instance __dict__, as long scans hold many posts in memory
+    __slots__ = ('post_id', 'post_type', 'section', 'title', 'upvotes', 'downvotes', 'comment_count', 'publish_time',
+                 'fetch_time', 'comments', 'tags', 'original_poster', 'repost_of')
 
     def __init__(self,
                  post_id: str,
@@ -15,7 +20,8 @@ class NinegagPost(object):
                  fetch_time=None,
                  comments=None,
                  tags=None,
-                 original_poster=None
+                 original_poster=None,
+                 repost_of=None
                  ):
         self.post_id = post_id
         self.post_type = post_type
@@ -29,6 +35,7 @@ class NinegagPost(object):
         self.comments = comments
         self.tags = tags
         self.original_poster = original_poster
+        self.repost_of = repost_of  # Id of the first post of the same image, see repost_index.RepostIndex
 
     @property
     def url(self):
@@ -38,10 +45,39 @@ class NinegagPost(object):
     def image_url(self):
         return NINEGAG_IMAGE_URL_TEMPLATE.format(post_id=self.post_id)
 
+    @property
+    def video_url(self):
+        return NINEGAG_VIDEO_URL_TEMPLATE.format(post_id=self.post_id)
+
+    @property
+    def media_url(self):
+        """
+        Returns:
+            str: Url of the video of animated and video posts, of the image otherwise
+        """
+        return self.video_url if self.post_type in VIDEO_POST_TYPES else self.image_url
+
     @property
     def points(self):
         return self.upvotes - self.downvotes
 
+    def to_dict(self):
+        """
+        Returns:
+            dict: The scanned attributes of the post with its url, in JSON-compatible types (times in ISO format)
+        """
+        return {'post_id': self.post_id,
+                'post_type': self.post_type,
+                'section': self.section,
+                'title': self.title,
+                'upvotes': self.upvotes,
+                'downvotes': self.downvotes,
+                'comment_count': self.comment_count,
+                'publish_time': self.publish_time.isoformat() if self.publish_time else None,
+                'fetch_time': self.fetch_time.isoformat() if self.fetch_time else None,
+                'url': self.url,
+                }
+
     def __repr__(self):
         return f'<{self.__class__.__name__}(url={repr(self.url)})>'
 
@@ -1,26 +1,71 @@
+import collections
+import concurrent.futures
 import itertools
+import logging
 import time
 
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException, TimeoutException,
+                                        WebDriverException)
 
 from ninegag_basic_browser import NinegagBasicBrowser
 from selenium_browser import SeleniumBrowser
 from const import NINEGAG_URL, NinegagXPaths
-from exceptions import AuthenticationRequired, InvalidAction
-from utils import random_wait
+from exceptions import AuthenticationRequired, InvalidAction, NoSuchElement
+from rate_scheduler import rate_key
 
 MAX_DELAY = 10  # Seconds
 MAX_ATTEMPTS_FOR_ACTION = 5
 # Artificial delay to try to avoid being recognized as bots. Preferable use is before each GET request in the browser
 ARTIFICIAL_AVERAGE_DELAY = 0.5  # Seconds.
+# Seconds the login popup is waited for at least. It rarely shows up for logged in users, so its learned timeout
+# soon drops to the minimum, and a slow popup would be missed along with the AuthenticationRequired it means
+LOGIN_POPUP_MIN_WAIT = 2
+PIPELINE_DEPTH = 4  # Page snapshots waiting to be parsed in a pipelined scan, before navigation waits for the parser
+
+# Extracts the raw post fields (see NinegagBasicBrowser.POST_FIELDS) inside the page, mirroring
+# NinegagBasicBrowser._extract_post_fields(). Element text is the leading text node, like lxml's `.text`, and is
+# empty for elements without one (f.e. posts without a title)
+POST_FIELDS_SCRIPT = """
+const xpaths = arguments[0];
+const first = (xpath, context) => context === null ? null : document.evaluate(
+    xpath, context || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const text = element => !element ? null : element.firstChild && element.firstChild.nodeType === Node.TEXT_NODE
+    ? element.firstChild.nodeValue : '';
+const attribute = (element, attr) => element ? element.getAttribute(attr) : null;
+
+const postJsonScript = first(xpaths.POST_JSON_SCRIPT);
+return {
+    url: attribute(first(xpaths.URL_META), 'content'),
+    post_classes: attribute(first(xpaths.POST_TYPE_DIV), 'class'),
+    section: text(first(xpaths.SECTION_LABEL)),
+    title: text(first(xpaths.TITLE)),
+    upvotes_label: text(first(xpaths.VOTE_LABEL_RELATIVE, first(xpaths.UPVOTE_BUTTON))),
+    downvotes_label: text(first(xpaths.VOTE_LABEL_RELATIVE, first(xpaths.DOWNVOTE_BUTTON))),
+    comments_label: text(first(xpaths.COMMENT_COUNT_LABEL)),
+    post_json: postJsonScript ? postJsonScript.textContent : null,
+};
+"""
+POST_FIELDS_SCRIPT_XPATHS = {
+    'POST_JSON_SCRIPT': NinegagXPaths.POST_JSON_SCRIPT,
+    **{name: getattr(NinegagXPaths.Post, name) for name in ('URL_META', 'POST_TYPE_DIV', 'SECTION_LABEL', 'TITLE',
+                                                             'VOTE_LABEL_RELATIVE', 'UPVOTE_BUTTON',
+                                                             'DOWNVOTE_BUTTON', 'COMMENT_COUNT_LABEL')},
+}
 
 
 class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
+    max_delay = MAX_DELAY  # Maximal wait for elements to render
+    # Whether to extract posts inside the page instead of transferring and parsing the whole page source
+    in_browser_extraction = True
+    # Whether to parse the page source of each post in a worker thread while navigating to the next post, see
+    # _scan_posts_pipelined()
+    pipelined_scan = False
+    pipeline_depth = PIPELINE_DEPTH
+
     def _get(self, url):
-        random_wait(ARTIFICIAL_AVERAGE_DELAY)
+        self._rate_wait(rate_key(url), ARTIFICIAL_AVERAGE_DELAY)
         return self._non_delayed_get(url)
 
     def _start(self, **options):
@@ -37,6 +82,7 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
             section_name (str): 9GAG section name as appears in the menu or in the URL, works with both
             fresh (bool): Whether to browse to section's Fresh (otherwise goes to Hot)
         """
+        self._section = section_name.lower()
         if section_name.lower() in ('hot', 'trending', 'fresh'):
             self._get(f'{NINEGAG_URL}/{section_name.lower()}')
             return
@@ -87,8 +133,7 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
             password (str): Account's password
         """
         # Wait until frame is loaded
-        username_input = WebDriverWait(self._driver, MAX_DELAY).until(
-            EC.presence_of_element_located((By.XPATH, NinegagXPaths.LoginFrame.USERNAME_INPUT)))
+        username_input = self._wait_until(NinegagXPaths.LoginFrame.USERNAME_INPUT)
         username_input.send_keys(username)
 
         self._find_element_by_xpath(NinegagXPaths.LoginFrame.PASSWORD_INPUT).send_keys(password)
@@ -122,7 +167,12 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
             password (str):
         """
         self._find_element_by_xpath(element_xpath).click()
-        time.sleep(1)
+
+        try:
+            # The popup appears only if the user is not authenticated
+            self._wait_until(NinegagXPaths.LoginPopup.CLOSE_BUTTON, optional=True, min_timeout=LOGIN_POPUP_MIN_WAIT)
+        except TimeoutException:
+            return
 
         try:
             if username and password:
@@ -134,20 +184,41 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
         except NoSuchElementException:
             pass
 
-    def scan_section(self, max_iterations: int):
+    def scan_section(self, max_iterations: int, checkpointer=None, claim=None):
         """
         Extract data from a sequence of posts and save it to DB
         Notes:
-            * Assumes webdriver is in a section feed
+            * Assumes webdriver is in a section feed, unless resuming from a checkpoint
 
         Args:
             max_iterations (int): Length of post sequence to extract, negative value will return an infinite generator
+            checkpointer (crawl_checkpoint.CrawlCheckpointer): Saves the scan position. If it holds a checkpoint of the
+                                                               section, the scan resumes from the saved post instead
+                                                               of the first post of the feed
+            claim (callable): Gets the id of each post before it is scanned, the post is skipped unless it returns
+                              True. Lets browsers that scan overlapping sections split their posts
 
         Returns:
             generator of the posts collected
         """
-        self._get(self._find_first_post())
-        return self._scan_posts(max_iterations)
+        post_url = checkpointer.resume(self._section) if checkpointer else None
+        if post_url:
+            self._section = checkpointer.checkpoint.section
+        self._get(post_url or self._find_first_post())
+        return self._scan_posts(max_iterations, checkpointer, claim)
+
+    def scan_post_at(self, url: str):
+        """
+        Browses to a post page and extracts its data, f.e. to poll a known post again
+
+        Args:
+            url (str): Url of a post page
+
+        Returns:
+            NinegagPost: Representation of the post
+        """
+        self._get(url)
+        return self._scan_post()
 
     def _find_first_post(self):
         """
@@ -168,9 +239,13 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
             except NoSuchElementException:
                 first_post = first_article
 
-            time.sleep(2)
-            try:
+            def post_link(_):
                 return first_post.find_element_by_xpath(NinegagXPaths.ARTICLE_LINK_RELATIVE).get_attribute('href')
+
+            try:
+                # The feed may still be rendering, so the link is polled for
+                return self._waiter.until(self._driver, post_link, NinegagXPaths.ARTICLE_LINK_RELATIVE,
+                                          max_timeout=self.max_delay)
             except StaleElementReferenceException:
                 # Failure seems to be arbitrary, so we refresh and try again
                 self._driver.refresh()
@@ -189,9 +264,9 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
         Returns:
             webdriver.WebElement: The article element
         """
-        return self._find_element_by_xpath(f'//article[{n}]')
+        return self._wait_for_element(f'//article[{n}]')
 
-    def _scan_posts(self, iterations: int):
+    def _scan_posts(self, iterations: int, checkpointer=None, claim=None):
         """
         Extract data from a sequence of posts
         Notes:
@@ -199,16 +274,151 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
 
         Args:
             iterations (int): Length of post sequence to extract
+            checkpointer (crawl_checkpoint.CrawlCheckpointer): Records scanned posts, which are skipped if they are met
+                                                               again, and saves the position when the scan stops
+            claim (callable): See scan_section()
 
         Yields:
             NinegagPost: Representation of a post
         """
+        if self.pipelined_scan:
+            yield from self._scan_posts_pipelined(iterations, checkpointer, claim)
+            return
+
         count_sequence = itertools.count() if iterations < 0 else range(iterations)
         # There will be infinite iterations if specified -1 or smaller
 
-        for _ in count_sequence:
-            yield self._scan_post()
-            self._next_post()
+        try:
+            for _ in count_sequence:
+                while True:
+                    post_url = self._driver.current_url
+                    if not self._is_skipped(post_url, checkpointer, claim):
+                        break
+                    self._next_post()  # Skipped without scanning it
+
+                with self._instrumentation.profile_post(post_url):
+                    post = self._scan_post()
+
+                yield post
+                if checkpointer is not None:
+                    checkpointer.record(post, post_url)  # Once the consumer asks for the next post
+                self._next_post()
+        finally:
+            if checkpointer is not None:
+                try:
+                    post_url = self._driver.current_url
+                except WebDriverException:
+                    post_url = None  # Resumes from the last recorded post instead
+                checkpointer.save(post_url)
+
+    def _scan_posts_pipelined(self, iterations: int, checkpointer=None, claim=None):
+        """
+        Extract data from a sequence of posts like _scan_posts(), but parses the page source of each post in a worker
+        thread while the browser already navigates to the next post
+        Notes:
+            * Assumes webdriver is in a post page
+            * Posts are yielded in order. Navigation runs ahead of the parser by up to `pipeline_depth` snapshots,
+              then waits for it, so unparsed snapshots do not pile up
+            * Posts that were snapshot but not yielded when the scan stops are scanned again on resume
+            * The snapshot and the parse of a post (in the worker thread) are profiled separately under its url, see
+              Instrumentation.profile_post()
+            * Raises ValueError if `pipeline_depth` is below 1
+
+        Args:
+            iterations (int): Length of post sequence to extract, negative value will scan infinitely
+            checkpointer (crawl_checkpoint.CrawlCheckpointer): See _scan_posts()
+            claim (callable): See scan_section()
+
+        Yields:
+            NinegagPost: Representation of a post
+        """
+        if self.pipeline_depth < 1:
+            raise ValueError(f'Pipeline depth must be at least 1, not {self.pipeline_depth}')
+
+        pending = collections.deque()  # (post url, future of the parsed post) of each snapshot, in page order
+        post_count = 0
+        navigate = False  # Whether the current page was already snapshot
+        unrecorded_url = None  # Url of the yielded post, until it is recorded
+        navigation_error = None  # Raised once the pending posts are yielded
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+
+        try:
+            while iterations < 0 or post_count < iterations:
+                # Posts are snapshot ahead while the parser is busy, but not more than are still needed
+                if navigation_error is None and len(pending) < self.pipeline_depth and (
+                        iterations < 0 or post_count + len(pending) < iterations):
+                    try:
+                        if navigate:
+                            self._next_post()
+                        navigate = True
+                        post_url = self._driver.current_url
+                        if self._is_skipped(post_url, checkpointer, claim):
+                            continue  # Skipped without snapshotting it
+                        with self._instrumentation.profile_post(post_url):
+                            page_source = self._snapshot_post()
+                    except Exception as e:
+                        # Posts that were already snapshot are yielded before the error is raised, as they are
+                        # when scanning sequentially
+                        navigation_error = e
+                        continue
+                    pending.append((post_url, executor.submit(self._profiled_parse_snapshot, page_source, post_url)))
+                    continue
+
+                if not pending:
+                    raise navigation_error
+                post_url, future = pending[0]
+                post = future.result()
+                pending.popleft()
+                unrecorded_url = post_url
+                yield post
+                unrecorded_url = None
+                post_count += 1
+                if checkpointer is not None:
+                    checkpointer.record(post, post_url)  # Once the consumer asks for the next post
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown()
+            if checkpointer is not None:
+                # Resumes from the first post that was not recorded
+                if unrecorded_url is not None or pending:
+                    post_url = unrecorded_url or pending[0][0]
+                else:
+                    try:
+                        post_url = self._driver.current_url
+                    except WebDriverException:
+                        post_url = None  # Resumes from the last recorded post instead
+                checkpointer.save(post_url)
+
+    def _profiled_parse_snapshot(self, page_source, post_url):
+        # Runs in the worker thread, which the profile of the snapshot does not cover
+        with self._instrumentation.profile_post(post_url):
+            return self._parse_snapshot(page_source, post_url)
+
+    def _is_skipped(self, post_url, checkpointer, claim):
+        """
+        Returns:
+            bool: Whether the post was scanned before the scan was resumed, or was claimed by another browser
+        """
+        post_id = self.post_id_from_url(post_url)
+        return ((checkpointer is not None and checkpointer.is_seen(post_id)) or
+                (claim is not None and not claim(post_id)))
+
+    def _snapshot_post(self):
+        """
+        Notes:
+            * Assumes webdriver is in a post page
+
+        Returns:
+            str: Source of the current post page, once it is fully rendered
+        """
+        self._wait_until(NinegagXPaths.Post.COMMENT_SECTION_RENDER_CHECK)
+        with self._timer('fetch'):
+            return self._driver.page_source
+
+    def _parse_snapshot(self, page_source, post_url):
+        with self._timer('extract'):
+            return self.scan_post_from_html(page_source, post_url)
 
     def _scan_post(self):
         """
@@ -220,9 +430,28 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
             NinegagPost: Representation of the current post
         """
         # We wait for the comments to be fully loaded, they are usually the last component to be rendered
-        WebDriverWait(self._driver, MAX_DELAY).until(
-            EC.presence_of_element_located((By.XPATH, NinegagXPaths.Post.COMMENT_SECTION_RENDER_CHECK)))
-        return self.scan_post_from_html(self._driver.page_source, self._driver.current_url)
+        self._wait_until(NinegagXPaths.Post.COMMENT_SECTION_RENDER_CHECK)
+
+        with self._timer('extract'):
+            if self.in_browser_extraction:
+                try:
+                    return self._scan_post_in_browser()
+                except (NoSuchElement, WebDriverException, ValueError) as e:
+                    logging.debug(f'In-browser extraction failed, falling back to page source: {e}')
+
+            return self.scan_post_from_html(self._driver.page_source, self._driver.current_url)
+
+    def _scan_post_in_browser(self):
+        """
+        Extracts useful data from a post by running a script in the page, so only the needed fields are transferred
+        Notes:
+            * Assumes webdriver is in a fully rendered post page
+
+        Returns:
+            NinegagPost: Representation of the current post
+        """
+        fields = self._driver.execute_script(POST_FIELDS_SCRIPT, POST_FIELDS_SCRIPT_XPATHS)
+        return self.scan_post_from_fields(fields, self._driver.current_url)
 
     def _next_post(self, wait_for_comments=True):
         """
@@ -230,15 +459,21 @@ class NinegagSeleniumBrowser(SeleniumBrowser, NinegagBasicBrowser):
         Notes:
             * Assumes webdriver is in a post page
         """
-        self._find_element_by_xpath(NinegagXPaths.Post.NEXT_POST_BUTTON).click()
-
-        # Waits for the post to render completely.
-        # We must make sure that 'next-post' button is rendered, for assuring this function will work
-        # as expected the next time it is being called
-        WebDriverWait(self._driver, MAX_DELAY).until(
-            EC.presence_of_element_located((By.XPATH, NinegagXPaths.Post.NEXT_POST_BUTTON)))
+        start_time = time.perf_counter()
+        with self._timer('fetch'):
+            self._find_element_by_xpath(NinegagXPaths.Post.NEXT_POST_BUTTON).click()
+            self.page_loads += 1
+
+            # Waits for the post to render completely.
+            # We must make sure that 'next-post' button is rendered, for assuring this function will work
+            # as expected the next time it is being called
+            self._waiter.until(self._driver,
+                               EC.presence_of_element_located((By.XPATH, NinegagXPaths.Post.NEXT_POST_BUTTON)),
+                               NinegagXPaths.Post.NEXT_POST_BUTTON, max_timeout=self.max_delay)
 
         if wait_for_comments:
             # Comments are usually rendered last and takes additional 0.5-2 seconds to load
-            WebDriverWait(self._driver, MAX_DELAY).until(
-                EC.presence_of_element_located((By.XPATH, NinegagXPaths.Post.COMMENT_SECTION_RENDER_CHECK)))
+            self._wait_until(NinegagXPaths.Post.COMMENT_SECTION_RENDER_CHECK)
+
+        if self._record_page_stats:
+            self._add_page_stats(time.perf_counter() - start_time, full_load=False)
@@ -0,0 +1,192 @@
+import datetime
+
+import numpy
+
+from ninegag_post import NinegagPost
+
+MISSING_COUNT = -1  # Stored for missing counts, same as labels that could not be read (see _numeric_label_to_int())
+_TIME_UNIT = 'datetime64[us]'
+
+
+def _times_to_column(times):
+    """
+    Converts datetimes to a UTC datetime64 column, naive datetimes are considered local (like datetime.now())
+    """
+    return numpy.array([numpy.datetime64(time.astimezone(datetime.timezone.utc).replace(tzinfo=None))
+                        if time is not None else numpy.datetime64('NaT') for time in times], dtype=_TIME_UNIT)
+
+
+def _time_from_column(value, aware):
+    if numpy.isnat(value):
+        return None
+    time = value.astype(datetime.datetime).replace(tzinfo=datetime.timezone.utc)
+    return time if aware else time.astimezone().replace(tzinfo=None)
+
+
+def _counts_to_column(counts):
+    return numpy.array([count if count is not None else MISSING_COUNT for count in counts], dtype=numpy.int64)
+
+
+class _Categorical:
+    """
+    Column of few distinct strings, stored as codes into a list of categories
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values):
+        categories, codes = numpy.unique(numpy.array(values, dtype=object), return_inverse=True)
+        return cls(codes.astype(numpy.int32), list(categories))
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return self.categories[self.codes[index]]
+        return _Categorical(self.codes[index], self.categories)
+
+    def values(self):
+        return numpy.array(self.categories, dtype=object)[self.codes]
+
+
+class PostBatch:
+    """
+    Column-wise container of many post snapshots, in NumPy arrays
+    Notes:
+        * Times are stored in UTC. Publish times are restored timezone-aware, fetch times naive in local time
+        * Comments, tags and original poster are not kept
+    """
+
+    def __init__(self, post_ids, post_types, sections, titles, upvotes, downvotes, comment_counts, publish_times,
+                 fetch_times):
+        self.post_ids = post_ids
+        self._post_types = post_types
+        self._sections = sections
+        self.titles = titles
+        self.upvotes = upvotes
+        self.downvotes = downvotes
+        self.comment_counts = comment_counts
+        self.publish_times = publish_times
+        self.fetch_times = fetch_times
+
+    @classmethod
+    def from_posts(cls, posts):
+        """
+        Args:
+            posts (iterable): NinegagPost objects
+
+        Returns:
+            PostBatch:
+        """
+        posts = list(posts)
+        return cls(post_ids=numpy.array([post.post_id for post in posts], dtype=str),
+                   post_types=_Categorical.from_values([post.post_type or '' for post in posts]),
+                   sections=_Categorical.from_values([post.section or '' for post in posts]),
+                   titles=numpy.array([post.title for post in posts], dtype=object),
+                   upvotes=_counts_to_column(post.upvotes for post in posts),
+                   downvotes=_counts_to_column(post.downvotes for post in posts),
+                   comment_counts=_counts_to_column(post.comment_count for post in posts),
+                   publish_times=_times_to_column(post.publish_time for post in posts),
+                   fetch_times=_times_to_column(post.fetch_time for post in posts))
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        Args:
+            batches (list[PostBatch]):
+
+        Returns:
+            PostBatch: All snapshots of the batches, in order
+        """
+        return cls.from_columns(**{name: numpy.concatenate([getattr(batch, name) for batch in batches])
+                                   for name in ('post_ids', 'post_types', 'sections', 'titles', 'upvotes',
+                                                'downvotes', 'comment_counts', 'publish_times', 'fetch_times')})
+
+    @classmethod
+    def from_columns(cls, post_ids, post_types, sections, titles, upvotes, downvotes, comment_counts, publish_times,
+                     fetch_times):
+        """
+        Builds a batch out of plain arrays (f.e. loaded from a database), see the attributes of PostBatch
+        """
+        return cls(post_ids=numpy.asarray(post_ids, dtype=str),
+                   post_types=_Categorical.from_values(post_types),
+                   sections=_Categorical.from_values(sections),
+                   titles=numpy.asarray(titles, dtype=object),
+                   upvotes=numpy.asarray(upvotes, dtype=numpy.int64),
+                   downvotes=numpy.asarray(downvotes, dtype=numpy.int64),
+                   comment_counts=numpy.asarray(comment_counts, dtype=numpy.int64),
+                   publish_times=numpy.asarray(publish_times, dtype=_TIME_UNIT),
+                   fetch_times=numpy.asarray(fetch_times, dtype=_TIME_UNIT))
+
+    @property
+    def post_types(self):
+        return self._post_types.values()
+
+    @property
+    def sections(self):
+        return self._sections.values()
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def __getitem__(self, index):
+        """
+        Args:
+            index: Position of a post, or a slice, mask or positions array of posts
+
+        Returns:
+            NinegagPost or PostBatch: A post for a single position, otherwise a batch of the selected posts
+        """
+        if isinstance(index, (int, numpy.integer)):
+            return self._post_at(index)
+        return PostBatch(post_ids=self.post_ids[index],
+                         post_types=self._post_types[index],
+                         sections=self._sections[index],
+                         titles=self.titles[index],
+                         upvotes=self.upvotes[index],
+                         downvotes=self.downvotes[index],
+                         comment_counts=self.comment_counts[index],
+                         publish_times=self.publish_times[index],
+                         fetch_times=self.fetch_times[index])
+
+    def __iter__(self):
+        return (self._post_at(i) for i in range(len(self)))
+
+    def to_posts(self):
+        return list(self)
+
+    @property
+    def points(self):
+        return self.upvotes - self.downvotes
+
+    @property
+    def vote_ratio(self):
+        """
+        Returns:
+            numpy.ndarray: Upvotes per downvote, NaN where there are no downvotes
+        """
+        ratio = numpy.full(len(self), numpy.nan)
+        return numpy.divide(self.upvotes, self.downvotes, out=ratio, where=self.downvotes > 0)
+
+    def age(self, now=None):
+        """
+        Args:
+            now (datetime.datetime): Time to measure age at. By default, measures age at each snapshot's fetch time
+
+        Returns:
+            numpy.ndarray: Seconds since each post was published, NaN if a time is missing
+        """
+        end_times = self.fetch_times if now is None else _times_to_column([now])[0]
+        return (end_times - self.publish_times) / numpy.timedelta64(1, 's')
+
+    def _post_at(self, i):
+        return NinegagPost(post_id=str(self.post_ids[i]),
+                           post_type=self._post_types[i] or None,
+                           section=self._sections[i] or None,
+                           title=self.titles[i],
+                           upvotes=int(self.upvotes[i]),
+                           downvotes=int(self.downvotes[i]),
+                           comment_count=int(self.comment_counts[i]),
+                           publish_time=_time_from_column(self.publish_times[i], aware=True),
+                           fetch_time=_time_from_column(self.fetch_times[i], aware=False))
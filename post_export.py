@@ -0,0 +1,186 @@
+import contextlib
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # zstd compression is only available with zstandard installed
+
+BATCH_SIZE = 200  # Posts buffered before they are written
+FSYNC_INTERVAL = 30  # Seconds
+EXPORT_FORMATS = ('jsonl', 'csv')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+CSV_FIELDS = ('post_id', 'post_type', 'section', 'title', 'upvotes', 'downvotes', 'comment_count', 'publish_time',
+              'fetch_time', 'url')
+_COMPRESSION_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+class PostExporter(contextlib.AbstractContextManager):
+    """
+    Streams posts to JSONL or CSV files, optionally compressed, in bounded batches
+    Notes:
+        * Memory does not grow with the number of posts, so infinite scans can be exported
+        * Files are rotated by size and/or time, each file is complete (with CSV header) on its own
+    """
+
+    def __init__(self,
+                 directory: str,
+                 prefix: str = 'posts',
+                 export_format: str = 'jsonl',
+                 compression: str = None,
+                 batch_size: int = BATCH_SIZE,
+                 rotate_bytes: int = None,
+                 rotate_seconds: float = None,
+                 fsync_interval: float = FSYNC_INTERVAL):
+        """
+        Args:
+            directory (str): Directory to write files in, created if it does not exist
+            prefix (str): Start of file names, which continue with the creation time and a running index
+            export_format (str): One of EXPORT_FORMATS
+            compression (str): One of COMPRESSIONS, 'zstd' requires zstandard
+            batch_size (int): Posts buffered before they are written
+            rotate_bytes (int): Starts a new file once the current one is larger (on disk). By default, not rotated
+            rotate_seconds (float): Starts a new file once the current one is older. By default, not rotated
+            fsync_interval (float): Seconds between flushing files all the way to disk
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Export format must be one of {EXPORT_FORMATS}')
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Compression must be one of {COMPRESSIONS}')
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError('zstd compression requires zstandard')
+
+        self._directory = directory
+        self._prefix = prefix
+        self._export_format = export_format
+        self._compression = compression
+        self._batch_size = batch_size
+        self._rotate_bytes = rotate_bytes
+        self._rotate_seconds = rotate_seconds
+        self._fsync_interval = fsync_interval
+
+        self._batch = []
+        self._file_index = 0
+        self._raw_file = None
+        self._compressed_file = None
+        self._text_file = None
+        self._csv_writer = None
+        self._file_open_time = None
+        self._last_fsync_time = None
+        self.paths = []
+        self.post_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, post):
+        self._batch.append(post)
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes buffered posts, rotating the file first if it is due
+        """
+        if not self._batch:
+            return
+
+        if self._text_file is None or self._should_rotate():
+            self._close_file()
+            self._open_file()
+
+        if self._csv_writer:
+            self._csv_writer.writerows(post.to_dict() for post in self._batch)
+        else:
+            self._text_file.writelines(json.dumps(post.to_dict(), ensure_ascii=False) + '\n' for post in self._batch)
+        self._text_file.flush()
+        self.post_count += len(self._batch)
+        self._batch = []
+
+        if time.monotonic() - self._last_fsync_time >= self._fsync_interval:
+            self._fsync()
+
+    def export(self, posts):
+        """
+        Writes all posts of a stream, buffered posts are written even if the stream fails
+
+        Args:
+            posts (iterable): Stream of NinegagPost, f.e. NinegagSeleniumBrowser.scan_section()
+
+        Returns:
+            int: Number of posts written
+        """
+        post_count_before = self.post_count
+        try:
+            for post in posts:
+                self.write(post)
+        finally:
+            self.flush()
+        return self.post_count - post_count_before
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+    def _should_rotate(self):
+        if self._rotate_seconds is not None and time.monotonic() - self._file_open_time >= self._rotate_seconds:
+            return True
+        if self._rotate_bytes is not None and self._raw_file.tell() >= self._rotate_bytes:
+            return True
+        return False
+
+    def _open_file(self):
+        timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        file_name = (f'{self._prefix}-{timestamp}-{self._file_index:05d}.{self._export_format}'
+                     f'{_COMPRESSION_EXTENSIONS[self._compression]}')
+        path = os.path.join(self._directory, file_name)
+        self._file_index += 1
+
+        self._raw_file = open(path, 'wb')
+        if self._compression == 'gzip':
+            self._compressed_file = gzip.GzipFile(fileobj=self._raw_file, mode='wb')
+        elif self._compression == 'zstd':
+            self._compressed_file = zstandard.ZstdCompressor().stream_writer(self._raw_file, closefd=False)
+        else:
+            self._compressed_file = None
+
+        self._text_file = io.TextIOWrapper(self._compressed_file or self._raw_file, encoding='utf-8', newline='')
+        if self._export_format == 'csv':
+            self._csv_writer = csv.DictWriter(self._text_file, CSV_FIELDS)
+            self._csv_writer.writeheader()
+
+        self._file_open_time = self._last_fsync_time = time.monotonic()
+        self.paths.append(path)
+
+    def _fsync(self):
+        if self._compressed_file is not None:
+            # Ends the current compressed block, so everything written so far can be decompressed
+            if self._compression == 'zstd':
+                self._compressed_file.flush(zstandard.FLUSH_BLOCK)
+            else:
+                self._compressed_file.flush()
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        self._last_fsync_time = time.monotonic()
+
+    def _close_file(self):
+        if self._text_file is None:
+            return
+
+        self._text_file.flush()
+        self._text_file.detach()  # The underlying streams are closed in order below
+        if self._compressed_file is not None:
+            self._compressed_file.close()
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        self._raw_file.close()
+
+        self._raw_file = self._compressed_file = self._text_file = self._csv_writer = None
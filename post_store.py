@@ -0,0 +1,271 @@
+import contextlib
+import datetime
+import sqlite3
+
+from ninegag_post import NinegagPost
+
+DEFAULT_DB_PATH = 'posts.db'
+BATCH_SIZE = 500  # Posts per transaction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id TEXT PRIMARY KEY,
+    post_type TEXT,
+    section TEXT,
+    title TEXT,
+    publish_time TEXT  -- ISO format in UTC, so it sorts chronologically
+);
+CREATE INDEX IF NOT EXISTS posts_section ON posts (section);
+CREATE INDEX IF NOT EXISTS posts_publish_time ON posts (publish_time);
+
+CREATE TABLE IF NOT EXISTS vote_snapshots (
+    post_id TEXT NOT NULL REFERENCES posts (post_id),
+    fetch_time TEXT NOT NULL,
+    upvotes INTEGER,
+    downvotes INTEGER,
+    comment_count INTEGER,
+    PRIMARY KEY (post_id, fetch_time)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id TEXT PRIMARY KEY,
+    post_id TEXT NOT NULL REFERENCES posts (post_id),
+    parent_id TEXT REFERENCES comments (comment_id),
+    level INTEGER,
+    author TEXT,
+    text TEXT,
+    upvotes INTEGER,
+    downvotes INTEGER,
+    reply_count INTEGER,
+    publish_time TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_post_id ON comments (post_id);
+"""
+
+_INSERT_POST = """
+INSERT INTO posts (post_id, post_type, section, title, publish_time) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (post_id) DO NOTHING
+"""
+
+_UPSERT_SNAPSHOT = """
+INSERT INTO vote_snapshots (post_id, fetch_time, upvotes, downvotes, comment_count) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (post_id, fetch_time) DO UPDATE SET
+    upvotes = excluded.upvotes, downvotes = excluded.downvotes, comment_count = excluded.comment_count
+"""
+
+_UPSERT_COMMENT = """
+INSERT INTO comments (comment_id, post_id, parent_id, level, author, text, upvotes, downvotes, reply_count,
+                      publish_time)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (comment_id) DO UPDATE SET
+    text = excluded.text, upvotes = excluded.upvotes, downvotes = excluded.downvotes,
+    reply_count = excluded.reply_count
+"""
+
+_SELECT_LATEST_POST = """
+SELECT posts.post_id, post_type, section, title, publish_time, fetch_time, upvotes, downvotes, comment_count
+FROM posts LEFT JOIN vote_snapshots ON vote_snapshots.post_id = posts.post_id
+WHERE posts.post_id = ?
+ORDER BY fetch_time DESC LIMIT 1
+"""
+
+_SELECT_LATEST_POSTS = """
+SELECT posts.post_id, post_type, section, title, publish_time, fetch_time, upvotes, downvotes, comment_count
+FROM posts LEFT JOIN vote_snapshots ON vote_snapshots.post_id = posts.post_id AND fetch_time = (
+    SELECT MAX(fetch_time) FROM vote_snapshots AS latest_snapshots WHERE latest_snapshots.post_id = posts.post_id)
+WHERE (:section IS NULL OR section = :section) AND (:published_after IS NULL OR publish_time >= :published_after)
+ORDER BY publish_time
+"""
+
+
+def _time_to_db(value):
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.isoformat()
+
+
+def _time_from_db(value):
+    return datetime.datetime.fromisoformat(value) if value is not None else None
+
+
+class PostStore(contextlib.AbstractContextManager):
+    """
+    SQLite storage of posts keyed by post id, with a snapshot of votes per fetch
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        """
+        Args:
+            path (str): Database file, created if it does not exist
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode = WAL')  # Readers do not block the writing scan
+        self._connection.execute('PRAGMA synchronous = NORMAL')  # Durable enough in WAL mode, much faster
+        self._connection.executescript(_SCHEMA)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_posts(self, posts):
+        """
+        Stores posts in a single transaction. Posts that are already stored only get a new vote snapshot
+        (or an updated one, if they were fetched at the same time)
+
+        Args:
+            posts (iterable): NinegagPost objects, may be a generator
+
+        Returns:
+            int: Number of new posts
+        """
+        posts = list(posts)  # Read twice, once for the posts and once for their snapshots
+        with self._connection:
+            changes_before = self._connection.total_changes
+            self._connection.executemany(_INSERT_POST, (
+                (post.post_id, post.post_type, post.section, post.title, _time_to_db(post.publish_time))
+                for post in posts))
+            new_posts = self._connection.total_changes - changes_before
+
+            self._connection.executemany(_UPSERT_SNAPSHOT, (
+                (post.post_id, _time_to_db(post.fetch_time), post.upvotes, post.downvotes, post.comment_count)
+                for post in posts if post.fetch_time is not None))
+
+        return new_posts
+
+    def has_post(self, post_id: str):
+        return self._connection.execute('SELECT 1 FROM posts WHERE post_id = ?', (post_id,)).fetchone() is not None
+
+    def get_post(self, post_id: str):
+        """
+        Args:
+            post_id (str):
+
+        Returns:
+            NinegagPost: The post with its latest vote snapshot, None if it is not stored
+        """
+        row = self._connection.execute(_SELECT_LATEST_POST, (post_id,)).fetchone()
+        return _post_from_row(row) if row is not None else None
+
+    def iter_posts(self, section: str = None, published_after: datetime.datetime = None):
+        """
+        Args:
+            section (str): Section to read posts of, by default reads all sections
+            published_after (datetime.datetime): Reads only posts published since, by default reads all posts
+
+        Yields:
+            NinegagPost: Each post with its latest vote snapshot, in order of publish time
+        """
+        yield from map(_post_from_row, self._connection.execute(
+            _SELECT_LATEST_POSTS, {'section': section, 'published_after': _time_to_db(published_after)}))
+
+    def count_posts(self, section: str = None):
+        if section is None:
+            return self._connection.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+        return self._connection.execute('SELECT COUNT(*) FROM posts WHERE section = ?', (section,)).fetchone()[0]
+
+    def add_comments(self, comments):
+        """
+        Stores comments in a single transaction. Comments that are already stored get their text and votes updated
+
+        Args:
+            comments (list[NinegagComment]):
+
+        Returns:
+            int: Number of new comments
+        """
+        with self._connection:
+            # Updates count as changes too, but only new comments get rowids past the current last one
+            last_rowid = self._connection.execute('SELECT COALESCE(MAX(rowid), 0) FROM comments').fetchone()[0]
+            self._connection.executemany(_UPSERT_COMMENT, (
+                (comment.comment_id, comment.post_id, comment.parent_id, comment.level, comment.author, comment.text,
+                 comment.upvotes, comment.downvotes, comment.reply_count, _time_to_db(comment.publish_time))
+                for comment in comments))
+            return self._connection.execute('SELECT COUNT(*) FROM comments WHERE rowid > ?',
+                                            (last_rowid,)).fetchone()[0]
+
+    def count_comments(self, post_id: str = None):
+        if post_id is None:
+            return self._connection.execute('SELECT COUNT(*) FROM comments').fetchone()[0]
+        return self._connection.execute('SELECT COUNT(*) FROM comments WHERE post_id = ?', (post_id,)).fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+def _post_from_row(row):
+    post_id, post_type, section, title, publish_time, fetch_time, upvotes, downvotes, comment_count = row
+    return NinegagPost(post_id=post_id,
+                       post_type=post_type,
+                       section=section,
+                       title=title,
+                       upvotes=upvotes,
+                       downvotes=downvotes,
+                       comment_count=comment_count,
+                       publish_time=_time_from_db(publish_time),
+                       fetch_time=_time_from_db(fetch_time))
+
+
+class _BatchSink:
+    """
+    Consumes a stream of items into a PostStore in batched transactions, counting all items written and the new ones
+    """
+
+    def __init__(self, post_store: PostStore, batch_size: int = BATCH_SIZE):
+        self._post_store = post_store
+        self._batch_size = batch_size
+        self._batch = []
+        self.item_count = 0
+        self.new_item_count = 0
+
+    def write(self, item):
+        self._batch.append(item)
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            self.new_item_count += self._add(self._batch)
+            self.item_count += len(self._batch)
+            self._batch = []
+
+    def _add(self, batch):
+        raise NotImplementedError
+
+    def consume(self, items):
+        """
+        Stores all items of a stream, the last partial batch is stored even if the stream fails
+
+        Args:
+            items (iterable): Stream of items
+
+        Returns:
+            int: Number of new items
+        """
+        new_item_count_before = self.new_item_count
+        try:
+            for item in items:
+                self.write(item)
+        finally:
+            self.flush()
+        return self.new_item_count - new_item_count_before
+
+
+class PostSink(_BatchSink):
+    """
+    Consumes a stream of posts (such as the generator of NinegagSeleniumBrowser.scan_section()) into a PostStore,
+    in batched transactions
+    """
+
+    def _add(self, batch):
+        return self._post_store.add_posts(batch)
+
+
+class CommentSink(_BatchSink):
+    """
+    Consumes a stream of comments (such as the generator of CommentHarvester.iter_comments()) into a PostStore,
+    in batched transactions
+    """
+
+    def _add(self, batch):
+        return self._post_store.add_comments(batch)
@@ -0,0 +1,124 @@
+import asyncio
+import collections
+import threading
+import time
+import urllib.parse
+
+from utils import random_delay
+
+DEFAULT_BURST = 1  # Requests that may be sent back to back after an idle period
+
+
+class RateScheduler:
+    """
+    Hands out send-slots per key (usually a host), spaced by the random delays of utils.random_delay()
+    Notes:
+        * One scheduler can be shared by browsers, threads and async tasks
+        * A slot is reserved at once and only its remaining time is waited, so work done between requests overlaps the
+          delay instead of adding to it
+    """
+
+    def __init__(self, burst: int = DEFAULT_BURST):
+        """
+        Args:
+            burst (int): Number of slots that accumulate while a key is idle, like tokens in a token bucket
+        """
+        self._burst = burst
+        self._next_slots = {}
+        self._request_counts = collections.Counter()
+        self._waited_seconds = collections.Counter()
+        self._lock = threading.Lock()
+
+    def reserve(self, key, seconds, scale=None, min_value=None):
+        """
+        Reserves the next send-slot of a key. For more details on the delay arguments see utils.random_wait()
+
+        Args:
+            key (str): Host or session to space requests of
+            seconds (float): Average delay between requests
+            scale (float):
+            min_value (float):
+
+        Returns:
+            float: Seconds to wait until the slot
+        """
+        delay = random_delay(seconds, scale, min_value)  # Drawn before the clock is read, its first call imports numpy
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slots.get(key, float('-inf')), now - (self._burst - 1) * seconds)
+            self._next_slots[key] = slot + delay
+
+            seconds_to_wait = max(slot - now, 0)
+            self._request_counts[key] += 1
+            self._waited_seconds[key] += seconds_to_wait
+            return seconds_to_wait
+
+    def wait(self, key, seconds, scale=None, min_value=None):
+        """
+        Reserves a slot and sleeps until it. For more details on arguments see reserve()
+
+        Returns:
+            float: Seconds waited
+        """
+        seconds_to_wait = self.reserve(key, seconds, scale, min_value)
+        time.sleep(seconds_to_wait)
+        return seconds_to_wait
+
+    async def async_wait(self, key, seconds, scale=None, min_value=None):
+        """
+        Reserves a slot and sleeps until it without blocking the event loop. For more details on arguments see reserve()
+
+        Returns:
+            float: Seconds waited
+        """
+        seconds_to_wait = self.reserve(key, seconds, scale, min_value)
+        await asyncio.sleep(seconds_to_wait)
+        return seconds_to_wait
+
+    def stats(self):
+        """
+        Returns:
+            dict: Maps each key to its number of requests and total seconds spent waiting for slots
+        """
+        with self._lock:
+            return {key: {'requests': count, 'waited_seconds': self._waited_seconds[key]}
+                    for key, count in self._request_counts.items()}
+
+    @property
+    def waited_seconds(self):
+        """
+        Returns:
+            float: Total seconds spent waiting for slots, of all keys
+        """
+        with self._lock:
+            return sum(self._waited_seconds.values())
+
+
+def rate_key(url, base_url=None):
+    """
+    Args:
+        url (str): Requested url
+        base_url (str): Url that relative urls are resolved against, f.e. the current host of a browser
+
+    Returns:
+        str: The key a request to `url` is scheduled under, the host of the url
+    """
+    if base_url:
+        url = urllib.parse.urljoin(base_url, url)
+    return urllib.parse.urlparse(url).netloc or None
+
+
+_shared_rate_scheduler = None
+_shared_rate_scheduler_lock = threading.Lock()
+
+
+def get_shared_rate_scheduler():
+    """
+    Returns:
+        RateScheduler: Process-wide scheduler, used by browsers that were not given one explicitly
+    """
+    global _shared_rate_scheduler
+    with _shared_rate_scheduler_lock:
+        if _shared_rate_scheduler is None:
+            _shared_rate_scheduler = RateScheduler()
+        return _shared_rate_scheduler
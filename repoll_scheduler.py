@@ -0,0 +1,172 @@
+import collections
+import datetime
+import heapq
+import itertools
+import logging
+import time
+
+from const import NINEGAG_POST_URL_TEMPLATE
+
+MIN_POLL_INTERVAL = 60  # Seconds
+MAX_POLL_INTERVAL = 24 * 60 * 60  # Seconds
+AGE_INTERVAL_FACTOR = 0.1  # A post is polled at least once in every tenth of its age
+TARGET_CHANGE_PER_POLL = 50  # Fast moving posts are polled about once in this many votes and comments
+MAX_POST_AGE = 7 * 24 * 60 * 60  # Seconds, older posts are no longer tracked
+REQUEST_BUDGET = 600  # Polls per hour, for all posts together
+MAX_FAILED_POLLS = 3  # Consecutive failures before a post is no longer tracked
+
+# Change of a post since its previous snapshot
+PostSnapshotDelta = collections.namedtuple('PostSnapshotDelta', ['post_id', 'fetch_time', 'upvotes', 'downvotes',
+                                                                 'comment_count', 'elapsed'])
+
+
+class _TrackedPost:
+    __slots__ = ('post', 'failed_polls')
+
+    def __init__(self, post):
+        self.post = post
+        self.failed_polls = 0
+
+
+class RepollScheduler:
+    """
+    Re-visits known posts to track their votes over time. Young and fast moving posts are polled often, stale ones
+    are backed off and eventually dropped, all within a global request budget
+    """
+
+    def __init__(self,
+                 fetch_post,
+                 request_budget: float = REQUEST_BUDGET,
+                 min_interval: float = MIN_POLL_INTERVAL,
+                 max_interval: float = MAX_POLL_INTERVAL,
+                 max_age: float = MAX_POST_AGE,
+                 clock=time.time,
+                 sleep=time.sleep):
+        """
+        Args:
+            fetch_post (callable): Gets a post url and returns its current NinegagPost, f.e. using NinegagBrowser
+            request_budget (float): Maximal polls per hour
+            min_interval (float): Minimal seconds between polls of a post
+            max_interval (float): Maximal seconds between polls of a post
+            max_age (float): Posts older than this (seconds) are no longer tracked
+            clock (callable): Returns current time in seconds since the epoch
+            sleep (callable): Sleeps for the given seconds
+        """
+        self._fetch_post = fetch_post
+        self._budget_interval = 60 * 60 / request_budget
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._max_age = max_age
+        self._clock = clock
+        self._sleep = sleep
+
+        self._tracked_posts = {}
+        self._queue = []  # Heap of (due time, sequence, post id)
+        self._sequence = itertools.count()  # Breaks ties, so post ids are never compared
+        self._next_poll_time = float('-inf')
+
+    def __len__(self):
+        return len(self._tracked_posts)
+
+    def track(self, post):
+        """
+        Starts tracking a post, whose first snapshot is the given post. Tracked posts are updated instead
+        Args:
+            post (NinegagPost): Scanned post, with publish and fetch times. Raises ValueError if either is missing
+        """
+        if post.publish_time is None or post.fetch_time is None:
+            raise ValueError(f'Post {post.post_id} cannot be tracked without publish and fetch times')
+
+        if post.post_id in self._tracked_posts:
+            self._tracked_posts[post.post_id].post = post
+            return
+
+        self._tracked_posts[post.post_id] = _TrackedPost(post)
+        self._schedule(post.post_id, self._interval(post))
+
+    def run(self, max_polls: int = None):
+        """
+        Polls tracked posts as they become due, sleeping in between
+
+        Args:
+            max_polls (int): Number of polls to perform, by default runs while there are tracked posts
+
+        Yields:
+            PostSnapshotDelta: Change of a post since its previous snapshot
+        """
+        for _ in itertools.count() if max_polls is None else range(max_polls):
+            if not self._queue:
+                return
+
+            due_time = self._queue[0][0]
+            now = self._clock()
+            poll_time = max(due_time, self._next_poll_time)
+            if poll_time > now:
+                self._sleep(poll_time - now)
+
+            delta = self.poll_next()
+            if delta is not None:
+                yield delta
+
+    def poll_next(self):
+        """
+        Polls the post that is due first, regardless of the time
+
+        Returns:
+            PostSnapshotDelta: Change of the post since its previous snapshot, None if it could not be fetched or is
+                               no longer tracked
+        """
+        _, _, post_id = heapq.heappop(self._queue)
+        tracked_post = self._tracked_posts[post_id]
+        previous_post = tracked_post.post
+        self._next_poll_time = self._clock() + self._budget_interval
+
+        try:
+            post = self._fetch_post(NINEGAG_POST_URL_TEMPLATE.format(post_id=post_id))
+        except Exception as e:
+            tracked_post.failed_polls += 1
+            logging.warning(f'Failed to poll post {post_id} ({tracked_post.failed_polls} times): {e}')
+            if tracked_post.failed_polls >= MAX_FAILED_POLLS:
+                del self._tracked_posts[post_id]
+            else:
+                self._schedule(post_id, self._interval(previous_post) * 2 ** tracked_post.failed_polls)
+            return None
+
+        # Fetched posts may lack what is known from the first scan
+        post.publish_time = post.publish_time or previous_post.publish_time
+        post.fetch_time = post.fetch_time or datetime.datetime.fromtimestamp(self._clock())
+        tracked_post.post = post
+        tracked_post.failed_polls = 0
+
+        if self._age(post) > self._max_age:
+            del self._tracked_posts[post_id]
+        else:
+            self._schedule(post_id, self._interval(post, previous_post))
+
+        return PostSnapshotDelta(post_id=post_id,
+                                 fetch_time=post.fetch_time,
+                                 upvotes=post.upvotes - previous_post.upvotes,
+                                 downvotes=post.downvotes - previous_post.downvotes,
+                                 comment_count=post.comment_count - previous_post.comment_count,
+                                 elapsed=post.fetch_time.timestamp() - previous_post.fetch_time.timestamp())
+
+    def _schedule(self, post_id, interval):
+        heapq.heappush(self._queue, (self._clock() + interval, next(self._sequence), post_id))
+
+    def _age(self, post):
+        return self._clock() - post.publish_time.timestamp()
+
+    def _interval(self, post, previous_post=None):
+        """
+        Seconds until a post's next poll, a fraction of its age, shortened if its votes or comments move fast
+        """
+        interval = self._age(post) * AGE_INTERVAL_FACTOR
+
+        if previous_post is not None:
+            elapsed = post.fetch_time.timestamp() - previous_post.fetch_time.timestamp()
+            change = (abs(post.upvotes - previous_post.upvotes) + abs(post.downvotes - previous_post.downvotes) +
+                      abs(post.comment_count - previous_post.comment_count))
+            if elapsed > 0 and change:
+                interval = min(interval, TARGET_CHANGE_PER_POLL * elapsed / change)
+
+        return min(max(interval, self._min_interval), self._max_interval)
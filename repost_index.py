@@ -0,0 +1,258 @@
+import contextlib
+import itertools
+import logging
+import sqlite3
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # Images can only be decoded with Pillow installed, hashes of decoded images are computed without it
+
+DEFAULT_DB_PATH = 'reposts.db'
+HASH_SIZE = 8  # Hashes are of HASH_SIZE x HASH_SIZE brightness gradients, 64 bits
+MAX_DISTANCE = 6  # Bits, images whose hashes differ by up to this many bits are considered the same image
+CHUNK_COUNT = 4  # Hashes are indexed by this many 16-bit chunks, see RepostIndex
+BATCH_SIZE = 64  # Images hashed and looked up at a time
+
+_CHUNK_BITS = HASH_SIZE * HASH_SIZE // CHUNK_COUNT
+_CHUNK_COLUMNS = tuple(f'chunk{i}' for i in range(CHUNK_COUNT))
+_POPCOUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS image_hashes (
+    post_id TEXT PRIMARY KEY,
+    hash INTEGER NOT NULL,  -- Signed, as SQLite integers are
+    repost_of TEXT,  -- First post of the image, NULL for first posts
+    {', '.join(f'{column} INTEGER NOT NULL' for column in _CHUNK_COLUMNS)}
+);
+{''.join(f'CREATE INDEX IF NOT EXISTS image_hashes_{column} ON image_hashes ({column});' for column in _CHUNK_COLUMNS)}
+"""
+
+_INSERT_HASH = f"""
+INSERT INTO image_hashes (post_id, hash, repost_of, {', '.join(_CHUNK_COLUMNS)})
+VALUES (?, ?, ?, {', '.join('?' * CHUNK_COUNT)})
+"""
+
+
+def thumbnail(gray, height: int = HASH_SIZE, width: int = HASH_SIZE + 1):
+    """
+    Shrinks a grayscale image by averaging the pixels of each cell, for images that were decoded without Pillow
+
+    Args:
+        gray (np.ndarray): 2D array of brightness values
+        height (int):
+        width (int):
+
+    Returns:
+        np.ndarray: height x width array of average brightness
+    """
+    gray = np.asarray(gray, dtype=np.float64)
+    # Cell sums out of an integral image, so all cells are computed at once. Cells of images smaller than the
+    # thumbnail overlap instead of being empty
+    integral = np.zeros((gray.shape[0] + 1, gray.shape[1] + 1))
+    integral[1:, 1:] = gray.cumsum(axis=0).cumsum(axis=1)
+    row_starts, row_ends = _cell_edges(gray.shape[0], height)
+    column_starts, column_ends = _cell_edges(gray.shape[1], width)
+
+    sums = (integral[np.ix_(row_ends, column_ends)] - integral[np.ix_(row_starts, column_ends)] -
+            integral[np.ix_(row_ends, column_starts)] + integral[np.ix_(row_starts, column_starts)])
+    return sums / np.outer(row_ends - row_starts, column_ends - column_starts)
+
+
+def _cell_edges(length, cell_count):
+    starts = np.arange(cell_count) * length // cell_count
+    ends = np.maximum(-(-(np.arange(1, cell_count + 1) * length) // cell_count), starts + 1)
+    return starts, ends
+
+
+def load_thumbnail(path: str):
+    """
+    Decodes an image into its hashing thumbnail, requires Pillow
+
+    Args:
+        path (str): Image file, in any format Pillow reads
+
+    Returns:
+        np.ndarray: HASH_SIZE x (HASH_SIZE + 1) array of brightness
+    """
+    if Image is None:
+        raise ImportError('Decoding images requires Pillow')
+    with Image.open(path) as image:
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # JPEGs are decoded at a fraction of their size
+        return np.asarray(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX), dtype=np.float64)
+
+
+def dhash_batch(thumbnails):
+    """
+    Computes difference hashes: a bit per pair of horizontally adjacent cells, set if the right one is brighter.
+    Hashes survive rescaling, recompression and small edits, such as the watermarks added by reposting
+
+    Args:
+        thumbnails (np.ndarray): n x HASH_SIZE x (HASH_SIZE + 1) array, see thumbnail() and load_thumbnail()
+
+    Returns:
+        np.ndarray: n uint64 hashes
+    """
+    thumbnails = np.asarray(thumbnails)
+    bits = (thumbnails[:, :, 1:] > thumbnails[:, :, :-1]).reshape(len(thumbnails), -1)
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def dhash(gray):
+    """
+    Returns:
+        int: Difference hash of a grayscale image, see dhash_batch()
+    """
+    return int(dhash_batch(thumbnail(gray)[np.newaxis])[0])
+
+
+def hamming_distances(image_hash, hashes):
+    """
+    Returns:
+        np.ndarray: Number of bits that differ between a hash and each of the hashes
+    """
+    xors = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(image_hash))
+    return _POPCOUNTS[xors.view(np.uint8)].reshape(len(xors), -1).sum(axis=1)
+
+
+class RepostIndex(contextlib.AbstractContextManager):
+    """
+    SQLite index of image hashes of posts, that finds the earlier posts of an image (reposts across sections, or
+    across time) by Hamming distance between hashes
+    Notes:
+        * Lookups use multi-index hashing: hashes are split into chunks that are indexed separately. Hashes within
+          MAX_DISTANCE bits of each other have at least one chunk within MAX_DISTANCE // CHUNK_COUNT bits, so only
+          hashes sharing a chunk with one of the few variants of the looked up chunks are compared. This keeps
+          lookups at a few milliseconds with millions of indexed hashes, instead of comparing with all of them
+        * Reposts of reposts link to the first post of the image
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_distance: int = MAX_DISTANCE):
+        """
+        Args:
+            path (str): Database file, created if it does not exist. May be the database of a PostStore
+            max_distance (int): Bits by which hashes of the same image may differ
+        """
+        self._max_distance = max_distance
+        self._chunk_variant_masks = [sum(1 << bit for bit in bits)
+                                     for distance in range(max_distance // CHUNK_COUNT + 1)
+                                     for bits in itertools.combinations(range(_CHUNK_BITS), distance)]
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def lookup(self, image_hash: int):
+        """
+        Args:
+            image_hash (int): Hash of an image, see dhash_batch()
+
+        Returns:
+            list: (post id, distance, repost_of) of every indexed post of the image, closest first
+        """
+        chunks = _chunks(image_hash)
+        variants = [[chunk ^ mask for mask in self._chunk_variant_masks] for chunk in chunks]
+        where = ' OR '.join(f'{column} IN ({", ".join("?" * len(self._chunk_variant_masks))})'
+                            for column in _CHUNK_COLUMNS)
+        rows = self._connection.execute(f'SELECT post_id, hash, repost_of FROM image_hashes WHERE {where}',
+                                        [variant for chunk_variants in variants for variant in chunk_variants]
+                                        ).fetchall()
+        if not rows:
+            return []
+
+        distances = hamming_distances(image_hash, np.array([row[1] for row in rows], dtype=np.int64).view(np.uint64))
+        matches = [(post_id, int(distance), repost_of)
+                   for (post_id, _, repost_of), distance in zip(rows, distances) if distance <= self._max_distance]
+        return sorted(matches, key=lambda match: match[1])
+
+    def add(self, post, image_hash: int):
+        """
+        Indexes the image of a post, and links the post to the first post of the image if it is a repost.
+        Posts that are already indexed keep their link
+
+        Args:
+            post (NinegagPost):
+            image_hash (int): Hash of the post's image, see dhash_batch()
+
+        Returns:
+            str: Id of the first post of the image, None if the post is the first one
+        """
+        with self._connection:
+            return self._add(post, image_hash)
+
+    def add_many(self, posts, image_hashes):
+        """
+        Indexes posts in a single transaction, see add(). Posts of the batch are matched with each other too, in order
+        """
+        with self._connection:
+            return [self._add(post, image_hash) for post, image_hash in zip(posts, image_hashes)]
+
+    def link_reposts(self, downloads, batch_size: int = BATCH_SIZE):
+        """
+        Hashes downloaded images of posts in batches, and indexes them. Posts whose media cannot be decoded (f.e.
+        videos) are passed on without a link. Requires Pillow, which is checked before any download is consumed
+
+        Args:
+            downloads (iterable): (NinegagPost, MediaFile) tuples, such as MediaDownloader.download_posts() yields
+            batch_size (int): Images hashed and indexed at a time
+
+        Yields:
+            NinegagPost: Each post, with `repost_of` set if it is a repost
+        """
+        if Image is None:
+            raise ImportError('Linking reposts requires Pillow, to decode downloaded images')
+
+        downloads = iter(downloads)
+        while True:
+            batch = list(itertools.islice(downloads, batch_size))
+            if not batch:
+                return
+
+            hashed_posts = []
+            thumbnails = []
+            for post, media_file in batch:
+                try:
+                    thumbnails.append(load_thumbnail(media_file.path))
+                except (OSError, ValueError) as e:  # Not an image, or one Pillow cannot decode
+                    logging.debug(f'Not hashing media of {post}: {e!r}')
+                    continue
+                hashed_posts.append(post)
+            if thumbnails:
+                self.add_many(hashed_posts, dhash_batch(np.stack(thumbnails)))
+
+            for post, _ in batch:
+                yield post
+
+    def count(self):
+        return self._connection.execute('SELECT COUNT(*) FROM image_hashes').fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    def _add(self, post, image_hash):
+        image_hash = int(image_hash)
+        row = self._connection.execute('SELECT repost_of FROM image_hashes WHERE post_id = ?',
+                                       (post.post_id,)).fetchone()
+        if row is not None:
+            post.repost_of = row[0]
+            return post.repost_of
+
+        matches = self.lookup(image_hash)
+        post.repost_of = (matches[0][2] or matches[0][0]) if matches else None
+        self._connection.execute(_INSERT_HASH, (post.post_id, _to_signed(image_hash), post.repost_of,
+                                                *_chunks(image_hash)))
+        return post.repost_of
+
+
+def _chunks(image_hash):
+    mask = (1 << _CHUNK_BITS) - 1
+    return [(image_hash >> (i * _CHUNK_BITS)) & mask for i in range(CHUNK_COUNT)]
+
+
+def _to_signed(image_hash):
+    return image_hash - (1 << 64) if image_hash >= 1 << 63 else image_hash
@@ -1,36 +1,145 @@
+import collections
+import time
+
 from selenium import webdriver
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
+from adaptive_wait import get_shared_waiter
 from basic_browser import BasicBrowser
 from exceptions import NoSuchElement
 
 MAX_DELAY = 7  # Seconds
+HEADLESS_WINDOW_SIZE = (1920, 1080)  # 9GAG hides the section menu in narrow windows
+PAGE_STATS_HISTORY = 1000  # Recorded pages kept per browser
+
+# Firefox preferences of lean browsing, scrapes only need the DOM
+LEAN_FIREFOX_PREFERENCES = {
+    'permissions.default.image': 2,  # Block images
+    'media.autoplay.default': 5,  # Block audio and video autoplay
+    'media.autoplay.blocking_policy': 2,
+    'media.preload.default': 0,  # Do not preload video
+    'media.preload.auto': 0,
+    # Firefox cannot block all 3rd-party scripts through preferences, tracking protection blocks ads and analytics
+    'privacy.trackingprotection.enabled': True,
+    'privacy.trackingprotection.socialtracking.enabled': True,
+    'privacy.trackingprotection.cryptomining.enabled': True,
+    'privacy.trackingprotection.fingerprinting.enabled': True,
+    'network.cookie.cookieBehavior': 1,  # Block 3rd-party cookies
+}
+
+# Sums bytes transferred since the last call and clears resource timings, which otherwise stop being recorded once
+# their buffer is full
+PAGE_STATS_SCRIPT = """
+const includeNavigation = arguments[0];
+const [navigation] = performance.getEntriesByType('navigation');
+let transferredBytes = includeNavigation && navigation ? navigation.transferSize : 0;
+for (const resource of performance.getEntriesByType('resource')) {
+    transferredBytes += resource.transferSize;
+}
+performance.clearResourceTimings();
+return transferredBytes;
+"""
+
+PageStats = collections.namedtuple('PageStats', ['url', 'transferred_bytes', 'load_time'])
+
+
+def lean_firefox_options(options=None):
+    """
+    Sets up Firefox to block media and trackers, and to not wait for subresources when loading pages
+    Notes:
+        * Transferred bytes of cross-origin resources are reported only if they allow it (Timing-Allow-Origin)
+
+    Args:
+        options (FirefoxOptions): Options to update, by default creates new ones
+
+    Returns:
+        FirefoxOptions:
+    """
+    options = options or FirefoxOptions()
+    for name, value in LEAN_FIREFOX_PREFERENCES.items():
+        options.set_preference(name, value)
+    options.page_load_strategy = 'eager'  # Returns once the DOM is ready, without waiting for images and frames
+    return options
+
+
+def headless_firefox_options(options=None):
+    """
+    Sets up Firefox to run without a window, in a window size that shows the section menu
+
+    Args:
+        options (FirefoxOptions): Options to update, by default creates new ones
+
+    Returns:
+        FirefoxOptions:
+    """
+    options = options or FirefoxOptions()
+    options.add_argument('-headless')
+    options.add_argument(f'-width={HEADLESS_WINDOW_SIZE[0]}')
+    options.add_argument(f'-height={HEADLESS_WINDOW_SIZE[1]}')
+    return options
 
 
 class SeleniumBrowser(BasicBrowser):
 
-    def __init__(self, **options):
-        super().__init__()
+    max_delay = MAX_DELAY  # Maximal wait for elements to render
+
+    def __init__(self, rate_scheduler=None, instrumentation=None, waiter=None, **options):
+        """
+        Args:
+            rate_scheduler (rate_scheduler.RateScheduler): See BasicBrowser
+            instrumentation (instrumentation.Instrumentation): See BasicBrowser
+            waiter (adaptive_wait.AdaptiveWaiter): Waits for elements to render. By default, uses the process-wide
+                                                   shared waiter
+            **options: See _start()
+        """
+        super().__init__(rate_scheduler, instrumentation)
+        self._waiter = waiter or get_shared_waiter()
         self._start(**options)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._quit()
 
-    def _start(self, **options):
+    def _start(self, lean: bool = False, record_page_stats: bool = None, **options):
         """
         Opens a new WebDriver instance
+        Args:
+            lean (bool): Whether to browse without media and trackers, see lean_firefox_options()
+            record_page_stats (bool): Whether to record transferred bytes and load time of each page in `page_stats`.
+                                      By default, records only when browsing lean
+            **options: Passed to the WebDriver
         """
+        if lean:
+            options['options'] = lean_firefox_options(options.get('options'))
+
         self._driver = webdriver.Firefox(**options)
         self._driver.maximize_window()
+        self.page_loads = 0  # Lets owners of long-lived browsers decide when to recycle them
+        self._record_page_stats = lean if record_page_stats is None else record_page_stats
+        self.page_stats = collections.deque(maxlen=PAGE_STATS_HISTORY)
 
     def _quit(self):
         self._driver.quit()
 
     def _non_delayed_get(self, url):
-        self._driver.get(url)
+        start_time = time.perf_counter()
+        with self._timer('fetch'):
+            self._driver.get(url)
+        self.page_loads += 1
+        if self._record_page_stats:
+            self._add_page_stats(time.perf_counter() - start_time, full_load=True)
+
+    def _add_page_stats(self, load_time, full_load):
+        """
+        Records stats of the page that was just loaded
+        Args:
+            load_time (float): Seconds it took the page to load
+            full_load (bool): Whether the whole document was loaded, rather than updated in place by the site
+        """
+        transferred_bytes = self._driver.execute_script(PAGE_STATS_SCRIPT, full_load)
+        self.page_stats.append(PageStats(self._driver.current_url, transferred_bytes, load_time))
 
     def _find_element_by_xpath(self, xpath):
         try:
@@ -60,8 +169,7 @@ class SeleniumBrowser(BasicBrowser):
             list[WebElement]
         """
         try:
-            WebDriverWait(self._driver, MAX_DELAY).until(
-                EC.presence_of_element_located((By.XPATH, xpath)))
+            self._wait_until(xpath)
             return self._find_elements_by_xpath(xpath)
         except TimeoutException:
             return []
@@ -71,3 +179,20 @@ class SeleniumBrowser(BasicBrowser):
         if not elements:
             raise NoSuchElement(f'Could not find element "{xpath}"')
         return elements[0]
+
+    def _wait_until(self, xpath, optional=False, min_timeout=None):
+        """
+        Waits for an element to render, raises TimeoutException if it does not. See AdaptiveWaiter.until()
+
+        Args:
+            xpath (str):
+            optional (bool): Whether the element is allowed not to render, so it is waited for only as long as it
+                             usually takes
+            min_timeout (float): Seconds an optional element is waited for at least
+
+        Returns:
+            WebElement: First element of the xpath
+        """
+        with self._timer('render_wait'):
+            return self._waiter.until(self._driver, EC.presence_of_element_located((By.XPATH, xpath)), xpath,
+                                      optional, self.max_delay, min_timeout)
@@ -0,0 +1,187 @@
+import collections
+import contextlib
+import logging
+import multiprocessing
+import queue
+import time
+
+from ninegag_selenium_browser import NinegagSeleniumBrowser
+from selenium_browser import headless_firefox_options
+
+MAX_RESTARTS = 3  # Restarts of a shard whose worker died, before the shard is given up
+QUEUE_SIZE_PER_WORKER = 16  # Posts buffered per worker before it waits for the consumer
+STOP_TIMEOUT = 10  # Seconds workers get to quit their browsers once the crawl is stopped
+_QUEUE_POLL_INTERVAL = 0.5  # Seconds
+
+# Messages of workers
+_POST = 'post'
+_DONE = 'done'
+
+Shard = collections.namedtuple('Shard', ['section', 'fresh'])
+
+
+class ShardedCrawler(contextlib.AbstractContextManager):
+    """
+    Scans sections in worker processes, each with its own browser, into one stream of posts
+    Notes:
+        * Workers share a set of scanned post ids, so a post that appears in several sections is scanned once
+        * A worker that dies is restarted, and continues where its shard stopped (already scanned posts are skipped)
+        * A post whose worker dies between claiming and sending it is lost
+    """
+
+    def __init__(self,
+                 processes: int = None,
+                 headless: bool = True,
+                 max_restarts: int = MAX_RESTARTS,
+                 browser_class=NinegagSeleniumBrowser,
+                 **options):
+        """
+        Args:
+            processes (int): Number of worker processes, by default the number of CPUs
+            headless (bool): Whether to run Firefox without a window
+            max_restarts (int): Restarts of a shard whose worker died, before the shard is given up
+            browser_class (type): Class of workers' browsers, must be importable by the workers. Its scan_section() gets
+                                  a `claim` callable, see NinegagSeleniumBrowser.scan_section()
+            **options: Passed to the browsers (and from them to the WebDriver), f.e. `executable_path`
+        """
+        if headless:
+            options['options'] = headless_firefox_options(options.get('options'))
+
+        self._processes = processes or multiprocessing.cpu_count()
+        self._max_restarts = max_restarts
+        self._browser_class = browser_class
+        self._options = options
+        self._manager = multiprocessing.Manager()
+        self._seen_post_ids = self._manager.dict()  # Post id -> claim of the worker that scans it
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def crawl(self, sections, max_iterations: int, fresh=(False,)):
+        """
+        Scans sections in parallel, each variant (Hot / Fresh) of each section is a shard of its own
+        Notes:
+            * Posts of each shard keep their order, posts of different shards are interleaved as they are scanned
+
+        Args:
+            sections (iterable): 9GAG section names, see NinegagSeleniumBrowser.go_to_section()
+            max_iterations (int): Posts to scan per shard, negative value will scan infinitely
+            fresh (iterable): Variants to scan of each section, True for Fresh and False for Hot
+
+        Yields:
+            NinegagPost: Representation of a post
+        """
+        shards = [Shard(section, is_fresh) for section in sections for is_fresh in fresh]
+        output = self._manager.Queue(maxsize=QUEUE_SIZE_PER_WORKER * self._processes)
+        stop = self._manager.Event()
+        pending = collections.deque(range(len(shards)))
+        workers = {}  # Shard index -> (process, attempt)
+        attempts = collections.Counter()
+        post_counts = collections.Counter()
+
+        def start(shard_index):
+            attempts[shard_index] += 1
+            remaining = max_iterations - post_counts[shard_index] if max_iterations >= 0 else -1
+            process = multiprocessing.Process(
+                target=_crawl_shard,
+                args=(shards[shard_index], (shard_index, attempts[shard_index]), remaining, self._seen_post_ids,
+                      output, stop, self._browser_class, self._options),
+                daemon=True)
+            process.start()
+            workers[shard_index] = (process, attempts[shard_index])
+
+        last_liveness_check = time.monotonic()
+        try:
+            while pending or workers:
+                while pending and len(workers) < self._processes:
+                    start(pending.popleft())
+
+                # Checked even while messages keep coming, so a dead worker does not hold its slot
+                if time.monotonic() - last_liveness_check >= _QUEUE_POLL_INTERVAL:
+                    self._restart_dead_workers(shards, workers, attempts, start)
+                    last_liveness_check = time.monotonic()
+
+                try:
+                    message, (shard_index, attempt), post = output.get(timeout=_QUEUE_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+
+                if message == _DONE:
+                    if shard_index in workers and workers[shard_index][1] == attempt:
+                        workers.pop(shard_index)[0].join()
+                elif max_iterations < 0 or post_counts[shard_index] < max_iterations:
+                    # Posts of a dead worker that were sent before it died are still valid
+                    post_counts[shard_index] += 1
+                    yield post
+        finally:
+            # Workers are stopped gracefully so they quit their browsers, and terminated if they do not
+            stop.set()
+            for process, _ in workers.values():
+                process.join(STOP_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+    def close(self):
+        self._manager.shutdown()
+
+    def _restart_dead_workers(self, shards, workers, attempts, start):
+        for shard_index, (process, _) in list(workers.items()):
+            # A worker that finished normally may exit before its last messages are read
+            if process.is_alive() or process.exitcode == 0:
+                continue
+
+            del workers[shard_index]
+            if attempts[shard_index] > self._max_restarts:
+                logging.error(f'Giving up shard {shards[shard_index]}, its worker died {attempts[shard_index]} times')
+                continue
+            logging.warning(f'Worker of shard {shards[shard_index]} died (exit code {process.exitcode}), '
+                            f'restarting it')
+            start(shard_index)
+
+
+def _crawl_shard(shard, claim, max_iterations, seen_post_ids, output, stop, browser_class, options):
+    """
+    Worker process, scans a shard and sends its posts that were not scanned by other workers
+
+    Args:
+        shard (Shard):
+        claim (tuple): (shard index, attempt) of the worker, marks the posts it scans in `seen_post_ids`
+        max_iterations (int): Posts to send, negative value will scan infinitely
+        seen_post_ids (DictProxy): Post ids that were scanned by any worker
+        output (Queue): Messages to the coordinator
+        stop (Event): Set once the coordinator stops reading messages
+        browser_class (type):
+        options (dict): Passed to the browser
+    """
+    def claim_post(post_id):
+        # Posts are claimed before they are scanned. setdefault() is a single call to the manager, so only one worker
+        # claims each post
+        return seen_post_ids.setdefault(post_id, claim) == claim
+
+    post_count = 0
+    if max_iterations:
+        with browser_class(**options) as browser:
+            browser.go_to_section(shard.section, shard.fresh)
+            for post in browser.scan_section(-1, claim=claim_post):
+                if not _put(output, (_POST, claim, post), stop):
+                    return
+                post_count += 1
+                if post_count == max_iterations:
+                    break
+
+    _put(output, (_DONE, claim, None), stop)
+
+
+def _put(output, message, stop):
+    """
+    Returns:
+        bool: Whether the message was put, False if the crawl was stopped while the queue was full
+    """
+    while not stop.is_set():
+        try:
+            output.put(message, timeout=_QUEUE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
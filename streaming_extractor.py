@@ -0,0 +1,142 @@
+from lxml import etree
+
+CHUNK_SIZE = 16 * 1024  # Characters fed to the parser at once
+
+# Every step of a path is (axis, predicate): the first step matches the element itself, each following step one of
+# its ancestors, either the direct parent or any ancestor. The paths mirror NinegagXPaths, including XPath's
+# contains() being a substring test
+
+
+def _tag(tag):
+    return lambda element: element.tag == tag
+
+
+def _tag_with_class(tag, class_part):
+    return lambda element: element.tag == tag and class_part in (element.get('class') or '')
+
+
+def _has_id(element_id):
+    return lambda element: element.get('id') == element_id
+
+
+def _text(element):
+    return element.text or ''
+
+
+_ARTICLE = [('parent', _tag('article')), ('parent', _has_id('individual-post'))]
+
+# Field -> (path, value of the matched element)
+_FIELD_PATHS = {
+    'url': ([('self', lambda element: element.tag == 'meta' and 'url' in (element.get('property') or ''))],
+            lambda element: element.get('content')),
+    'post_json': ([('self', lambda element: element.tag == 'script' and
+                    element.get('type') == 'application/ld+json'),
+                   ('parent', _tag('head')),
+                   ('parent', lambda element: element.tag == 'html' and element.getparent() is None)],
+                  lambda element: ''.join(element.itertext())),
+    'title': ([('self', _tag('h1')), ('parent', _tag('header'))] + _ARTICLE,
+              _text),
+    'section': ([('self', _tag_with_class('a', 'section')), ('ancestor', _tag_with_class('div', 'post-section')),
+                 ('ancestor', _tag('header'))] + _ARTICLE,
+                _text),
+    'post_classes': ([('self', _tag('div')), ('parent', _tag('a')),
+                      ('ancestor', _tag_with_class('div', 'post-container')), ('ancestor', _tag('article')),
+                      ('parent', _has_id('individual-post'))],
+                     lambda element: element.get('class')),
+    'upvotes_label': ([('self', _tag('span'))], _text),
+    'downvotes_label': ([('self', _tag('span'))], _text),
+    'comments_label': ([('self', _tag('span')), ('ancestor', _tag('header')),
+                        ('ancestor', _tag_with_class('section', 'post-comment'))],
+                       _text),
+}
+
+# Fields that are looked up within the first element that matches another path, like VOTE_LABEL_RELATIVE
+_FIELD_ANCHOR_PATHS = {
+    'upvotes_label': [('self', _tag_with_class('a', 'up')), ('ancestor', _tag_with_class('div', 'vote')),
+                      ('ancestor', _tag('article')), ('parent', _has_id('individual-post'))],
+    'downvotes_label': [('self', _tag_with_class('a', 'down')), ('ancestor', _tag_with_class('div', 'vote')),
+                        ('ancestor', _tag('article')), ('parent', _has_id('individual-post'))],
+}
+
+
+def _matches(element, path):
+    if not path[0][1](element):
+        return False
+    if len(path) == 1:
+        return True
+
+    if path[1][0] == 'parent':
+        parent = element.getparent()
+        return parent is not None and _matches(parent, path[1:])
+    return any(_matches(ancestor, path[1:]) for ancestor in element.iterancestors())
+
+
+class _FieldCollector:
+    """
+    Collects fields out of parser events
+    Notes:
+        * Elements are claimed in document order, when they start, so the first match wins like in XPath. Their
+          values are read once they end
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self._unclaimed_fields = set(_FIELD_PATHS)
+        self._anchors = {}
+        self._claimed_elements = {}  # Element -> fields it was claimed for
+
+    @property
+    def done(self):
+        return len(self.fields) == len(_FIELD_PATHS)
+
+    def process(self, events):
+        for event, element in events:
+            if event == 'start':
+                self._claim(element)
+            elif element in self._claimed_elements:
+                for field in self._claimed_elements.pop(element):
+                    self.fields[field] = _FIELD_PATHS[field][1](element)
+
+    def _claim(self, element):
+        for field, anchor_path in _FIELD_ANCHOR_PATHS.items():
+            if field not in self._anchors and _matches(element, anchor_path):
+                self._anchors[field] = element
+
+        for field in list(self._unclaimed_fields):
+            path = _FIELD_PATHS[field][0]
+            if not _matches(element, path):
+                continue
+            if field in _FIELD_ANCHOR_PATHS:
+                anchor = self._anchors.get(field)
+                if anchor is None or anchor not in element.iterancestors():
+                    continue
+            self._claimed_elements.setdefault(element, []).append(field)
+            self._unclaimed_fields.discard(field)
+
+
+def extract_post_fields(page, chunk_size: int = CHUNK_SIZE):
+    """
+    Extracts the raw fields of a post (see NinegagBasicBrowser.POST_FIELDS) by streaming its page through an event
+    parser, and stops parsing once all fields are found
+
+    Args:
+        page (str): 9GAG post page
+        chunk_size (int): Characters fed to the parser at once
+
+    Returns:
+        dict: Maps each field to its raw value in the page, None if it is missing. Text of elements without text is
+              empty
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    collector = _FieldCollector()
+
+    for offset in range(0, len(page), chunk_size):
+        parser.feed(page[offset:offset + chunk_size])
+        collector.process(parser.read_events())
+        if collector.done:
+            break
+    else:
+        parser.close()
+        collector.process(parser.read_events())
+
+    return {field: collector.fields.get(field) for field in _FIELD_PATHS}
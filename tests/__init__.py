@@ -8,7 +8,7 @@ class TestingNinegagBrowser(NinegagSeleniumBrowser):
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super().__new__(cls, *args, **kwargs)
-            cls._instance._start(executable_path=WEBDRIVER_PATH)
+            super(TestingNinegagBrowser, cls._instance).__init__(executable_path=WEBDRIVER_PATH)
         return cls._instance
 
     def __init__(self):
@@ -0,0 +1,85 @@
+import math
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from adaptive_wait import MAX_POLL_INTERVAL, MIN_SAMPLES, AdaptiveWaiter
+
+
+def condition_after(seconds, value='element'):
+    ready_time = time.perf_counter() + seconds
+    return lambda driver: value if time.perf_counter() >= ready_time else None
+
+
+def test_learn_timeout_and_poll_interval():
+    waiter = AdaptiveWaiter(max_timeout=10, min_timeout=0.5, initial_optional_timeout=1, percentile=90,
+                            timeout_factor=3)
+    assert waiter.timeout('//a') == 1
+    assert waiter.poll_interval('//a') == MAX_POLL_INTERVAL
+
+    for seconds in [0.4] * 9 + [2]:
+        waiter.observe('//a', seconds)
+    assert waiter.timeout('//a') == pytest.approx(1.2)
+    assert waiter.poll_interval('//a') == pytest.approx(0.08)
+
+    for _ in range(MIN_SAMPLES):
+        waiter.observe('//b', 0.01)
+    assert waiter.timeout('//b') == 0.5
+    assert waiter.timeout('//c') == 1
+
+
+def test_until():
+    waiter = AdaptiveWaiter(max_timeout=2)
+    assert waiter.until(None, condition_after(0.05), '//a') == 'element'
+
+    stats = waiter.stats()['//a']
+    assert stats['samples'] == 1
+    assert 0.05 <= stats['median'] < 1
+    assert stats['timeouts'] == 0
+
+
+def test_optional_gives_up_once_overdue():
+    waiter = AdaptiveWaiter(max_timeout=5, min_timeout=0.05)
+    for _ in range(MIN_SAMPLES):
+        waiter.observe('//popup', 0.01)
+
+    start_time = time.perf_counter()
+    with pytest.raises(TimeoutException):
+        waiter.until(None, condition_after(60), '//popup', optional=True)
+    assert time.perf_counter() - start_time < 1
+    assert waiter.stats()['//popup']['timeouts'] == 1
+
+    # Required conditions are waited for up to the maximal timeout, regardless of what was learned
+    assert waiter.until(None, condition_after(0.3), '//popup', max_timeout=2) == 'element'
+
+
+def test_optional_never_happens():
+    # F.e. the login popup, for a logged in user
+    waiter = AdaptiveWaiter(max_timeout=10, min_timeout=0.05, initial_optional_timeout=0.2)
+    start_time = time.perf_counter()
+    for _ in range(MIN_SAMPLES):
+        with pytest.raises(TimeoutException):
+            waiter.until(None, condition_after(60), '//popup', optional=True)
+    assert time.perf_counter() - start_time < MIN_SAMPLES  # Rather than the maximal timeout each
+
+    assert waiter.timeout('//popup') == 0.05
+    stats = waiter.stats()['//popup']
+    assert (stats['samples'], stats['timeouts']) == (0, MIN_SAMPLES)
+    assert stats['poll_interval'] == MAX_POLL_INTERVAL
+
+    # Once the condition does happen often enough, its timeout is learned from when it does
+    for _ in range(MIN_SAMPLES):
+        waiter.observe('//popup', 0.1)
+    assert waiter.timeout('//popup') == pytest.approx(0.3)
+
+
+def test_optional_min_timeout():
+    waiter = AdaptiveWaiter(max_timeout=10, min_timeout=0.05, initial_optional_timeout=0.05)
+    for _ in range(MIN_SAMPLES):
+        waiter.observe('//popup', math.inf)
+    with pytest.raises(TimeoutException):
+        waiter.until(None, condition_after(0.3), '//popup', optional=True)
+
+    # A rare but slow condition is still caught with a floor on its timeout
+    assert waiter.until(None, condition_after(0.3), '//popup', optional=True, min_timeout=2) == 'element'
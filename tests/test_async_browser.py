@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from async_ninegag_browser import AsyncNinegagBrowser
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+
+POST_IDS = ['aBm3Qy7', 'a5rVxKp', 'aKe8WnZ']
+
+
+async def scan_all(browser, urls):
+    return [post async for post in browser.scan_posts(urls)]
+
+
+def test_scan_posts_concurrently():
+    latency = 0.3
+    routes = {f'/gag/{post_id}': read_post_fixture(post_id) for post_id in POST_IDS}
+    urls = [f'/gag/{post_id}' for post_id in POST_IDS] * 10
+
+    async def scan(server):
+        async with AsyncNinegagBrowser(average_delay=0) as browser:
+            await browser.get(f'{server.url}/gag/{POST_IDS[0]}')
+            return await scan_all(browser, urls)
+
+    with StandInServer(routes, latency=latency) as server:
+        start = time.perf_counter()
+        posts = asyncio.run(scan(server))
+        elapsed = time.perf_counter() - start
+
+    assert sorted(post.post_id for post in posts) == sorted(url.split('/')[-1] for url in urls)
+    assert elapsed < latency * len(urls) / 4
+
+
+def test_in_flight_requests_are_bounded():
+    in_flight = []
+    peak = []
+
+    def slow(handler):
+        in_flight.append(handler.path)
+        peak.append(len(in_flight))
+        time.sleep(0.05)
+        in_flight.pop()
+        return 200, {}, read_post_fixture('aBm3Qy7')
+
+    async def scan(server):
+        async with AsyncNinegagBrowser(max_in_flight=3, average_delay=0) as browser:
+            return await scan_all(browser, [f'{server.url}/gag/aBm3Qy7'] * 12)
+
+    with StandInServer({'/gag/aBm3Qy7': slow}) as server:
+        posts = asyncio.run(scan(server))
+
+    assert len(posts) == 12
+    assert max(peak) <= 3
+
+
+def test_failed_fetch_raises():
+    async def scan(server):
+        async with AsyncNinegagBrowser(average_delay=0) as browser:
+            return await scan_all(browser, [f'{server.url}/gag/missing'])
+
+    with StandInServer() as server, pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(scan(server))
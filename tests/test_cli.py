@@ -0,0 +1,45 @@
+import csv
+import datetime
+import subprocess
+import sys
+
+import pytest
+
+import cli
+from ninegag_post import NinegagPost
+from post_store import PostStore
+
+BACKEND_MODULES = ('selenium', 'requests', 'lxml', 'numpy', 'aiohttp')
+
+
+def test_import_loads_no_backends():
+    script = f'import sys, cli; print(",".join(m for m in {BACKEND_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_parser():
+    args = cli.build_parser().parse_args(['--db', 'a.db', 'scan', 'funny', 'gaming', '-n', '5', '--fresh'])
+    assert (args.db, args.sections, args.max_posts, args.fresh, args.backend) == ('a.db', ['funny', 'gaming'], 5,
+                                                                                   True, 'selenium')
+    assert args.handler is cli.scan
+
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(['scan'])
+
+
+def test_export(tmp_path, capsys):
+    db_path = str(tmp_path / 'posts.db')
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with PostStore(db_path) as post_store:
+        post_store.add_posts([
+            NinegagPost(post_id=post_id, section=section, title=post_id, upvotes=1, downvotes=0, comment_count=0,
+                        publish_time=now - datetime.timedelta(hours=hours), fetch_time=now)
+            for post_id, section, hours in (('a1', 'Funny', 1), ('a2', 'Gaming', 2), ('a3', 'Funny', 48))])
+
+    cli.main(['--db', db_path, 'export', str(tmp_path / 'out'), '--format', 'csv', '--hours', '24'])
+
+    assert 'Exported 2 posts' in capsys.readouterr().out
+    [path] = (tmp_path / 'out').iterdir()
+    with open(path, encoding='utf-8') as f:
+        assert [row['post_id'] for row in csv.DictReader(f)] == ['a2', 'a1']
@@ -0,0 +1,108 @@
+import json
+import threading
+import urllib.parse
+
+import pytest
+
+from benchmarks.stand_in_server import StandInServer
+from comment_harvester import CommentHarvester
+from exceptions import FeedError
+from http_session import SessionPool
+from ninegag_post import NinegagPost
+from post_store import CommentSink, PostStore
+from rate_scheduler import RateScheduler
+
+COMMENT_PATH = '/v2/cacheable/comment-list.json'
+PAGE_SIZE = 4
+# Comment id -> ids of its replies, top-level comments are replies of None
+THREADS = {None: [f'c{i}' for i in range(10)], 'c1': [f'c1r{i}' for i in range(9)], 'c6': ['c6r0']}
+
+
+class CommentService:
+    """
+    Serves THREADS in pages of PAGE_SIZE, with `ref` cursors
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, handler):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(handler.path).query))
+        with self._lock:
+            self.requests.append(query)
+        comment_ids = THREADS[query.get('commentId')]
+        start = int(query.get('ref', 0))
+        count = int(query['count'])
+        end = start + count
+        payload = {'comments': [{'commentId': comment_id, 'text': f'Text of {comment_id}',
+                                 'user': {'displayName': 'someone'}, 'timestamp': 1627819200,
+                                 'likeCount': 3, 'dislikeCount': 1, 'childrenTotal': len(THREADS.get(comment_id, ()))}
+                                for comment_id in comment_ids[start:end]],
+                   'hasNext': end < len(comment_ids),
+                   'next': f'ref={end}'}
+        return 200, {'Content-Type': 'application/json'}, json.dumps({'status': 'OK', 'payload': payload})
+
+
+def thread_order():
+    for comment_id in THREADS[None]:
+        yield comment_id
+        yield from THREADS.get(comment_id, ())
+
+
+@pytest.fixture
+def service():
+    service = CommentService()
+    with StandInServer({COMMENT_PATH: service}) as server, SessionPool() as session_pool:
+        with CommentHarvester(session_pool=session_pool, rate_scheduler=RateScheduler(), average_delay=0,
+                              page_size=PAGE_SIZE, comment_url=f'{server.url}{COMMENT_PATH}') as harvester:
+            service.harvester = harvester
+            yield service
+
+
+def test_iter_comments(service):
+    comments = list(service.harvester.iter_comments('aBm3Qy7'))
+
+    assert [comment.comment_id for comment in comments] == list(thread_order())
+    reply = comments[2]
+    assert (reply.comment_id, reply.parent_id, reply.level, reply.post_id) == ('c1r0', 'c1', 2, 'aBm3Qy7')
+    assert (comments[0].author, comments[0].upvotes, comments[0].reply_count) == ('someone', 3, 0)
+    assert comments[1].reply_count == 9
+    assert comments[0].publish_time.isoformat() == '2021-08-01T12:00:00+00:00'
+    assert all(request['url'] == 'https://9gag.com/gag/aBm3Qy7' for request in service.requests)
+
+
+def test_caps(service):
+    assert [comment.level for comment in service.harvester.iter_comments('aBm3Qy7', max_depth=1)] == [1] * 10
+    assert not any('commentId' in request for request in service.requests)
+
+    comments = list(service.harvester.iter_comments('aBm3Qy7', max_comments=5))
+    assert [comment.comment_id for comment in comments] == list(thread_order())[:5]
+
+    post = NinegagPost(post_id='aBm3Qy7', section='Funny', title='')
+    service.harvester.fill_comments(post, max_comments=3)
+    assert [comment.comment_id for comment in post.comments] == ['c0', 'c1', 'c1r0']
+
+
+def test_stream_into_store(service, tmp_path):
+    with PostStore(str(tmp_path / 'posts.db')) as post_store:
+        sink = CommentSink(post_store, batch_size=5)
+        assert sink.consume(service.harvester.iter_comments('aBm3Qy7')) == 20
+        assert sink.consume(service.harvester.iter_comments('aBm3Qy7')) == 0
+        assert (sink.item_count, sink.new_item_count) == (40, 20)
+        assert post_store.count_comments('aBm3Qy7') == 20
+        assert post_store.count_comments('other') == 0
+
+
+def test_comment_without_user():
+    comment = CommentHarvester.comment_from_json({'commentId': 'c0', 'text': 'Text of c0', 'user': None,
+                                                  'timestamp': 1627819200}, 'aBm3Qy7')
+    assert (comment.comment_id, comment.author, comment.text) == ('c0', None, 'Text of c0')
+
+
+def test_invalid_response():
+    with StandInServer({COMMENT_PATH: '{"payload": {}}'}) as server, SessionPool() as session_pool:
+        with CommentHarvester(session_pool=session_pool, rate_scheduler=RateScheduler(), average_delay=0,
+                              comment_url=f'{server.url}{COMMENT_PATH}') as harvester:
+            with pytest.raises(FeedError):
+                list(harvester.iter_comments('aBm3Qy7'))
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from basic_browser import BasicBrowser
+from crawl_checkpoint import CrawlCheckpointer
+from ninegag_post import NinegagPost
+from ninegag_selenium_browser import NinegagSeleniumBrowser
+from rate_scheduler import RateScheduler
+
+CHAIN = [f'a{i}' for i in range(20)]  # Post ids of the next-post chain of a section
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = None
+
+
+class FakeChainBrowser(NinegagSeleniumBrowser):
+    """
+    Walks a next-post chain without a WebDriver, failing once it reaches `fail_at`
+    """
+
+    def __init__(self, fail_at=None):
+        BasicBrowser.__init__(self, RateScheduler())
+        self._driver = FakeDriver()
+        self.fail_at = fail_at
+        self.scanned_post_ids = []
+
+    def _get(self, url):
+        self._driver.current_url = url
+
+    def _find_first_post(self):
+        return f'/gag/{CHAIN[0]}'
+
+    def _scan_post(self):
+        post_id = self._driver.current_url.split('/')[-1]
+        if post_id == self.fail_at:
+            raise TimeoutException('Driver hangs')
+        self.scanned_post_ids.append(post_id)
+        return NinegagPost(post_id=post_id, section='funny', title=post_id)
+
+    def _next_post(self, wait_for_comments=True):
+        self._driver.current_url = f'/gag/{CHAIN[CHAIN.index(self._driver.current_url.split("/")[-1]) + 1]}'
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    checkpointer = CrawlCheckpointer(path, save_every=2, max_seen_post_ids=3)
+    assert checkpointer.resume('funny') is None
+
+    for post_id in ('a0', 'a1', 'a2', 'a3'):
+        checkpointer.record(NinegagPost(post_id=post_id, section='funny', title=''), f'/gag/{post_id}')
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert (saved['section'], saved['post_url'], saved['post_count']) == ('funny', '/gag/a3', 4)
+    assert saved['seen_post_ids'] == ['a1', 'a2', 'a3']
+
+    loaded = CrawlCheckpointer(path)
+    assert loaded.resume() == '/gag/a3'
+    assert loaded.is_seen('a2') and not loaded.is_seen('a0')
+    assert loaded.resume('gaming') is None  # Checkpoints of other sections are not resumed
+
+
+def test_unreadable_checkpoint(tmp_path):
+    (tmp_path / 'funny.json').write_text('{"section": ')
+    assert CrawlCheckpointer(str(tmp_path / 'funny.json')).resume('funny') is None
+
+
+def test_resume_after_failure(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    browser = FakeChainBrowser(fail_at='a7')
+    posts = browser.scan_section(-1, CrawlCheckpointer(path, save_every=100))
+    with pytest.raises(TimeoutException):
+        for _ in posts:
+            pass
+
+    resumed_browser = FakeChainBrowser()
+    posts = list(resumed_browser.scan_section(5, CrawlCheckpointer(path)))
+
+    assert browser.scanned_post_ids == CHAIN[:7]
+    assert resumed_browser.scanned_post_ids == CHAIN[7:12]  # No post is scanned twice
+    assert [post.post_id for post in posts] == CHAIN[7:12]
+    assert CrawlCheckpointer(path).checkpoint.post_count == 12
+
+
+def test_resume_after_stop(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    browser = FakeChainBrowser()
+    posts = browser.scan_section(-1, CrawlCheckpointer(path))
+    assert [next(posts).post_id for _ in range(3)] == CHAIN[:3]
+    posts.close()  # The third post was not consumed yet, so it is scanned again
+
+    posts = list(FakeChainBrowser().scan_section(2, CrawlCheckpointer(path)))
+    assert [post.post_id for post in posts] == CHAIN[2:4]
+
+
+def test_seen_posts_are_not_scanned(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    checkpointer = CrawlCheckpointer(path)
+    checkpointer.resume('funny')
+    for post_id in CHAIN[:3]:
+        checkpointer.record(NinegagPost(post_id=post_id, section='funny', title=''), f'/gag/{CHAIN[0]}')
+    checkpointer.save()
+
+    browser = FakeChainBrowser()
+    posts = list(browser.scan_section(2, CrawlCheckpointer(path)))
+    assert [post.post_id for post in posts] == CHAIN[3:5]
+    assert browser.scanned_post_ids == CHAIN[3:5]  # Posts met again are skipped before they are scanned
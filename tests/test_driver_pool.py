@@ -0,0 +1,131 @@
+import concurrent.futures
+import itertools
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import DriverPool
+from exceptions import PoolClosed
+from ninegag_post import NinegagPost
+
+
+class FakeBrowser:
+    started = []
+    quit = []
+    failing_starts = 0
+
+    def __init__(self, **options):
+        if FakeBrowser.failing_starts:
+            FakeBrowser.failing_starts -= 1
+            raise WebDriverException('Failed to start Firefox')
+        self.options = options
+        self.page_loads = 0
+        self.section = None
+        FakeBrowser.started.append(self)
+
+    def _quit(self):
+        FakeBrowser.quit.append(self)
+
+    def go_to_section(self, section_name, fresh=False):
+        self.section = section_name
+        self.page_loads += 1
+
+    def scan_section(self, max_iterations):
+        for i in itertools.count() if max_iterations < 0 else range(max_iterations):
+            time.sleep(0.01)
+            self.page_loads += 1
+            yield NinegagPost(post_id=f'{self.section}{i}', section=self.section, title=threading.current_thread().name)
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_browser():
+    FakeBrowser.started = []
+    FakeBrowser.quit = []
+    FakeBrowser.failing_starts = 0
+
+
+def test_browsers_are_warm_and_reused():
+    with DriverPool(size=2, headless=False, browser_class=FakeBrowser) as pool:
+        assert len(FakeBrowser.started) == 2
+        for _ in range(5):
+            with pool.lease() as browser:
+                browser.go_to_section('funny')
+        assert len(FakeBrowser.started) == 2
+    assert len(FakeBrowser.quit) == 2
+
+
+def test_recycle_after_max_pages():
+    with DriverPool(size=1, headless=False, max_pages=3, browser_class=FakeBrowser) as pool:
+        for _ in range(3):
+            with pool.lease() as browser:
+                browser.go_to_section('funny')
+        assert FakeBrowser.quit == FakeBrowser.started[:1]
+        with pool.lease() as browser:
+            assert browser is FakeBrowser.started[1]
+
+
+def test_recycle_broken_browser():
+    with DriverPool(size=1, headless=False, browser_class=FakeBrowser) as pool:
+        with pytest.raises(WebDriverException), pool.lease():
+            raise WebDriverException('Browser crashed')
+        assert len(FakeBrowser.started) == 2
+
+
+def test_failed_replacement_keeps_slot():
+    with DriverPool(size=1, headless=False, browser_class=FakeBrowser) as pool:
+        FakeBrowser.failing_starts = 2
+        with pytest.raises(WebDriverException), pool.lease():
+            raise WebDriverException('Browser crashed')
+
+        # The replacement is started again on lease, until it succeeds
+        with pytest.raises(WebDriverException), pool.lease():
+            pass
+        with pool.lease() as browser:
+            assert browser is FakeBrowser.started[1]
+        assert len(FakeBrowser.started) == 2
+
+
+def test_lease_after_close():
+    pool = DriverPool(size=1, headless=False, browser_class=FakeBrowser)
+    lease = pool.lease()
+    lease.__enter__()
+    waiting = concurrent.futures.ThreadPoolExecutor().submit(lambda: pool.lease().__enter__())
+    time.sleep(0.05)
+    pool.close()
+
+    # Waiting and later leases raise, and the leased browser is quit once returned
+    with pytest.raises(PoolClosed):
+        waiting.result(timeout=5)
+    with pytest.raises(PoolClosed), pool.lease():
+        pass
+    lease.__exit__(None, None, None)
+    assert FakeBrowser.quit == FakeBrowser.started
+
+
+def test_headless_options():
+    with DriverPool(size=1, headless=True, browser_class=FakeBrowser):
+        assert '-headless' in FakeBrowser.started[0].options['options'].arguments
+
+
+def test_scan_sections_in_parallel():
+    sections = ['funny', 'gaming', 'wholesome']
+    with DriverPool(size=3, headless=False, browser_class=FakeBrowser) as pool:
+        posts = list(pool.scan_sections(sections, max_iterations=10))
+
+    assert len(posts) == 30
+    for section in sections:
+        assert [post.post_id for post in posts if post.section == section] == [f'{section}{i}' for i in range(10)]
+    assert len({post.title for post in posts}) == 3  # Each section was scanned by its own thread
+
+
+def test_stop_infinite_scan():
+    with DriverPool(size=2, headless=False, browser_class=FakeBrowser) as pool:
+        posts = pool.scan_sections(['funny', 'gaming'], max_iterations=-1)
+        assert len(list(itertools.islice(posts, 50))) == 50
+        posts.close()
+
+        # Both workers stop and return their browsers
+        with pool.lease(), pool.lease():
+            pass
@@ -0,0 +1,88 @@
+import datetime
+import json
+import urllib.parse
+
+import pytest
+
+from benchmarks.corpus import FEED_PATH, feed_fixture_pages, feed_replayer
+from benchmarks.stand_in_server import StandInServer
+from exceptions import FeedError
+from feed_fetcher import NinegagFeedFetcher
+from http_session import SessionPool
+from ninegag_post import NinegagPost
+from rate_scheduler import RateScheduler
+
+FEED_PAGES = feed_fixture_pages()
+FEED_POST_IDS = [post['id'] for page in FEED_PAGES for post in json.loads(page)['data']['posts']]
+replay_feed = feed_replayer(FEED_PAGES)
+
+
+def make_fetcher(server, session_pool):
+    return NinegagFeedFetcher(session_pool=session_pool, rate_scheduler=RateScheduler(), average_delay=0,
+                              feed_url_template=f'{server.url}/v1/group-posts/group/{{group}}/type/{{feed_type}}')
+
+
+@pytest.fixture
+def session_pool():
+    with SessionPool() as session_pool:
+        yield session_pool
+
+
+def test_follow_cursors(session_pool):
+    with StandInServer({FEED_PATH: replay_feed}) as server:
+        batches = list(make_fetcher(server, session_pool).iter_batches('Funny'))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [post.post_id for batch in batches for post in batch] == FEED_POST_IDS
+    post = batches[0][0]
+    assert (post.post_type, post.section, post.title) == ('image', 'Funny', 'Funny post number 0 & friends')
+    assert post.publish_time == datetime.datetime(2021, 8, 1, 12, tzinfo=datetime.timezone.utc)
+    assert post.tags == ['funny']
+    assert server.connection_count == 1
+
+
+def test_scan_section_max_iterations(session_pool):
+    with StandInServer({FEED_PATH: replay_feed}) as server:
+        posts = list(make_fetcher(server, session_pool).scan_section('funny', max_iterations=15))
+
+    assert [post.post_id for post in posts] == FEED_POST_IDS[:15]
+    assert server.request_count == 2
+
+
+def test_scan_section_no_iterations(session_pool):
+    with StandInServer({FEED_PATH: replay_feed}) as server:
+        posts = list(make_fetcher(server, session_pool).scan_section('funny', max_iterations=0))
+
+    assert posts == []
+    assert server.request_count == 0
+
+
+class FakeBrowser:
+    def __init__(self, post_ids):
+        self.post_ids = post_ids
+        self.section = None
+
+    def go_to_section(self, section_name, fresh=False):
+        self.section = section_name
+
+    def scan_section(self, max_iterations):
+        for post_id in self.post_ids:
+            yield NinegagPost(post_id=post_id, section=self.section, title=post_id)
+
+
+def test_fall_back_to_page_walk(session_pool):
+    def broken_after_first_page(handler):
+        if urllib.parse.urlparse(handler.path).query:
+            return 200, {}, '<html>Captcha</html>'
+        return replay_feed(handler)
+
+    fallback_browser = FakeBrowser(FEED_POST_IDS[5:10] + ['aNew001', 'aNew002'])
+    with StandInServer({FEED_PATH: broken_after_first_page}) as server:
+        fetcher = make_fetcher(server, session_pool)
+        posts = list(fetcher.scan_section('funny', max_iterations=12, fallback_browser=fallback_browser))
+
+        with pytest.raises(FeedError):
+            list(fetcher.scan_section('funny', max_iterations=12))
+
+    assert [post.post_id for post in posts] == FEED_POST_IDS[:10] + ['aNew001', 'aNew002']
+    assert fallback_browser.section == 'funny'
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+import requests
+
+from background_browser import BackgroundBrowser
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from http_cache import HttpCache
+from http_session import SessionPool
+
+ETAG = '"v1"'
+
+
+def conditional_page(body, etag=ETAG):
+    def respond(handler):
+        if handler.headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag}, body
+    return respond
+
+
+@pytest.fixture
+def session_pool():
+    with SessionPool() as session_pool:
+        yield session_pool
+
+
+def test_revalidation(tmp_path, session_pool):
+    cache = HttpCache(str(tmp_path))
+    with StandInServer({'/gag/aBm3Qy7': conditional_page(read_post_fixture('aBm3Qy7'))}) as server:
+        url = f'{server.url}/gag/aBm3Qy7'
+        first = cache.fetch(session_pool, url)
+        second = cache.fetch(session_pool, url)
+
+    assert (first.status, second.status) == ('miss', 'revalidated')
+    assert second.text == first.text
+    assert second.html is first.html  # Parsed tree reused from memory
+    assert server.request_count == 2
+    assert cache.stats()['miss'] == 1 and cache.stats()['revalidated'] == 1 and cache.stats()['parsed_hits'] == 1
+
+
+def test_ttl_per_pattern_and_persistence(tmp_path, session_pool):
+    routes = {'/gag/a1': conditional_page('post'), '/hot': conditional_page('feed')}
+    with StandInServer(routes) as server:
+        cache = HttpCache(str(tmp_path), ttls=[(r'/gag/', 3600)])
+        assert cache.fetch(session_pool, f'{server.url}/gag/a1').status == 'miss'
+        assert cache.fetch(session_pool, f'{server.url}/hot').status == 'miss'
+        cache.close()
+
+        # A new cache over the same directory, without the parsed trees of the previous one
+        cache = HttpCache(str(tmp_path), ttls=[(r'/gag/', 3600)])
+        result = cache.fetch(session_pool, f'{server.url}/gag/a1')
+        assert (result.status, result.text) == ('hit', 'post')
+        assert cache.fetch(session_pool, f'{server.url}/hot').status == 'revalidated'
+    assert server.request_count == 3
+
+
+def test_lru_eviction(tmp_path, session_pool):
+    routes = {f'/gag/a{i}': conditional_page('x' * 100) for i in range(5)}
+    cache = HttpCache(str(tmp_path), max_bytes=300, parsed_cache_size=0)
+    with StandInServer(routes) as server:
+        for i in (0, 1, 2):
+            cache.fetch(session_pool, f'{server.url}/gag/a{i}')
+        cache.fetch(session_pool, f'{server.url}/gag/a0')  # Now a1 is the least recently used
+        cache.fetch(session_pool, f'{server.url}/gag/a3')
+
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] == 300
+        assert cache.fetch(session_pool, f'{server.url}/gag/a0').status == 'revalidated'
+        assert cache.fetch(session_pool, f'{server.url}/gag/a1').status == 'miss'
+
+
+@pytest.mark.parametrize('ttls', [[], [(r'/gag/', 3600)]])
+def test_removed_body_is_a_miss(tmp_path, session_pool, ttls):
+    # As when the body is evicted or invalidated by another thread after the entry was looked up
+    cache = HttpCache(str(tmp_path), ttls=ttls, parsed_cache_size=0)
+    with StandInServer({'/gag/a1': conditional_page('post')}) as server:
+        url = f'{server.url}/gag/a1'
+        cache.fetch(session_pool, url)
+        os.remove(cache._body_path(url))
+        result = cache.fetch(session_pool, url)
+        assert (result.status, result.text) == ('miss', 'post')
+        assert cache.fetch(session_pool, url).text == 'post'  # Stored again
+    assert cache.stats()['miss'] == 2 and cache.stats()['hit'] + cache.stats()['revalidated'] == 1
+
+
+def test_errors_are_not_cached(tmp_path, session_pool):
+    cache = HttpCache(str(tmp_path))
+    with StandInServer() as server, pytest.raises(requests.HTTPError):
+        cache.fetch(session_pool, f'{server.url}/missing')
+    assert cache.stats()['entries'] == 0
+
+
+def test_background_browser_uses_cache(tmp_path, session_pool):
+    cache = HttpCache(str(tmp_path))
+    browser = BackgroundBrowser(session_pool=session_pool, cache=cache)
+    with StandInServer({'/gag/aBm3Qy7': conditional_page(read_post_fixture('aBm3Qy7'))}) as server:
+        browser._non_delayed_get(f'{server.url}/gag/aBm3Qy7')
+        browser._non_delayed_get('/gag/aBm3Qy7')
+
+    assert browser._get_element_text(browser._find_element_by_xpath('//h1')) == \
+        'When the code compiles on the first try'
+    assert cache.stats()['revalidated'] == 1
@@ -0,0 +1,52 @@
+import pytest
+import requests
+
+from background_browser import BackgroundBrowser
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from http_session import SessionPool
+from ninegag_browser import NinegagBrowser
+
+
+def test_connections_are_reused():
+    with StandInServer({'/page': 'hello'}) as server, SessionPool() as session_pool:
+        for _ in range(10):
+            assert session_pool.get(f'{server.url}/page').text == 'hello'
+
+    assert server.request_count == 10
+    assert server.connection_count == 1
+
+
+def test_session_per_host():
+    with SessionPool() as session_pool:
+        assert session_pool.session('http://a.example/x') is session_pool.session('http://a.example/y')
+        assert session_pool.session('http://a.example/x') is not session_pool.session('http://b.example/x')
+
+
+def test_retry_on_server_error():
+    attempts = []
+
+    def flaky(handler):
+        attempts.append(handler.path)
+        if len(attempts) < 3:
+            return 503, {}, 'Unavailable'
+        return 200, {}, 'ok'
+
+    with StandInServer({'/flaky': flaky}) as server, SessionPool(backoff_factor=0) as session_pool:
+        assert session_pool.get(f'{server.url}/flaky').text == 'ok'
+    assert len(attempts) == 3
+
+
+def test_browsers_share_session_pool():
+    with StandInServer({'/gag/aBm3Qy7': read_post_fixture('aBm3Qy7')}) as server, SessionPool() as session_pool:
+        first_browser = BackgroundBrowser(session_pool=session_pool)
+        second_browser = NinegagBrowser(session_pool=session_pool)
+        first_browser._non_delayed_get(f'{server.url}/gag/aBm3Qy7')
+        second_browser._non_delayed_get(f'{server.url}/gag/aBm3Qy7')
+        second_browser._non_delayed_get('/gag/aBm3Qy7')
+
+        with pytest.raises(requests.HTTPError):
+            first_browser._non_delayed_get('/missing')
+
+    assert second_browser.scan_post().title == 'When the code compiles on the first try'
+    assert server.connection_count == 1
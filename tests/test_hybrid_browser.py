@@ -0,0 +1,151 @@
+import itertools
+
+import pytest
+import requests
+
+from basic_browser import BasicBrowser
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from exceptions import Blocked
+from http_cache import HttpCache
+from http_session import SessionPool
+from ninegag_browser import NinegagBrowser
+from ninegag_hybrid_browser import NinegagHybridBrowser
+from ninegag_selenium_browser import NinegagSeleniumBrowser
+from rate_scheduler import RateScheduler
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0'
+CHALLENGE_PAGE = '<html><head><title>Just a moment...</title></head><body></body></html>'
+
+
+class ClearanceService:
+    """
+    Serves post pages only to requests with the latest clearance cookie and the user agent it was given to
+    """
+
+    def __init__(self, block_with='status'):
+        self.block_with = block_with
+        self.tokens = (f'token{i}' for i in itertools.count())
+        self.token = None
+        self.blocked_count = 0
+
+    def rotate(self):
+        self.token = next(self.tokens)
+        return self.token
+
+    def routes(self):
+        routes = {f'/gag/{post_id}': self.page(post_id) for post_id in ('aBm3Qy7', 'a5rVxKp', 'aKe8WnZ')}
+        routes['/'] = lambda handler: (200, {}, '<html></html>')
+        routes['/gag/missing'] = self.page(None)
+        return routes
+
+    def page(self, post_id):
+        def serve(handler):
+            if (handler.headers.get('cookie') != f'clearance={self.token}' or
+                    handler.headers.get('user-agent') != USER_AGENT):
+                self.blocked_count += 1
+                return (403, {}, 'Forbidden') if self.block_with == 'status' else (200, {}, CHALLENGE_PAGE)
+            if post_id is None:
+                return 404, {}, 'Not Found'
+            return 200, {}, read_post_fixture(post_id)
+        return serve
+
+
+class FakeDriver:
+    def __init__(self, service, user_agent=USER_AGENT):
+        self.service = service
+        self.user_agent = user_agent
+        self.visited_urls = []
+
+    def get_cookies(self):
+        return [{'name': 'clearance', 'value': self.service.rotate(), 'domain': '127.0.0.1', 'path': '/'}]
+
+    def execute_script(self, script):
+        return self.user_agent
+
+
+class FakeClearanceBrowser(NinegagSeleniumBrowser):
+    """
+    Passes the bot check of a ClearanceService without a WebDriver
+    """
+
+    def __init__(self, service, user_agent=USER_AGENT):
+        BasicBrowser.__init__(self, RateScheduler())
+        self._driver = FakeDriver(service, user_agent)
+
+    def _get(self, url):
+        self._driver.visited_urls.append(url)
+
+
+@pytest.fixture
+def service():
+    return ClearanceService()
+
+
+def hybrid_browser(service, server, session_pool, user_agent=USER_AGENT, **kwargs):
+    # Bursts skip the artificial delays
+    return NinegagHybridBrowser(FakeClearanceBrowser(service, user_agent), clearance_url=f'{server.url}/',
+                                session_pool=session_pool, rate_scheduler=RateScheduler(burst=10), **kwargs)
+
+
+@pytest.mark.parametrize('block_with, cached', (('status', False), ('challenge', False), ('challenge', True)))
+def test_reacquire_clearance(block_with, cached, tmp_path):
+    service = ClearanceService(block_with)
+    # Responses are used without revalidation, so a cached bot-check page would be served again
+    cache = HttpCache(str(tmp_path / 'cache'), default_ttl=3600) if cached else None
+    with StandInServer(service.routes()) as server, SessionPool(max_retries=0) as session_pool:
+        browser = hybrid_browser(service, server, session_pool, cache=cache)
+        urls = [f'{server.url}/gag/{post_id}' for post_id in ('aBm3Qy7', 'a5rVxKp')]
+        posts = list(browser.scan_posts(urls))
+        assert [post.post_id for post in posts] == ['aBm3Qy7', 'a5rVxKp']
+        assert (browser.clearance_count, service.blocked_count) == (1, 0)
+
+        service.rotate()  # Clearance expires
+        post = next(browser.scan_posts([f'{server.url}/gag/aKe8WnZ']))
+        assert post.post_id == 'aKe8WnZ'
+        assert (browser.clearance_count, service.blocked_count) == (2, 1)
+        assert browser._clearance_browser._driver.visited_urls == [f'{server.url}/'] * 2
+
+        if cached:
+            service.rotate()
+            assert next(browser.scan_posts([f'{server.url}/gag/aKe8WnZ'])).post_id == 'aKe8WnZ'  # Served cached
+            assert browser.clearance_count == 2
+
+
+def test_blocked(service):
+    with StandInServer(service.routes()) as server, SessionPool(max_retries=0) as session_pool:
+        browser = hybrid_browser(service, server, session_pool, user_agent='Bot', max_clearances=2)
+        with pytest.raises(Blocked):
+            browser.get(f'{server.url}/gag/aBm3Qy7')
+        assert (browser.clearance_count, service.blocked_count) == (3, 3)
+
+        with pytest.raises(requests.HTTPError):
+            hybrid_browser(service, server, session_pool).get(f'{server.url}/gag/missing')
+
+
+def test_scan_post_url():
+    with StandInServer({'/gag/aBm3Qy7': read_post_fixture('aBm3Qy7')}) as server, SessionPool() as session_pool:
+        browser = NinegagBrowser(session_pool=session_pool, rate_scheduler=RateScheduler())
+        browser._non_delayed_get(f'{server.url}/gag/aBm3Qy7')
+        assert browser._url == f'{server.url}/gag/aBm3Qy7'
+        assert browser.scan_post().post_id == 'aBm3Qy7'
+
+
+def test_quit_clearance_browser(service):
+    class QuittingClearanceBrowser(FakeClearanceBrowser):
+        quit_count = 0
+
+        def _quit(self):
+            self.quit_count += 1
+
+    with StandInServer(service.routes()) as server, SessionPool(max_retries=0) as session_pool:
+        clearance_browser = QuittingClearanceBrowser(service)
+        with NinegagHybridBrowser(clearance_browser, clearance_url=f'{server.url}/', session_pool=session_pool):
+            pass
+        assert clearance_browser.quit_count == 0  # Browsers that were given are left to their owner
+
+        browser = NinegagHybridBrowser(clearance_url=f'{server.url}/', session_pool=session_pool)
+        browser._clearance_browser = clearance_browser  # As if it started the clearance browser itself
+        with browser:
+            pass
+        assert clearance_browser.quit_count == 1
@@ -0,0 +1,111 @@
+import pytest
+from lxml import html
+from selenium import webdriver
+from selenium.common.exceptions import JavascriptException
+
+from basic_browser import BasicBrowser
+from benchmarks.corpus import post_fixture_ids, read_post_fixture
+from const import WEBDRIVER_PATH
+from ninegag_basic_browser import NinegagBasicBrowser
+from ninegag_selenium_browser import POST_FIELDS_SCRIPT, POST_FIELDS_SCRIPT_XPATHS, NinegagSeleniumBrowser
+from rate_scheduler import RateScheduler
+from selenium_browser import headless_firefox_options
+
+PAGE = read_post_fixture('aBm3Qy7')
+EMPTY_TITLE_PAGE = PAGE.replace('>When the code compiles on the first try<', '><')
+
+
+class FakeDriver:
+    """
+    Serves a post page, and runs POST_FIELDS_SCRIPT by extracting the fields out of the page with lxml
+    """
+
+    def __init__(self, page_source, fields=None, script_error=None):
+        self.current_url = 'https://9gag.com/gag/aBm3Qy7'
+        self._page_source = page_source
+        self._fields = fields
+        self._script_error = script_error
+        self.scripts = []
+        self.page_source_reads = 0
+
+    @property
+    def page_source(self):
+        self.page_source_reads += 1
+        return self._page_source
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script, args))
+        if self._script_error:
+            raise self._script_error
+        if self._fields is not None:
+            return self._fields
+        return NinegagBasicBrowser._extract_post_fields(html.fromstring(self._page_source))
+
+
+class FakeBrowser(NinegagSeleniumBrowser):
+    def __init__(self, driver):
+        BasicBrowser.__init__(self, RateScheduler())
+        self._driver = driver
+
+    def _get(self, url):
+        self._driver.current_url = url
+
+    def _wait_until(self, xpath, optional=False):
+        pass
+
+
+@pytest.mark.parametrize('page_source, title', [(PAGE, 'When the code compiles on the first try'),
+                                                (EMPTY_TITLE_PAGE, '')])
+def test_scan_post_in_browser(page_source, title):
+    browser = FakeBrowser(FakeDriver(page_source))
+    post = browser._scan_post()
+
+    assert (post.post_id, post.section, post.title, post.upvotes, post.comment_count) == (
+        'aBm3Qy7', 'Funny', title, 1200, 42)
+    assert browser._driver.scripts == [(POST_FIELDS_SCRIPT, (POST_FIELDS_SCRIPT_XPATHS,))]
+    assert browser._driver.page_source_reads == 0
+
+
+@pytest.mark.parametrize('driver', [FakeDriver(EMPTY_TITLE_PAGE, script_error=JavascriptException('Script failed')),
+                                    FakeDriver(EMPTY_TITLE_PAGE, fields={'url': None, 'title': ''})])
+def test_scan_post_in_browser_fallback(driver):
+    # Pages the script fails on, or misses fields of, are parsed out of their source
+    browser = FakeBrowser(driver)
+    post = browser._scan_post()
+
+    assert (post.post_id, post.section, post.title, post.upvotes) == ('aBm3Qy7', 'Funny', '', 1200)
+    assert driver.page_source_reads == 1
+
+
+def test_scan_post_in_browser_disabled():
+    browser = FakeBrowser(FakeDriver(PAGE))
+    browser.in_browser_extraction = False
+
+    assert browser._scan_post().post_id == 'aBm3Qy7'
+    assert not browser._driver.scripts
+    assert browser._driver.page_source_reads == 1
+
+
+def test_scan_post_at():
+    browser = FakeBrowser(FakeDriver(PAGE))
+    assert browser.scan_post_at('https://9gag.com/gag/a5rVxKp').post_id == 'a5rVxKp'
+
+
+@pytest.fixture(scope='module')
+def driver():
+    driver = webdriver.Firefox(executable_path=WEBDRIVER_PATH, options=headless_firefox_options())
+    yield driver
+    driver.quit()
+
+
+@pytest.mark.dependency(depends=['tests/test_setup.py::test_firefox'], scope='session')
+@pytest.mark.parametrize('post_id', post_fixture_ids() + ['empty-title'])
+def test_post_fields_script(driver, post_id, tmp_path):
+    # Runs the script itself in Firefox, so it cannot drift from _extract_post_fields() unnoticed
+    page = EMPTY_TITLE_PAGE if post_id == 'empty-title' else read_post_fixture(post_id)
+    path = tmp_path / 'post.html'
+    path.write_text(page, encoding='utf-8')
+    driver.get(path.as_uri())
+
+    fields = driver.execute_script(POST_FIELDS_SCRIPT, POST_FIELDS_SCRIPT_XPATHS)
+    assert fields == NinegagBasicBrowser._extract_post_fields(html.fromstring(page))
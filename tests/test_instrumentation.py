@@ -0,0 +1,83 @@
+import json
+
+from benchmarks.corpus import read_post_fixture
+from benchmarks.stand_in_server import StandInServer
+from http_session import SessionPool
+from instrumentation import HISTOGRAM_BUCKETS, METRIC_NAME, Histogram, Instrumentation, NULL_INSTRUMENTATION
+from ninegag_browser import NinegagBrowser
+from rate_scheduler import RateScheduler
+
+
+def test_histogram():
+    histogram = Histogram()
+    for seconds in (0.002, 0.003, 0.2, 30):
+        histogram.observe(seconds)
+
+    assert histogram.count == 4
+    assert histogram.bucket_counts[HISTOGRAM_BUCKETS.index(0.005)] == 2
+    assert histogram.bucket_counts[-1] == 1
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.75) == 0.25
+    assert histogram.quantile(1) == 30
+
+
+def test_phases_by_section():
+    instrumentation = Instrumentation()
+    instrumentation.observe('fetch', 0.2, 'funny')
+    instrumentation.observe('fetch', 0.4, 'gaming')
+    with instrumentation.timer('extract'):
+        pass
+
+    summary = instrumentation.summary()
+    assert summary['phases']['fetch']['count'] == 2
+    assert abs(summary['phases']['fetch']['mean'] - 0.3) < 1e-9
+    assert summary['phases']['extract']['count'] == 1
+    assert set(summary['sections']) == {'funny', 'gaming'}
+    assert summary['sections']['gaming']['fetch']['max'] == 0.4
+
+
+def test_export(tmp_path):
+    instrumentation = Instrumentation()
+    instrumentation.observe('fetch', 0.2, 'funny')
+    instrumentation.observe('fetch', 20)
+
+    text = instrumentation.to_prometheus()
+    assert f'{METRIC_NAME}_bucket{{phase="fetch",section="funny",le="0.25"}} 1' in text
+    assert f'{METRIC_NAME}_bucket{{phase="fetch",section="",le="10"}} 0' in text
+    assert f'{METRIC_NAME}_bucket{{phase="fetch",section="",le="+Inf"}} 1' in text
+    assert f'{METRIC_NAME}_count{{phase="fetch",section="funny"}} 1' in text
+
+    instrumentation.write_prometheus(tmp_path / 'metrics.prom')
+    instrumentation.write_summary(tmp_path / 'summary.json')
+    assert (tmp_path / 'metrics.prom').read_text() == text
+    assert json.loads((tmp_path / 'summary.json').read_text())['phases']['fetch']['count'] == 2
+
+
+def test_profile_slowest_posts():
+    instrumentation = Instrumentation(profile_slowest=2)
+    for label, loops in (('a', 1000), ('b', 300000), ('c', 10), ('d', 100000)):
+        with instrumentation.profile_post(label):
+            sum(range(loops))
+
+    slowest_posts = instrumentation.slowest_posts()
+    assert [label for _, label, _ in slowest_posts] == ['b', 'd']
+    assert slowest_posts[0][2].total_calls > 0
+
+    with NULL_INSTRUMENTATION.profile_post('a'), NULL_INSTRUMENTATION.timer('fetch'):
+        pass
+    assert Instrumentation().slowest_posts() == []
+
+
+def test_browser_phases():
+    instrumentation = Instrumentation()
+    with StandInServer({'/gag/aBm3Qy7': read_post_fixture('aBm3Qy7')}) as server, SessionPool() as session_pool:
+        browser = NinegagBrowser(session_pool=session_pool, rate_scheduler=RateScheduler(),
+                                 instrumentation=instrumentation)
+        browser._non_delayed_get(f'{server.url}/gag/aBm3Qy7')
+        browser.scan_post()
+
+    phases = instrumentation.summary()['phases']
+    assert phases['fetch']['count'] == 1
+    assert phases['parse']['count'] == 1
+    assert phases['extract']['count'] == 1
+    assert 'rate_wait' not in phases
@@ -0,0 +1,67 @@
+import collections
+
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+from basic_browser import BasicBrowser
+from rate_scheduler import RateScheduler
+from selenium_browser import (LEAN_FIREFOX_PREFERENCES, PAGE_STATS_SCRIPT, PageStats, SeleniumBrowser,
+                              lean_firefox_options)
+
+PAGE_BYTES = {'/page/1': 120000, '/page/2': 4500}  # Bytes the stand-in pages transfer
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = None
+        self.scripts = []
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script, args))
+        return PAGE_BYTES[self.current_url]
+
+
+class FakeBrowser(SeleniumBrowser):
+    def __init__(self, record_page_stats=True):
+        BasicBrowser.__init__(self, RateScheduler())
+        self._driver = FakeDriver()
+        self.page_loads = 0
+        self._record_page_stats = record_page_stats
+        self.page_stats = collections.deque()
+
+
+def test_lean_firefox_options():
+    options = lean_firefox_options()
+    assert options.preferences == LEAN_FIREFOX_PREFERENCES
+    assert options.preferences['permissions.default.image'] == 2
+    assert options.page_load_strategy == 'eager'
+
+    # Given options keep their own preferences
+    options = FirefoxOptions()
+    options.set_preference('intl.accept_languages', 'en-US')
+    assert lean_firefox_options(options) is options
+    assert options.preferences == {'intl.accept_languages': 'en-US', **LEAN_FIREFOX_PREFERENCES}
+
+
+def test_page_stats():
+    browser = FakeBrowser()
+    browser._non_delayed_get('/page/1')
+    browser._driver.current_url = '/page/2'  # Updated in place by the site
+    browser._add_page_stats(0.25, full_load=False)
+
+    assert browser.page_loads == 1
+    assert [page_stats[:2] for page_stats in browser.page_stats] == [('/page/1', 120000), ('/page/2', 4500)]
+    assert browser.page_stats[1] == PageStats('/page/2', 4500, 0.25)
+    assert browser.page_stats[0].load_time >= 0
+    assert browser._driver.scripts == [(PAGE_STATS_SCRIPT, (True,)), (PAGE_STATS_SCRIPT, (False,))]
+
+
+def test_page_stats_not_recorded():
+    browser = FakeBrowser(record_page_stats=False)
+    browser._non_delayed_get('/page/1')
+
+    assert browser.page_loads == 1
+    assert not browser.page_stats
+    assert not browser._driver.scripts
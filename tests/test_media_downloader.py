@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from benchmarks.stand_in_server import StandInServer
+from http_session import SessionPool
+from media_downloader import PARTIAL_DIR_NAME, VALIDATOR_SUFFIX, MediaDownloader
+from ninegag_post import NinegagPost
+
+MEDIA = {f'/photo/a{i}_700bwp.webp': os.urandom(100_000 + i) for i in range(6)}
+MEDIA['/photo/repost_700bwp.webp'] = MEDIA['/photo/a0_700bwp.webp']
+
+
+def etag(path):
+    return f'"{hashlib.sha256(MEDIA[path]).hexdigest()[:16]}"'
+
+
+class MediaService:
+    """
+    Serves MEDIA with ETags, honoring Range requests unless `ranges` is False (and their If-Range unless `if_range` is
+    False), and tracks concurrent requests
+    """
+
+    def __init__(self, ranges=True, if_range=True, latency=0):
+        self.ranges = ranges
+        self.if_range = if_range
+        self.latency = latency
+        self.range_headers = []
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self._lock = threading.Lock()
+
+    def routes(self):
+        return {path: self for path in MEDIA}
+
+    def __call__(self, handler):
+        with self._lock:
+            self.concurrency += 1
+            self.max_concurrency = max(self.max_concurrency, self.concurrency)
+        time.sleep(self.latency)
+        with self._lock:
+            self.concurrency -= 1
+
+        body = MEDIA[handler.path]
+        headers = {'Content-Type': 'image/webp', 'ETag': etag(handler.path)}
+        range_header = handler.headers.get('range')
+        self.range_headers.append(range_header)
+        if_range = handler.headers.get('if-range')
+        if not (self.ranges and range_header) or (self.if_range and if_range and if_range != headers['ETag']):
+            return 200, headers, body
+        start = int(re.fullmatch(r'bytes=(\d+)-', range_header).group(1))
+        if start >= len(body):
+            return 416, {'Content-Range': f'bytes */{len(body)}'}, b''
+        return 206, {**headers, 'Content-Range': f'bytes {start}-{len(body) - 1}/{len(body)}'}, body[start:]
+
+
+def serve(service):
+    return StandInServer(service.routes())
+
+
+def write_partial(directory, url, content, validator=None):
+    partial_path = os.path.join(str(directory), PARTIAL_DIR_NAME,
+                                hashlib.sha1(url.encode('utf-8')).hexdigest() + '.webp')
+    with open(partial_path, 'wb') as f:
+        f.write(content)
+    if validator:
+        with open(partial_path + VALIDATOR_SUFFIX, 'w', encoding='utf-8') as f:
+            f.write(validator)
+
+
+def test_download(tmp_path):
+    service = MediaService()
+    with serve(service) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool, chunk_size=4096) as downloader:
+        media_file = downloader.download(f'{server.url}/photo/a1_700bwp.webp')
+        assert downloader.download(media_file.url) == media_file
+        assert server.request_count == 1
+
+        digest = hashlib.sha256(MEDIA['/photo/a1_700bwp.webp']).hexdigest()
+        assert media_file.digest == digest
+        assert media_file.size == 100_001
+        assert media_file.path == os.path.join(str(tmp_path), digest[:2], f'{digest}.webp')
+        with open(media_file.path, 'rb') as f:
+            assert f.read() == MEDIA['/photo/a1_700bwp.webp']
+        assert not os.listdir(tmp_path / PARTIAL_DIR_NAME)
+
+
+@pytest.mark.parametrize('ranges', (True, False))
+def test_resume(tmp_path, ranges):
+    service = MediaService(ranges=ranges)
+    with serve(service) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool) as downloader:
+        url = f'{server.url}/photo/a2_700bwp.webp'
+        write_partial(tmp_path, url, MEDIA['/photo/a2_700bwp.webp'][:30_000], etag('/photo/a2_700bwp.webp'))
+
+        media_file = downloader.download(url)
+        assert service.range_headers == ['bytes=30000-']
+        with open(media_file.path, 'rb') as f:
+            assert f.read() == MEDIA['/photo/a2_700bwp.webp']
+        assert media_file.digest == hashlib.sha256(MEDIA['/photo/a2_700bwp.webp']).hexdigest()
+        assert not os.listdir(tmp_path / PARTIAL_DIR_NAME)
+
+
+@pytest.mark.parametrize('if_range, validator, range_headers', [
+    (True, '"changed"', ['bytes=30000-']),  # The server sends the whole file, as it changed
+    (False, '"changed"', ['bytes=30000-', None]),  # The server ignores If-Range, the rest is dropped
+    (True, None, [None]),  # The version of the partial file is unknown
+])
+def test_resume_changed(tmp_path, if_range, validator, range_headers):
+    service = MediaService(if_range=if_range)
+    with serve(service) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool) as downloader:
+        url = f'{server.url}/photo/a2_700bwp.webp'
+        write_partial(tmp_path, url, os.urandom(30_000), validator)
+
+        media_file = downloader.download(url)
+        assert service.range_headers == range_headers
+        assert media_file.digest == hashlib.sha256(MEDIA['/photo/a2_700bwp.webp']).hexdigest()
+
+
+def test_resume_complete(tmp_path):
+    with serve(MediaService()) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool) as downloader:
+        url = f'{server.url}/photo/a3_700bwp.webp'
+        write_partial(tmp_path, url, MEDIA['/photo/a3_700bwp.webp'], etag('/photo/a3_700bwp.webp'))
+
+        assert downloader.download(url).digest == hashlib.sha256(MEDIA['/photo/a3_700bwp.webp']).hexdigest()
+
+
+def test_download_many(tmp_path):
+    service = MediaService(latency=0.05)
+    with serve(service) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool, max_workers=6, max_connections_per_host=2) as downloader:
+        urls = [f'{server.url}{path}' for path in MEDIA] + [f'{server.url}/photo/missing_700bwp.webp']
+        media_files = list(downloader.download_many(urls))
+
+    assert sorted(media_file.url for media_file in media_files) == sorted(urls[:-1])
+    assert service.max_concurrency == 2
+    # The repost is stored once
+    assert len({media_file.path for media_file in media_files}) == len(MEDIA) - 1
+    stored_files = [file_name for directory in os.listdir(tmp_path) if directory != PARTIAL_DIR_NAME
+                    for file_name in os.listdir(tmp_path / directory)]
+    assert len(stored_files) == len(MEDIA) - 1
+
+
+def test_download_posts(tmp_path, monkeypatch):
+    with serve(MediaService()) as server, SessionPool() as session_pool, \
+            MediaDownloader(str(tmp_path), session_pool) as downloader:
+        monkeypatch.setattr('ninegag_post.NINEGAG_IMAGE_URL_TEMPLATE', f'{server.url}/photo/{{post_id}}_700bwp.webp')
+        posts = [NinegagPost(post_id, 'Funny', '', post_type='image') for post_id in ('a4', 'a5', 'repost')]
+        downloaded = dict(downloader.download_posts(posts))
+
+    assert set(downloaded) == set(posts)
+    assert downloaded[posts[2]].digest == hashlib.sha256(MEDIA['/photo/a0_700bwp.webp']).hexdigest()
+    assert NinegagPost('a6', 'Funny', '', post_type='video').media_url.endswith('/photo/a6_460sv.mp4')
@@ -0,0 +1,115 @@
+import datetime
+
+import pytest
+from lxml import html
+
+from benchmarks.corpus import pad_post_page, read_post_fixture
+from compiled_xpaths import CompiledNinegagXPaths
+from exceptions import NoSuchElement
+from ninegag_basic_browser import NinegagBasicBrowser, POST_FIELDS
+from streaming_extractor import extract_post_fields
+
+EXPECTED_POSTS = {
+    'aBm3Qy7': dict(post_type='image', section='Funny', title='When the code compiles on the first try',
+                    upvotes=1200, downvotes=34, comment_count=42,
+                    publish_time=datetime.datetime(2021, 8, 1, 12, 34, 56, tzinfo=datetime.timezone.utc)),
+    'a5rVxKp': dict(post_type='video', section='Gaming', title='Speedrun strats nobody asked for',
+                    upvotes=815, downvotes=12, comment_count=7,
+                    publish_time=datetime.datetime(2021, 8, 2, 8, 0, 1, tzinfo=datetime.timezone.utc)),
+    'aKe8WnZ': dict(post_type='gif', section='Wholesome', title='Good boy gets a treat',
+                    upvotes=25400, downvotes=210, comment_count=0,
+                    publish_time=datetime.datetime(2021, 7, 30, 21, 59, 59, tzinfo=datetime.timezone.utc)),
+}
+
+
+def assert_post_matches(post, post_id):
+    assert post.post_id == post_id
+    for attr, value in EXPECTED_POSTS[post_id].items():
+        assert getattr(post, attr) == value, attr
+
+
+def test_compiled_xpaths_structure():
+    assert callable(CompiledNinegagXPaths.POST_JSON_SCRIPT)
+    assert callable(CompiledNinegagXPaths.Post.TITLE)
+    assert callable(CompiledNinegagXPaths.LoginFrame.USERNAME_INPUT)
+    assert not hasattr(CompiledNinegagXPaths.Post, '_ARTICLE')
+
+
+@pytest.mark.parametrize('post_id', EXPECTED_POSTS)
+def test_scan_post_from_html(post_id):
+    page = read_post_fixture(post_id)
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_html(page), post_id)
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_html(html.fromstring(page), f'/gag/{post_id}'), post_id)
+
+
+@pytest.mark.parametrize('processes', [None, 2])
+def test_scan_posts_from_html(processes):
+    post_ids = list(EXPECTED_POSTS) * 3
+    pages = [read_post_fixture(post_id) for post_id in post_ids]
+    pages[0] = (pages[0], f'https://9gag.com/gag/{post_ids[0]}')
+
+    posts = list(NinegagBasicBrowser.scan_posts_from_html(pages, processes=processes))
+
+    assert len(posts) == len(post_ids)
+    for post, post_id in zip(posts, post_ids):
+        assert_post_matches(post, post_id)
+
+
+@pytest.mark.parametrize('label, expected', [('12', 12), ('1.2k', 1200), ('25.4k', 25400), ('', -1)])
+def test_numeric_label_to_int(label, expected):
+    assert NinegagBasicBrowser._numeric_label_to_int(label) == expected
+
+
+@pytest.mark.parametrize('post_id', EXPECTED_POSTS)
+def test_scan_post_from_fields(post_id):
+    fields = NinegagBasicBrowser._extract_post_fields(html.fromstring(read_post_fixture(post_id)))
+    assert set(fields) == set(POST_FIELDS)
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_fields(fields), post_id)
+
+
+def test_scan_post_from_fields_missing():
+    fields = NinegagBasicBrowser._extract_post_fields(html.fromstring(read_post_fixture('aBm3Qy7')))
+    fields['title'] = None
+    with pytest.raises(NoSuchElement):
+        NinegagBasicBrowser.scan_post_from_fields(fields)
+
+    fields = dict(fields, title='Title', url=None)
+    assert NinegagBasicBrowser.scan_post_from_fields(fields, '/gag/aBm3Qy7').post_id == 'aBm3Qy7'
+    with pytest.raises(NoSuchElement):
+        NinegagBasicBrowser.scan_post_from_fields(fields)
+
+
+@pytest.mark.parametrize('fast', [False, True])
+def test_scan_post_without_text(fast):
+    # Posts may have an empty title or section label, which is not a missing field
+    page = (read_post_fixture('aBm3Qy7').replace('>When the code compiles on the first try<', '><')
+            .replace('>Funny</a>', '></a>'))
+    post = NinegagBasicBrowser.scan_post_from_html(page, fast=fast)
+    assert (post.post_id, post.title, post.section, post.upvotes) == ('aBm3Qy7', '', '', 1200)
+
+
+@pytest.mark.parametrize('post_id', EXPECTED_POSTS)
+@pytest.mark.parametrize('padded', [False, True])
+@pytest.mark.parametrize('chunk_size', [7, 100, 16 * 1024])
+def test_extract_post_fields_streaming(post_id, padded, chunk_size):
+    page = read_post_fixture(post_id)
+    if padded:
+        page = pad_post_page(page)
+    assert extract_post_fields(page, chunk_size) == NinegagBasicBrowser._extract_post_fields(html.fromstring(page))
+
+
+@pytest.mark.parametrize('post_id', EXPECTED_POSTS)
+def test_scan_post_from_html_fast(post_id):
+    page = pad_post_page(read_post_fixture(post_id))
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_html(page, fast=True), post_id)
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_html(page, f'/gag/{post_id}', fast=True), post_id)
+
+
+def test_scan_post_from_html_fast_fallback(monkeypatch):
+    # Fields the streaming extractor misses are looked up in the whole document instead
+    monkeypatch.setattr('streaming_extractor.extract_post_fields',
+                        lambda page: dict(extract_post_fields(page), title=None))
+    assert_post_matches(NinegagBasicBrowser.scan_post_from_html(read_post_fixture('aBm3Qy7'), fast=True), 'aBm3Qy7')
+
+    with pytest.raises(NoSuchElement):
+        NinegagBasicBrowser.scan_post_from_html('<html><body></body></html>', fast=True)
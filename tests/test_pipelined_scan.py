@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from basic_browser import BasicBrowser
+from benchmarks.corpus import read_post_fixture
+from crawl_checkpoint import CrawlCheckpointer
+from exceptions import NoSuchElement
+from instrumentation import Instrumentation
+from ninegag_selenium_browser import NinegagSeleniumBrowser
+from rate_scheduler import RateScheduler
+
+CHAIN = [f'a{i}' for i in range(20)]  # Post ids of the next-post chain of a section
+NAVIGATION_TIME = 0.01  # Seconds
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = None
+
+    @property
+    def page_source(self):
+        return read_post_fixture('aBm3Qy7').replace('aBm3Qy7', self.current_url.split('/')[-1])
+
+
+class FakeSnapshotBrowser(NinegagSeleniumBrowser):
+    """
+    Walks a next-post chain without a WebDriver, recording how far navigation runs ahead of parsing
+    """
+    pipelined_scan = True
+
+    def __init__(self, pipeline_depth=3):
+        BasicBrowser.__init__(self, RateScheduler())
+        self._driver = FakeDriver()
+        self.pipeline_depth = pipeline_depth
+        self.snapshot_post_ids = []
+        self.parsed_post_ids = []
+        self.max_lead = 0
+        self.parser_threads = set()
+        self._lock = threading.Lock()
+
+    def _get(self, url):
+        self._driver.current_url = url
+
+    def _find_first_post(self):
+        return f'/gag/{CHAIN[0]}'
+
+    def _wait_until(self, xpath, optional=False):
+        pass
+
+    def _next_post(self, wait_for_comments=True):
+        time.sleep(NAVIGATION_TIME)
+        self._driver.current_url = f'/gag/{CHAIN[CHAIN.index(self._driver.current_url.split("/")[-1]) + 1]}'
+
+    def _snapshot_post(self):
+        page_source = super()._snapshot_post()
+        with self._lock:
+            self.snapshot_post_ids.append(self._driver.current_url.split('/')[-1])
+            self.max_lead = max(self.max_lead, len(self.snapshot_post_ids) - len(self.parsed_post_ids))
+        return page_source
+
+    def _parse_snapshot(self, page_source, post_url):
+        time.sleep(NAVIGATION_TIME)
+        post = super()._parse_snapshot(page_source, post_url)
+        with self._lock:
+            self.parsed_post_ids.append(post.post_id)
+            self.parser_threads.add(threading.get_ident())
+        return post
+
+
+def test_pipelined_scan():
+    browser = FakeSnapshotBrowser()
+    posts = list(browser.scan_section(10))
+
+    assert [post.post_id for post in posts] == CHAIN[:10]
+    assert posts[3].title == 'When the code compiles on the first try'
+    assert browser.snapshot_post_ids == CHAIN[:10]  # No post is navigated to past the needed ones
+    assert browser.parser_threads and threading.get_ident() not in browser.parser_threads
+    assert 1 < browser.max_lead <= 3
+
+
+def test_invalid_pipeline_depth():
+    with pytest.raises(ValueError):
+        next(FakeSnapshotBrowser(pipeline_depth=0).scan_section(10))
+
+
+def test_parse_is_profiled():
+    browser = FakeSnapshotBrowser()
+    browser._instrumentation = Instrumentation(profile_slowest=20)
+    list(browser.scan_section(10))
+
+    profiled_functions = {function for _, _, stats in browser._instrumentation.slowest_posts()
+                          for _, _, function in stats.stats}
+    assert 'scan_post_from_html' in profiled_functions  # Profiled in the worker thread
+
+
+def test_back_pressure():
+    browser = FakeSnapshotBrowser(pipeline_depth=2)
+    posts = browser.scan_section(-1)
+    next(posts)
+    time.sleep(10 * NAVIGATION_TIME)
+    # Navigation waits for the consumer once the pipeline is full
+    assert len(browser.snapshot_post_ids) <= 3
+    posts.close()
+
+
+def test_pipelined_resume(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    posts = FakeSnapshotBrowser().scan_section(-1, CrawlCheckpointer(path))
+    assert [next(posts).post_id for _ in range(3)] == CHAIN[:3]
+    posts.close()  # The third post was not consumed yet, neither were the snapshots ahead of it
+
+    browser = FakeSnapshotBrowser()
+    posts = list(browser.scan_section(2, CrawlCheckpointer(path)))
+    assert [post.post_id for post in posts] == CHAIN[2:4]
+    assert browser.snapshot_post_ids[0] == CHAIN[2]
+
+
+def test_parse_failure(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    browser = FakeSnapshotBrowser()
+
+    class BrokenDriver(FakeDriver):
+        @property
+        def page_source(self):
+            if self.current_url.endswith('/a4'):
+                return '<html></html>'
+            return super().page_source
+
+    browser._driver = BrokenDriver()
+    with pytest.raises(NoSuchElement):
+        list(browser.scan_section(-1, CrawlCheckpointer(path)))
+    assert CrawlCheckpointer(path).resume('funny') == '/gag/a4'
+
+
+def test_end_of_chain():
+    browser = FakeSnapshotBrowser()
+    posts = []
+    with pytest.raises(IndexError):
+        for post in browser.scan_section(-1):
+            posts.append(post)
+    # Like a sequential scan, every post before the failed navigation is yielded
+    assert [post.post_id for post in posts] == CHAIN
+
+
+def test_pipelined_seen_posts_are_not_snapshot(tmp_path):
+    path = str(tmp_path / 'funny.json')
+    list(FakeSnapshotBrowser().scan_section(3, CrawlCheckpointer(path)))
+    checkpointer = CrawlCheckpointer(path)
+    checkpointer.save(f'/gag/{CHAIN[0]}')
+
+    browser = FakeSnapshotBrowser()
+    posts = list(browser.scan_section(2, CrawlCheckpointer(path)))
+    assert [post.post_id for post in posts] == CHAIN[3:5]
+    assert browser.snapshot_post_ids == CHAIN[3:5]
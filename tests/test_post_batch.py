@@ -0,0 +1,64 @@
+import datetime
+
+import numpy
+import pytest
+
+from ninegag_post import NinegagPost
+from post_batch import PostBatch
+
+PUBLISH_TIME = datetime.datetime(2021, 8, 1, 12, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+
+
+def make_posts():
+    fetch_time = PUBLISH_TIME.astimezone().replace(tzinfo=None) + datetime.timedelta(hours=1)
+    return [
+        NinegagPost(post_id='aBm3Qy7', post_type='image', section='Funny', title='First', upvotes=1200,
+                    downvotes=34, comment_count=42, publish_time=PUBLISH_TIME, fetch_time=fetch_time),
+        NinegagPost(post_id='a5rVxKp', post_type='video', section='Gaming', title='Second', upvotes=815,
+                    downvotes=0, comment_count=7, publish_time=PUBLISH_TIME + datetime.timedelta(minutes=30),
+                    fetch_time=fetch_time),
+        NinegagPost(post_id='aKe8WnZ', section='Funny', title='Third'),
+    ]
+
+
+def post_values(post):
+    return tuple(getattr(post, attr) for attr in NinegagPost.__slots__)
+
+
+def test_posts_have_no_dict():
+    with pytest.raises(AttributeError):
+        make_posts()[0].repost = None
+
+
+def test_round_trip():
+    posts = make_posts()
+    batch = PostBatch.from_posts(posts)
+
+    assert len(batch) == 3
+    assert [post_values(post) for post in batch.to_posts()[:2]] == [post_values(post) for post in posts[:2]]
+    missing = batch[2]
+    assert (missing.post_type, missing.upvotes, missing.publish_time, missing.fetch_time) == (None, -1, None, None)
+    assert list(batch.sections) == ['Funny', 'Gaming', 'Funny']
+
+
+def test_vectorized_properties():
+    batch = PostBatch.from_posts(make_posts()[:2])
+
+    assert list(batch.points) == [post.points for post in make_posts()[:2]]
+    assert batch.vote_ratio[0] == pytest.approx(1200 / 34)
+    assert numpy.isnan(batch.vote_ratio[1])
+    assert list(batch.age()) == [3600, 1800]
+    assert list(batch.age(PUBLISH_TIME + datetime.timedelta(days=1))) == [86400, 84600]
+
+
+def test_select_and_concatenate():
+    batch = PostBatch.from_posts(make_posts())
+
+    funny = batch[batch.sections == 'Funny']
+    assert list(funny.post_ids) == ['aBm3Qy7', 'aKe8WnZ']
+    assert list(batch[1:].titles) == ['Second', 'Third']
+
+    combined = PostBatch.concatenate([funny, batch[1:2]])
+    assert list(combined.post_ids) == ['aBm3Qy7', 'aKe8WnZ', 'a5rVxKp']
+    assert list(combined.post_types) == ['image', '', 'video']
+    assert post_values(combined[2]) == post_values(batch[1])
@@ -0,0 +1,73 @@
+import csv
+import datetime
+import gzip
+import itertools
+import json
+import zlib
+
+import pytest
+
+from ninegag_post import NinegagPost
+from post_export import PostExporter
+
+
+def scan(count=None):
+    for i in itertools.count() if count is None else range(count):
+        yield NinegagPost(post_id=f'a{i:06d}', post_type='image', section='Funny', title=f'Post "{i}", again',
+                          upvotes=i, downvotes=1, comment_count=0,
+                          publish_time=datetime.datetime(2021, 8, 1, tzinfo=datetime.timezone.utc),
+                          fetch_time=datetime.datetime(2021, 8, 1, 12))
+
+
+def read_jsonl(path, opener=open):
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_jsonl(tmp_path):
+    with PostExporter(str(tmp_path), batch_size=7) as exporter:
+        assert exporter.export(scan(20)) == 20
+
+    assert len(exporter.paths) == 1
+    rows = read_jsonl(exporter.paths[0])
+    assert [row['post_id'] for row in rows] == [f'a{i:06d}' for i in range(20)]
+    assert rows[3]['title'] == 'Post "3", again'
+    assert rows[3]['publish_time'] == '2021-08-01T00:00:00+00:00'
+
+
+def test_export_csv_gzip_rotated_by_size(tmp_path):
+    with PostExporter(str(tmp_path), export_format='csv', compression='gzip', batch_size=50,
+                      rotate_bytes=1, fsync_interval=0) as exporter:
+        exporter.export(scan(200))
+
+    assert len(exporter.paths) == 4
+    assert all(path.endswith('.csv.gz') for path in exporter.paths)
+    rows = []
+    for path in exporter.paths:
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            rows.extend(csv.DictReader(f))
+    assert [row['post_id'] for row in rows] == [f'a{i:06d}' for i in range(200)]
+    assert rows[5]['title'] == 'Post "5", again'
+
+
+def test_export_rotated_by_time(tmp_path):
+    with PostExporter(str(tmp_path), batch_size=10, rotate_seconds=0) as exporter:
+        exporter.export(scan(30))
+    assert [len(read_jsonl(path)) for path in exporter.paths] == [10, 10, 10]
+
+
+def test_infinite_scan_is_written_while_streaming(tmp_path):
+    with PostExporter(str(tmp_path), compression='gzip', batch_size=100, fsync_interval=0) as exporter:
+        posts = scan()
+        exporter.export(itertools.islice(posts, 1000))
+        # Already decompressible before the exporter is closed, though the gzip stream has not ended
+        with open(exporter.paths[0], 'rb') as f:
+            lines = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(f.read()).splitlines()
+        assert len(lines) == 1000
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        PostExporter(str(tmp_path), export_format='xml')
+    with pytest.raises(ValueError):
+        PostExporter(str(tmp_path), compression='bz2')
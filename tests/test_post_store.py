@@ -0,0 +1,77 @@
+import datetime
+
+import pytest
+
+from ninegag_post import NinegagPost
+from post_store import PostSink, PostStore
+
+PUBLISH_TIME = datetime.datetime(2021, 8, 1, 12, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+
+
+def make_post(post_id, upvotes=10, fetch_time=datetime.datetime(2021, 8, 1, 12, 30), section='Funny'):
+    return NinegagPost(post_id=post_id, post_type='image', section=section, title=f'Post {post_id}',
+                       upvotes=upvotes, downvotes=1, comment_count=3, publish_time=PUBLISH_TIME, fetch_time=fetch_time)
+
+
+@pytest.fixture
+def post_store(tmp_path):
+    with PostStore(str(tmp_path / 'posts.db')) as post_store:
+        yield post_store
+
+
+def test_add_and_get_post(post_store):
+    assert post_store.add_posts([make_post('a1'), make_post('a2', section='Gaming')]) == 2
+
+    post = post_store.get_post('a1')
+    assert (post.post_id, post.section, post.title, post.upvotes) == ('a1', 'Funny', 'Post a1', 10)
+    assert post.publish_time == PUBLISH_TIME
+    assert post.fetch_time == datetime.datetime(2021, 8, 1, 12, 30)
+    assert post_store.get_post('missing') is None
+    assert post_store.count_posts() == 2
+    assert post_store.count_posts('Gaming') == 1
+
+
+def test_duplicates_add_snapshots(post_store):
+    post_store.add_posts([make_post('a1')])
+    assert post_store.add_posts([make_post('a1', upvotes=50, fetch_time=datetime.datetime(2021, 8, 1, 13))]) == 0
+    assert post_store.add_posts([make_post('a1', upvotes=60, fetch_time=datetime.datetime(2021, 8, 1, 13))]) == 0
+
+    assert post_store.count_posts() == 1
+    assert post_store.get_post('a1').upvotes == 60
+    assert post_store.has_post('a1')
+
+
+def test_add_posts_from_generator(post_store):
+    assert post_store.add_posts(make_post(post_id) for post_id in ('a1', 'a2')) == 2
+    assert post_store.get_post('a2').upvotes == 10
+
+
+def test_iter_posts(post_store):
+    later_publish_time = PUBLISH_TIME + datetime.timedelta(days=1)
+    post_store.add_posts([make_post('a1'), make_post('a2', section='Gaming'),
+                          make_post('a1', upvotes=50, fetch_time=datetime.datetime(2021, 8, 1, 13))])
+    post_store.add_posts([NinegagPost(post_id='a3', section='Funny', title='Post a3', publish_time=later_publish_time)])
+
+    posts = list(post_store.iter_posts())
+    assert [(post.post_id, post.upvotes) for post in posts] == [('a1', 50), ('a2', 10), ('a3', None)]
+    assert [post.post_id for post in post_store.iter_posts('Funny')] == ['a1', 'a3']
+    assert [post.post_id for post in post_store.iter_posts(published_after=later_publish_time)] == ['a3']
+
+
+def test_sink_batches(post_store):
+    posts = [make_post(f'a{i % 25}', fetch_time=datetime.datetime(2021, 8, 1, 12, i)) for i in range(50)]
+    sink = PostSink(post_store, batch_size=20)
+
+    assert sink.consume(iter(posts)) == 25
+    assert sink.item_count == 50
+    assert post_store.count_posts() == 25
+
+
+def test_sink_flushes_on_failure(post_store):
+    def failing_scan():
+        yield make_post('a1')
+        raise RuntimeError('Driver hang')
+
+    with pytest.raises(RuntimeError):
+        PostSink(post_store).consume(failing_scan())
+    assert post_store.has_post('a1')
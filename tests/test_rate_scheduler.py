@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_scheduler import RateScheduler, rate_key
+
+
+def test_slots_are_spaced():
+    scheduler = RateScheduler()
+    waits = [scheduler.reserve('9gag.com', 1, scale=0.01) for _ in range(4)]
+
+    assert waits[0] == 0
+    for previous_wait, next_wait in zip(waits, waits[1:]):
+        assert next_wait - previous_wait == pytest.approx(1, abs=0.1)
+
+
+def test_keys_are_independent():
+    scheduler = RateScheduler()
+    scheduler.reserve('9gag.com', 10)
+    assert scheduler.reserve('img-9gag-fun.9cache.com', 10) == 0
+
+
+def test_work_overlaps_delay():
+    scheduler = RateScheduler()
+    scheduler.wait('9gag.com', 0.1, scale=0.01)
+    time.sleep(0.2)  # Working on the previous page takes longer than the delay
+    assert scheduler.wait('9gag.com', 0.1, scale=0.01) == 0
+
+
+def test_burst():
+    scheduler = RateScheduler(burst=3)
+    waits = [scheduler.reserve('9gag.com', 1, scale=0.01) for _ in range(4)]
+    assert waits[:2] == [0, 0]
+    assert waits[3] > 0
+
+
+def test_async_wait_and_stats():
+    scheduler = RateScheduler()
+
+    async def wait_all():
+        return await asyncio.gather(*(scheduler.async_wait('9gag.com', 0.05, scale=0.001) for _ in range(4)))
+
+    start = time.perf_counter()
+    waits = asyncio.run(wait_all())
+    elapsed = time.perf_counter() - start
+
+    assert elapsed == pytest.approx(max(waits), abs=0.05)
+    assert scheduler.stats() == {'9gag.com': {'requests': 4, 'waited_seconds': pytest.approx(sum(waits))}}
+    assert scheduler.waited_seconds == pytest.approx(sum(waits))
+
+
+def test_rate_key():
+    assert rate_key('https://9gag.com/gag/aBm3Qy7') == '9gag.com'
+    # Relative urls share the key of their host
+    assert rate_key('/gag/aBm3Qy7', 'https://9gag.com') == '9gag.com'
+    assert rate_key('https://9gag.com/gag/aBm3Qy7', 'https://img-9gag-fun.9cache.com') == '9gag.com'
@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+import requests
+
+from ninegag_post import NinegagPost
+from repoll_scheduler import RepollScheduler
+
+START_TIME = 1627819200  # 2021-08-01 12:00 UTC
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = START_TIME
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_post(post_id, clock, upvotes=0, age=0):
+    return NinegagPost(post_id=post_id, section='Funny', title=post_id, upvotes=upvotes, downvotes=0, comment_count=0,
+                       publish_time=datetime.datetime.fromtimestamp(clock() - age, datetime.timezone.utc),
+                       fetch_time=datetime.datetime.fromtimestamp(clock()))
+
+
+def make_scheduler(clock, votes_per_second, **kwargs):
+    def fetch_post(url):
+        post_id = url.split('/')[-1]
+        if post_id not in votes_per_second:
+            raise requests.HTTPError('404 Not Found')
+        return NinegagPost(post_id=post_id, section='Funny', title=post_id,
+                           upvotes=int(votes_per_second[post_id] * (clock() - START_TIME)), downvotes=0,
+                           comment_count=0, fetch_time=datetime.datetime.fromtimestamp(clock()))
+
+    return RepollScheduler(fetch_post, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_fast_posts_are_polled_more():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, {'fast': 1, 'slow': 0.001}, request_budget=3600)
+    scheduler.track(make_post('fast', clock, age=3600))
+    scheduler.track(make_post('slow', clock, age=3600))
+
+    deltas = list(scheduler.run(max_polls=30))
+
+    polls = [delta.post_id for delta in deltas]
+    assert polls.count('fast') > 3 * polls.count('slow')
+    fast_deltas = [delta for delta in deltas if delta.post_id == 'fast']
+    assert all(delta.upvotes == round(delta.elapsed) for delta in fast_deltas)
+
+
+def test_request_budget():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, {f'a{i}': 1 for i in range(10)}, request_budget=60, min_interval=1)
+    for i in range(10):
+        scheduler.track(make_post(f'a{i}', clock, age=60))
+
+    list(scheduler.run(max_polls=20))
+    assert clock() - START_TIME >= 19 * 60
+
+
+def test_stale_and_missing_posts_are_dropped():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, {'old': 0}, max_age=3600)
+    scheduler.track(make_post('old', clock, age=3500))
+    scheduler.track(make_post('deleted', clock, age=60))
+
+    list(scheduler.run())
+    assert len(scheduler) == 0
+
+
+def test_track_without_times():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, {'a0': 1})
+    for missing_time in ('publish_time', 'fetch_time'):
+        post = make_post('a0', clock)
+        setattr(post, missing_time, None)
+        with pytest.raises(ValueError):
+            scheduler.track(post)
+    assert len(scheduler) == 0
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import repost_index
+from ninegag_post import NinegagPost
+from repost_index import RepostIndex, dhash, dhash_batch, hamming_distances, thumbnail
+
+
+def make_image(seed, size=(120, 90)):
+    # Smooth blobs, like downscaled photos, rather than noise that no perceptual hash survives
+    rng = np.random.default_rng(seed)
+    return np.kron(rng.integers(0, 256, (size[0] // 15, size[1] // 15)), np.ones((15, 15)))
+
+
+def test_thumbnail():
+    image = np.arange(36, dtype=np.float64).reshape(4, 9)
+    assert np.array_equal(thumbnail(image, 2, 3), [[5.5, 8.5, 11.5], [23.5, 26.5, 29.5]])
+    # Images smaller than the thumbnail are stretched
+    assert thumbnail(np.ones((3, 5)), 8, 9).shape == (8, 9)
+
+
+def test_dhash():
+    thumbnails = np.array([np.tile(np.arange(9), (8, 1)), np.tile(np.arange(9)[::-1], (8, 1))])
+    assert list(dhash_batch(thumbnails)) == [2 ** 64 - 1, 0]
+    assert list(hamming_distances(0b1011, [0b1011, 0b0000, 2 ** 64 - 1])) == [0, 3, 61]
+
+    image = make_image(1)
+    upscaled = np.kron(image, np.ones((3, 3)))
+    watermarked = image.copy()
+    watermarked[-8:, -30:] = 255
+    for variant in (upscaled, watermarked, image * 0.8 + 20):
+        assert hamming_distances(dhash(image), [dhash(variant)])[0] <= 6
+    assert hamming_distances(dhash(image), [dhash(make_image(2))])[0] > 6
+
+
+def test_repost_index(tmp_path):
+    path = str(tmp_path / 'reposts.db')
+    images = [make_image(1), make_image(2), np.kron(make_image(1), np.ones((2, 2))), make_image(1) * 0.9]
+    posts = [NinegagPost(f'a{i}', 'Funny', '') for i in range(len(images))]
+
+    with RepostIndex(path) as repost_index:
+        assert repost_index.add(posts[0], dhash(images[0])) is None
+        assert repost_index.add_many(posts[1:], [dhash(image) for image in images[1:]]) == [None, 'a0', 'a0']
+        assert [post.repost_of for post in posts] == [None, None, 'a0', 'a0']
+        assert repost_index.count() == 4
+
+    with RepostIndex(path) as repost_index:
+        matches = repost_index.lookup(dhash(images[0]))
+        assert [post_id for post_id, _, _ in matches][0] == 'a0'
+        assert {post_id for post_id, _, _ in matches} == {'a0', 'a2', 'a3'}
+        # Already indexed posts keep their link
+        post = NinegagPost('a2', 'Funny', '')
+        assert repost_index.add(post, dhash(images[1])) == 'a0'
+        assert repost_index.count() == 4
+
+
+@pytest.mark.parametrize('flipped_bits, is_match', ((6, True), (7, False)))
+def test_lookup_distance(tmp_path, flipped_bits, is_match):
+    image_hash = 0x0123456789abcdef
+    # Flipped bits spread over the chunks, so no chunk matches exactly
+    flipped_hash = image_hash ^ sum(1 << bit for bit in (0, 17, 34, 51, 5, 22, 39)[:flipped_bits])
+    with RepostIndex(str(tmp_path / 'reposts.db')) as repost_index:
+        repost_index.add(NinegagPost('a0', 'Funny', ''), image_hash)
+        assert repost_index.lookup(flipped_hash) == ([('a0', flipped_bits, None)] if is_match else [])
+
+
+def test_link_reposts(tmp_path):
+    image_module = pytest.importorskip('PIL.Image')
+
+    class MediaFile:
+        def __init__(self, path):
+            self.path = path
+
+    downloads = []
+    for i, image in enumerate((make_image(1), make_image(2), np.kron(make_image(1), np.ones((2, 2))))):
+        path = str(tmp_path / f'{i}.png')
+        image_module.fromarray(image.astype(np.uint8)).save(path)
+        downloads.append((NinegagPost(f'a{i}', 'Funny', ''), MediaFile(path)))
+    downloads.append((NinegagPost('a3', 'Funny', '', post_type='video'), MediaFile(str(tmp_path / 'missing.mp4'))))
+
+    with RepostIndex(str(tmp_path / 'reposts.db')) as repost_index:
+        posts = list(repost_index.link_reposts(downloads, batch_size=2))
+    assert [post.repost_of for post in posts] == [None, None, 'a0', None]
+
+
+def test_link_reposts_without_pillow(tmp_path, monkeypatch):
+    monkeypatch.setattr(repost_index, 'Image', None)
+    downloads = iter([(NinegagPost('a0', 'Funny', ''), None)])
+
+    with RepostIndex(str(tmp_path / 'reposts.db')) as index:
+        with pytest.raises(ImportError, match='Pillow'):
+            next(index.link_reposts(downloads))
+    assert next(downloads, None) is not None  # Failed before consuming the downloads
@@ -0,0 +1,97 @@
+import collections
+import contextlib
+import itertools
+import os
+import time
+
+from ninegag_post import NinegagPost
+from sharded_crawler import ShardedCrawler
+
+# Post ids of each section feed, funny and memes overlap
+SECTION_POST_IDS = {
+    'funny': [f'a{i}' for i in range(10)],
+    'memes': [f'a{i}' for i in range(5, 15)],
+    'gaming': [f'g{i}' for i in range(10)],
+}
+BUSY_POST_TIME = 0.005  # Seconds, posts of the busy section keep the output queue from emptying
+
+
+class FakeBrowser(contextlib.AbstractContextManager):
+    def __init__(self, crash_marker=None, scan_log=None, **options):
+        self._crash_marker = crash_marker
+        self._scan_log = scan_log
+        self._post_ids = None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def go_to_section(self, section_name, fresh=False):
+        if section_name == 'busy':
+            self._post_ids = (f'b{i}' for i in itertools.count())
+            return
+        self._post_ids = [f'{post_id}f' if fresh else post_id for post_id in SECTION_POST_IDS[section_name]]
+
+    def scan_section(self, max_iterations, claim=None):
+        for i, post_id in enumerate(self._post_ids):
+            # The first worker to reach the 4th post of gaming dies, once
+            if self._crash_marker and post_id == 'g3' and not os.path.exists(self._crash_marker):
+                open(self._crash_marker, 'w').close()
+                os._exit(1)
+            if claim is not None and not claim(post_id):
+                continue
+            if post_id.startswith('b'):
+                time.sleep(BUSY_POST_TIME)
+            if self._scan_log:
+                with open(self._scan_log, 'a') as f:
+                    f.write(f'{post_id}\n')
+            yield NinegagPost(post_id=post_id, section=post_id[0], title=str(i))
+
+
+def test_crawl_dedups_across_sections(tmp_path):
+    scan_log = str(tmp_path / 'scanned')
+    with ShardedCrawler(processes=2, headless=False, browser_class=FakeBrowser, scan_log=scan_log) as crawler:
+        posts = list(crawler.crawl(['funny', 'memes', 'gaming'], -1))
+
+    with open(scan_log) as f:
+        scanned_post_ids = f.read().split()
+    assert len(scanned_post_ids) == len(set(scanned_post_ids))  # Posts of both funny and memes are scanned once
+
+    post_ids = [post.post_id for post in posts]
+    assert len(post_ids) == len(set(post_ids))
+    assert set(post_ids) == set(SECTION_POST_IDS['funny'] + SECTION_POST_IDS['memes'] + SECTION_POST_IDS['gaming'])
+    gaming_post_ids = [post_id for post_id in post_ids if post_id.startswith('g')]
+    assert gaming_post_ids == SECTION_POST_IDS['gaming']  # Posts of a shard keep their order
+
+
+def test_crawl_fresh_variants_and_max_iterations():
+    with ShardedCrawler(processes=4, headless=False, browser_class=FakeBrowser) as crawler:
+        posts = list(crawler.crawl(['gaming'], 3, fresh=(False, True)))
+
+    assert collections.Counter(post.post_id.endswith('f') for post in posts) == {False: 3, True: 3}
+
+
+def test_restart_dead_worker(tmp_path):
+    crash_marker = str(tmp_path / 'crashed')
+    with ShardedCrawler(processes=2, headless=False, browser_class=FakeBrowser, crash_marker=crash_marker) as crawler:
+        posts = list(crawler.crawl(['gaming'], 8))
+
+    assert os.path.exists(crash_marker)
+    assert [post.post_id for post in posts] == SECTION_POST_IDS['gaming'][:8]
+
+
+def test_stop_early():
+    with ShardedCrawler(processes=2, headless=False, browser_class=FakeBrowser) as crawler:
+        posts = crawler.crawl(['funny', 'gaming'], -1)
+        assert next(posts).post_id in ('a0', 'g0')
+        posts.close()
+
+
+def test_restart_dead_worker_while_busy(tmp_path):
+    crash_marker = str(tmp_path / 'crashed')
+    with ShardedCrawler(processes=2, headless=False, browser_class=FakeBrowser, crash_marker=crash_marker) as crawler:
+        posts = list(crawler.crawl(['busy', 'gaming', 'funny'], 400))
+
+    post_ids = [post.post_id for post in posts]
+    assert [post_id for post_id in post_ids if post_id.startswith('g')] == SECTION_POST_IDS['gaming']
+    # The dead worker is replaced while the busy shard still sends posts, so the pending shard starts meanwhile
+    assert post_ids.index('a0') < post_ids.index('b399')
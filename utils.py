@@ -1,5 +1,4 @@
 import logging
-import numpy.random
 import time
 
 NORMAL_MIN_COEFFICIENT = 0.2  # determines minimal value proportionally to value
@@ -37,15 +36,33 @@ def random_wait(seconds, scale=None, min_value=None):
         min_value (float): Minimal value of delay. This is to prevent negative or very small values.
                            By default, scales proportionally to the given value.
     """
+    seconds_to_wait = random_delay(seconds, scale, min_value)
+    time.sleep(seconds_to_wait)
+
+    return seconds_to_wait
+
+
+def random_delay(seconds, scale=None, min_value=None):
+    """
+    Draws a random delay, based on normal distribution. For more details on arguments see random_wait()
+
+    Args:
+        seconds (float): Value around which the random delay will be determined
+        scale (float):
+        min_value (float):
+
+    Returns:
+        float: Delay in seconds
+    """
     if not scale:
         scale = NORMAL_SCALE_COEFFICIENT * seconds
     if not min_value:
         min_value = NORMAL_MIN_COEFFICIENT * seconds
 
+    import numpy.random  # Imported when first used, it takes longer to import than short jobs take to run
+
     seconds_to_wait = numpy.random.normal(seconds, scale)
     if seconds_to_wait < min_value:
         seconds_to_wait = abs(min_value - seconds_to_wait) + min_value
 
-    time.sleep(seconds_to_wait)
-
     return seconds_to_wait